@@ -11,15 +11,33 @@
 """
 
 import base64
+import itertools
 import logging
-from datetime import datetime, timedelta
-from urllib.parse import quote, unquote
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from urllib.parse import parse_qsl, unquote
 
-import requests
-from flask import Flask, Response, jsonify, request
+from flask import Flask, Response, g, jsonify, request, send_file, stream_with_context
 from flask_cors import CORS
+from werkzeug.http import is_resource_modified, unquote_etag
 
+from article_bundle import (BUNDLE_FORMATS, BundledImage, ImageBundler, MultipartWriter, bundle_summary,
+                            inline_images)
+from article_cache import ArticleCache
+from article_payload import build_article_payload
+from article_store import open_article_store
+from batch_extract import BatchExtractor
 from config import Config
+from content_chunks import InvalidCursor, chunk_info, content_digest, decode_cursor, split_content
+from http_client import FetchError, FetchTimeout, get_http_client
+from image_cache import CachedImage, ImageCache, ImageTooLarge, fetch_upstream_image, iter_limited
+from image_prefetch import ImagePrefetcher
+from job_queue import JobWorker, open_job_queue
+from image_variants import InvalidVariant, VariantRenderer, VariantSpec, VariantUnavailable, parse_variant
+from fast_json import FastJSONProvider, dumps
+from metrics import CACHE_RESULTS, IMAGE_VARIANT_SECONDS, REQUEST_SECONDS, StageTimings, registry
+from near_duplicates import open_duplicate_index
 from web_scraper import WebScraper
 
 # 设置日志
@@ -31,10 +49,78 @@ logger = logging.getLogger(__name__)
 
 # 创建Flask应用
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 CORS(app)
 
-# 初始化网页抓取器
-scraper = WebScraper()
+# spawn方式启动的子进程（图片变体、解析进程池）会以 __mp_main__ 重新导入 `python app.py` 运行的本模块，
+# 子进程中不初始化服务（否则每个子进程都会创建抓取器、缓存、索引，并领取异步任务）
+if __name__ != '__mp_main__':
+    # 初始化网页抓取器（开启解析进程池时在此启动全部子进程，不在事件循环中等待）
+    scraper = WebScraper()
+    scraper.parse_pool.start()
+
+    # 初始化图片缓存
+    image_cache = ImageCache()
+
+    # 初始化图片变体生成器（缩放、转码在进程池中执行）
+    variant_renderer = VariantRenderer()
+
+    # 初始化图片预取调度器（/extract 成功后在后台下载文章图片）
+    image_prefetcher = ImagePrefetcher(lambda image_url: _fetch_image(image_url, _default_variant()))
+
+    # 初始化文章打包的图片获取线程池
+    image_bundler = ImageBundler()
+
+    # 初始化文章库（新抓取的文章写入全文索引，/articles/search 检索）
+    article_store = open_article_store()
+
+    # 初始化正文指纹索引（不同链接的近似重复文章返回 duplicate_of）
+    duplicate_index = open_duplicate_index()
+
+    # 初始化文章提取结果缓存
+    article_cache = ArticleCache(store=article_store, duplicates=duplicate_index)
+
+    # 初始化批量提取调度器
+    batch_extractor = BatchExtractor()
+
+    # 初始化异步提取任务队列和进程内工作线程（/extract?async=1）；上次退出时未完成的任务立即继续
+    job_queue = open_job_queue()
+    job_worker = None
+    if job_queue is not None:
+        job_worker = JobWorker(job_queue, lambda url: article_cache.get_or_fetch(url, scraper.scrape_article)[0])
+        pending_jobs = job_queue.counts()
+        if pending_jobs['queued'] or pending_jobs['running']:
+            job_worker.start()
+
+    # /metrics 导出时读取各组件的当前统计
+    registry.register_collector('image_cache', '图片缓存统计（见 /health）', image_cache.stats)
+    registry.register_collector('article_cache', '文章缓存统计（见 /health）', article_cache.stats)
+    registry.register_collector('batch', '批量提取统计（见 /health）', batch_extractor.stats)
+    registry.register_collector('http_client', '上游HTTP客户端统计（见 /health）', lambda: get_http_client().stats())
+    registry.register_collector('image_probe', '图片探测统计（见 /health）', scraper.image_prober.stats)
+    registry.register_collector('parse_pool', '解析进程池统计（见 /health）', scraper.parse_pool.stats)
+    registry.register_collector('image_variants', '图片变体统计（见 /health）', variant_renderer.stats)
+    registry.register_collector('image_prefetch', '图片预取统计（见 /health）', image_prefetcher.stats)
+    registry.register_collector('bundle', '文章打包统计（见 /health）', image_bundler.stats)
+    registry.register_collector('jobs', '异步任务统计（见 /health）', lambda: job_worker.stats() if job_worker else {})
+    registry.register_collector('duplicates', '近似重复检测统计（见 /health）',
+                                lambda: duplicate_index.stats() if duplicate_index else {})
+    registry.register_collector('article_store', '文章库统计（见 /health）',
+                                lambda: article_store.stats() if article_store else {})
+
+
+@app.before_request
+def _start_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def _record_request(response):
+    started = g.get('request_started')
+    if started is not None:
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint, request.method, str(response.status_code))
+    return response
 
 
 @app.route('/')
@@ -76,8 +162,15 @@ def index():
         <div class="api-info">
             <h3>📡 API接口</h3>
             <p><strong>文章提取：</strong> POST /extract</p>
-            <p><strong>图片代理：</strong> GET /image/{encoded_url}</p>
+            <p><strong>批量提取：</strong> POST /extract/batch</p>
+            <p><strong>文章打包：</strong> POST /extract/bundle（文字和图片一次返回）</p>
+            <p><strong>正文分块：</strong> GET /extract/chunk?cursor=...（/extract 指定 chunk_tokens 时返回游标）</p>
+            <p><strong>正文分块流式返回：</strong> POST /extract/stream</p>
+            <p><strong>异步提取：</strong> POST /extract?async=1，GET /jobs/&lt;id&gt; 查询结果</p>
+            <p><strong>文章检索：</strong> GET /articles/search?q=检索词，GET /articles/&lt;id&gt; 读取已提取的文章</p>
+            <p><strong>图片代理：</strong> GET /image/{encoded_url}[?w=宽度&amp;q=质量&amp;fmt=webp]</p>
             <p><strong>健康检查：</strong> GET /health</p>
+            <p><strong>运行指标：</strong> GET /metrics</p>
         </div>
         
         <div class="feature">
@@ -96,9 +189,16 @@ def extract_article():
     
     Request Body:
         {
-            "url": "文章链接"
+            "url": "文章链接",
+            "chunk_tokens": 2000, // 可选，正文分块的token预算（true为默认预算）；
+                                  // 指定时content只有第一块，chunk.next_cursor 用于 /extract/chunk 取后续块
+            "async": true         // 可选，同 ?async=1
         }
     
+    Query:
+        debug_timing=1: 在响应中附带本次提取的分阶段耗时（timing字段）
+        async=1: 只把链接加入异步任务队列，立即返回202和任务信息，结果通过 GET /jobs/<id> 查询
+    
     Response:
         {
             "success": true,
@@ -109,7 +209,8 @@ def extract_article():
                 "publish_time": "发布时间",
                 "summary": "文章摘要",
                 "images": [...],
-                "tags": [...]
+                "tags": [...],
+                "duplicate_of": null  // 同一篇文章已通过其他链接提取过时为原文 {"url", "article_id", "distance"}
             }
         }
     """
@@ -122,60 +223,491 @@ def extract_article():
         if not url:
             return jsonify({'success': False, 'error': '请提供文章链接'}), 400
         
-        logger.info(f"开始提取文章内容: {url}")
+        chunk_budget = None
+        if data.get('chunk_tokens') not in (None, False):
+            chunk_budget = _chunk_budget(data['chunk_tokens'])
+            if chunk_budget is None:
+                return jsonify({'success': False, 'error': _CHUNK_TOKENS_ERROR}), 400
+        
+        if request.args.get('async') == '1' or data.get('async') is True:
+            return _enqueue_extract(url, chunk_budget)
         
-        # 抓取文章内容
-        article_data = scraper.scrape_article(url)
+        logger.info("开始提取文章内容: %s", url)
+        
+        # 抓取文章内容（优先使用缓存结果）；缓存命中或等待其他请求抓取时timings中没有阶段耗时
+        timings = StageTimings()
+        article_data, cache_status = article_cache.get_or_fetch(
+            url, lambda target, previous=None: scraper.scrape_article(target, timings, previous)
+        )
+        CACHE_RESULTS.inc('article', cache_status)
         
         if 'error' in article_data:
-            logger.error(f"抓取失败: {article_data['error']}")
+            logger.error("抓取失败: %s", article_data['error'])
             return jsonify({'success': False, 'error': f'抓取文章失败: {article_data["error"]}'}), 500
         
-        # 为GPTs准备数据，包含代理图片URL
-        processed_images = []
-        for i, img in enumerate(article_data['images']):
-            # 生成代理URL
-            encoded_url = base64.b64encode(quote(img['absolute_url'], safe='').encode()).decode()
-            proxy_url = f"{Config.PROXY_BASE_URL}/image/{encoded_url}"
-            
-            processed_images.append({
-                'original_url': img['absolute_url'],
-                'proxy_url': proxy_url,
-                'alt': img['alt'],
-                'title': img['title'],
-                'index': i + 1,
-                'description': f"图片{i+1}" + (f" - {img['alt']}" if img['alt'] else "")
-            })
+        payload = build_article_payload(article_data)
+        if chunk_budget is not None:
+            payload = _chunked_payload(payload, url, 0, chunk_budget)
         
         result = {
+            'success': True,
+            'data': payload
+        }
+        if Config.IMAGE_PREFETCH_ENABLED:
+            image_prefetcher.schedule(
+                img['absolute_url'] for img in article_data['images']
+                if not _is_wechat_image(img['absolute_url'])
+            )
+        if request.args.get('debug_timing') == '1':
+            result['timing'] = dict(timings.as_dict(), cache=cache_status)
+        
+        logger.info("文章内容提取完成: %s (图片数量: %d, 缓存: %s)",
+                    article_data['title'], len(article_data['images']), cache_status)
+        response = jsonify(result)
+        response.headers['X-Cache'] = cache_status.upper()
+        return response
+        
+    except Exception as e:
+        logger.error("提取文章内容失败: %s", e)
+        return jsonify({'success': False, 'error': f'提取失败: {str(e)}'}), 500
+
+
+@app.route('/extract/batch', methods=['POST'])
+def extract_batch():
+    """
+    批量提取文章内容，结果以NDJSON逐行流式返回
+    
+    Request Body:
+        {
+            "urls": ["文章链接1", "文章链接2", ...]
+        }
+    
+    Response (application/x-ndjson，按完成顺序，每行一篇):
+        {"index": 0, "success": true, "url": "...", "title": "...", ...}
+        {"index": 1, "success": false, "url": "...", "error": "...", ...}
+    
+    成功的行与 /extract 的 data 字段结构一致；失败的行与 _create_error_response 结构一致
+    """
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify({'success': False, 'error': '请求体不能为空'}), 400
+    
+    urls = data.get('urls')
+    if not isinstance(urls, list) or not urls or not all(isinstance(u, str) and u for u in urls):
+        return jsonify({'success': False, 'error': '请提供文章链接列表 urls'}), 400
+    if len(urls) > Config.BATCH_MAX_URLS:
+        return jsonify({'success': False, 'error': f'单次最多提交 {Config.BATCH_MAX_URLS} 个链接'}), 400
+    
+    logger.info("开始批量提取文章内容: %d 个链接", len(urls))
+    
+    def fetch(url):
+        article_data, cache_status = article_cache.get_or_fetch(url, scraper.scrape_article)
+        CACHE_RESULTS.inc('article', cache_status)
+        return article_data
+    
+    def generate():
+        for article_data in batch_extractor.run(urls, fetch, scraper._create_error_response):
+            if 'error' in article_data:
+                line = dict(article_data, success=False)
+            else:
+                line = dict(build_article_payload(article_data),
+                            success=True, url=article_data['url'], index=article_data['index'])
+            yield dumps(line, newline=True)
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
+@app.route('/extract/chunk')
+def extract_chunk():
+    """
+    按游标返回正文的后续分块，从文章缓存读取，不重新抓取
+    
+    Query:
+        cursor: /extract 或上一块返回的 chunk.next_cursor
+    
+    Response:
+        {
+            "success": true,
+            "data": {
+                "title": "文章标题",
+                "content": "本块正文",
+                "chunk": {"index": 1, "total": 5, "tokens": 1987, "content_length": 48000, "next_cursor": "..."}
+            }
+        }
+    
+    游标生成后文章内容已更新时返回409，需重新调用 /extract
+    """
+    try:
+        cursor = decode_cursor(request.args.get('cursor', ''))
+    except InvalidCursor as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    if _chunk_budget(cursor['budget']) is None:
+        return jsonify({'success': False, 'error': '游标无效'}), 400
+    
+    try:
+        article_data, cache_status = article_cache.get_or_fetch(cursor['url'], scraper.scrape_article)
+        CACHE_RESULTS.inc('article', cache_status)
+        
+        if 'error' in article_data:
+            logger.error("抓取失败: %s", article_data['error'])
+            return jsonify({'success': False, 'error': f'抓取文章失败: {article_data["error"]}'}), 500
+        
+        content = article_data['content']
+        if content_digest(content) != cursor['digest']:
+            return jsonify({'success': False, 'error': '文章内容已更新，请重新调用 /extract'}), 409
+        
+        chunks = split_content(content, cursor['budget'])
+        if cursor['index'] >= len(chunks):
+            return jsonify({'success': False, 'error': '游标无效'}), 400
+        
+        response = jsonify({
             'success': True,
             'data': {
                 'title': article_data['title'],
-                'content': article_data['content'],
-                'author': article_data['author'],
-                'publish_time': article_data['publish_time'],
-                'summary': article_data['summary'],
-                'images': processed_images,
-                'tags': article_data['tags']
+                'content': chunks[cursor['index']],
+                'chunk': chunk_info(chunks, cursor['index'], cursor['url'], cursor['budget'], cursor['digest'])
             }
+        })
+        response.headers['X-Cache'] = cache_status.upper()
+        return response
+        
+    except Exception as e:
+        logger.error("获取正文分块失败: %s", e)
+        return jsonify({'success': False, 'error': f'获取分块失败: {str(e)}'}), 500
+
+
+@app.route('/extract/stream', methods=['POST'])
+def extract_stream():
+    """
+    提取文章内容，正文分块以NDJSON逐行流式返回
+    
+    Request Body:
+        {
+            "url": "文章链接",
+            "chunk_tokens": 2000  // 可选，每块的token预算
         }
+    
+    Response (application/x-ndjson):
+        {"type": "article", "title": "...", "images": [...], ..., "chunks": 5}  // 除content外与 /extract 的data相同
+        {"type": "chunk", "index": 0, "content": "..."}
+        {"type": "chunk", "index": 1, "content": "..."}
+    """
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify({'success': False, 'error': '请求体不能为空'}), 400
+    
+    url = data.get('url')
+    if not url:
+        return jsonify({'success': False, 'error': '请提供文章链接'}), 400
+    
+    chunk_budget = _chunk_budget(data.get('chunk_tokens', True))
+    if chunk_budget is None:
+        return jsonify({'success': False, 'error': _CHUNK_TOKENS_ERROR}), 400
+    
+    try:
+        article_data, cache_status = article_cache.get_or_fetch(url, scraper.scrape_article)
+        CACHE_RESULTS.inc('article', cache_status)
+        
+        if 'error' in article_data:
+            logger.error("抓取失败: %s", article_data['error'])
+            return jsonify({'success': False, 'error': f'抓取文章失败: {article_data["error"]}'}), 500
+        
+        payload = build_article_payload(article_data)
+        chunks = split_content(payload.pop('content'), chunk_budget)
+        
+        def generate():
+            yield dumps(dict(payload, type='article', chunks=len(chunks)), newline=True)
+            for index, chunk in enumerate(chunks):
+                yield dumps({'type': 'chunk', 'index': index, 'content': chunk}, newline=True)
         
-        logger.info(f"文章内容提取完成: {article_data['title']} (图片数量: {len(processed_images)})")
-        return jsonify(result)
+        response = Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+        response.headers['X-Cache'] = cache_status.upper()
+        return response
         
     except Exception as e:
-        logger.error(f"提取文章内容失败: {str(e)}")
+        logger.error("流式提取文章失败: %s", e)
         return jsonify({'success': False, 'error': f'提取失败: {str(e)}'}), 500
 
 
+_CHUNK_TOKENS_ERROR = f"chunk_tokens 应为 {Config.CONTENT_CHUNK_MIN_TOKENS}~{Config.CONTENT_CHUNK_MAX_TOKENS} 的整数"
+
+
+def _enqueue_extract(url: str, chunk_budget: Optional[int]):
+    """把链接加入异步任务队列（/extract?async=1）"""
+    if job_queue is None:
+        return jsonify({'success': False, 'error': '异步任务队列不可用'}), 503
+    
+    job = job_queue.enqueue(url, {'chunk_tokens': chunk_budget} if chunk_budget else None)
+    job_worker.start()
+    job_worker.notify()
+    logger.info("文章提取任务已入队: %s (%s)", job['id'], url)
+    
+    response = jsonify({'success': True, 'job': _job_view(job)})
+    response.status_code = 202
+    response.headers['Location'] = f"/jobs/{job['id']}"
+    return response
+
+
+def _job_view(job: dict) -> dict:
+    """任务的对外信息（不含抓取结果）"""
+    return {
+        'id': job['id'],
+        'url': job['url'],
+        'status': job['status'],
+        'attempts': job['attempts'],
+        'error': job['error'],
+        'created_at': datetime.fromtimestamp(job['created_at'], timezone.utc).isoformat(),
+        'updated_at': datetime.fromtimestamp(job['updated_at'], timezone.utc).isoformat(),
+        'status_url': f"{Config.PROXY_BASE_URL}/jobs/{job['id']}"
+    }
+
+
+def _chunk_budget(value) -> Optional[int]:
+    """校验分块的token预算，true为默认预算；不合法时返回None"""
+    if value is True:
+        return Config.CONTENT_CHUNK_TOKENS
+    if isinstance(value, bool) or not isinstance(value, int):
+        return None
+    if not Config.CONTENT_CHUNK_MIN_TOKENS <= value <= Config.CONTENT_CHUNK_MAX_TOKENS:
+        return None
+    return value
+
+
+def _chunked_payload(payload: dict, url: str, index: int, budget: int) -> dict:
+    """把文章数据的content替换为第index块，并附上分块信息"""
+    chunks = split_content(payload['content'], budget)
+    digest = content_digest(payload['content'])
+    return dict(payload, content=chunks[index], chunk=chunk_info(chunks, index, url, budget, digest))
+
+
+@app.route('/extract/bundle', methods=['POST'])
+def extract_bundle():
+    """
+    提取文章内容并在同一响应中返回图片内容，客户端不必再逐张请求 /image/...
+    
+    Request Body:
+        {
+            "url": "文章链接",
+            "format": "json"（默认，图片内联为data URI）或 "multipart"（multipart/mixed 流）,
+            "w": 1024, "q": 80, "fmt": "webp",  // 可选，图片缩放/转码参数，默认与proxy_url相同
+            "max_bytes": 5242880  // 可选，图片总字节预算，不超过 BUNDLE_MAX_BYTES
+        }
+    
+    Response (json):
+        {
+            "success": true,
+            "data": {...与 /extract 相同，图片附带 data_uri，未内联的图片附带 inline_error...},
+            "bundle": {"inlined": 3, "skipped": 1, "bytes": 123456, "errors": [...]}
+        }
+    
+    Response (multipart/mixed):
+        第一部分为与 /extract 相同的JSON（name="article"），之后按下载完成顺序每张图片一个部分
+        （Content-ID: <image-序号>，与 images[].index 对应），最后一部分为打包汇总JSON（name="bundle"）
+    """
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify({'success': False, 'error': '请求体不能为空'}), 400
+    
+    url = data.get('url')
+    if not url:
+        return jsonify({'success': False, 'error': '请提供文章链接'}), 400
+    
+    bundle_format = data.get('format', 'json')
+    if bundle_format not in BUNDLE_FORMATS:
+        return jsonify({'success': False, 'error': f"format 应为 {' / '.join(BUNDLE_FORMATS)}"}), 400
+    
+    max_bytes = data.get('max_bytes', Config.BUNDLE_MAX_BYTES)
+    if not isinstance(max_bytes, int) or max_bytes < 0:
+        return jsonify({'success': False, 'error': 'max_bytes 应为非负整数'}), 400
+    max_bytes = min(max_bytes, Config.BUNDLE_MAX_BYTES)
+    
+    try:
+        variant_args = {name: str(data[name]) for name in ('w', 'q', 'fmt') if data.get(name) not in (None, '')}
+        variant = parse_variant(variant_args) if variant_args else _default_variant()
+    except InvalidVariant as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    try:
+        logger.info("开始打包文章: %s", url)
+        
+        article_data, cache_status = article_cache.get_or_fetch(url, scraper.scrape_article)
+        CACHE_RESULTS.inc('article', cache_status)
+        
+        if 'error' in article_data:
+            logger.error("抓取失败: %s", article_data['error'])
+            return jsonify({'success': False, 'error': f'抓取文章失败: {article_data["error"]}'}), 500
+        
+        payload = build_article_payload(article_data)
+        
+        # 图片列表一确定即全部提交并发获取（在发送文章文字之前）；微信图片无法代理，直接标记
+        wechat = [BundledImage(img.index, img.original_url, error='微信图片受反盗链保护，无法获取')
+                  for img in payload['images'] if _is_wechat_image(img.original_url)]
+        fetched = image_bundler.fetch_all(
+            lambda image_url: _fetch_image(image_url, variant),
+            [(img.index, img.original_url) for img in payload['images'] if not _is_wechat_image(img.original_url)],
+            max_bytes
+        )
+        results = itertools.chain(wechat, fetched)
+        
+        if bundle_format == 'multipart':
+            writer = MultipartWriter()
+            
+            def generate():
+                # 先发送文章文字（图片已在后台获取），图片按完成顺序陆续发送
+                try:
+                    yield writer.json_part('article', {'success': True, 'data': payload})
+                    finished = []
+                    for result in results:
+                        finished.append(result)
+                        if result.image is not None:
+                            yield writer.image_part(result)
+                    yield writer.json_part('bundle', bundle_summary(finished))
+                    yield writer.close()
+                finally:
+                    # 客户端中途断开时取消尚未开始的图片获取
+                    fetched.close()
+            
+            response = Response(stream_with_context(generate()), content_type=writer.content_type)
+        else:
+            results = list(results)
+            response = jsonify({
+                'success': True,
+                'data': inline_images(payload, results),
+                'bundle': bundle_summary(results)
+            })
+        
+        response.headers['X-Cache'] = cache_status.upper()
+        return response
+        
+    except Exception as e:
+        logger.error("打包文章失败: %s", e)
+        return jsonify({'success': False, 'error': f'打包失败: {str(e)}'}), 500
+
+
+@app.route('/jobs/<job_id>')
+def get_job(job_id):
+    """
+    查询异步提取任务（/extract?async=1 返回的任务id）
+    
+    Response:
+        排队或执行中: {"success": true, "job": {"status": "queued" / "running", ...}}，附带 Retry-After
+        已完成: {"success": true, "job": {...}, "data": {...}}，data 与 /extract 的 data 结构一致
+        失败（重试次数用尽）: {"success": false, "job": {...}, "error": "..."}
+    """
+    if job_queue is None:
+        return jsonify({'success': False, 'error': '异步任务队列不可用'}), 503
+    
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': '任务不存在'}), 404
+    
+    result = {'success': job['status'] != 'failed', 'job': _job_view(job)}
+    if job['status'] == 'done':
+        payload = build_article_payload(job['result'])
+        chunk_budget = job['options'].get('chunk_tokens')
+        if chunk_budget:
+            payload = _chunked_payload(payload, job['url'], 0, chunk_budget)
+        result['data'] = payload
+    elif job['status'] == 'failed':
+        result['error'] = f'抓取文章失败: {job["error"]}'
+    
+    response = jsonify(result)
+    if job['status'] in ('queued', 'running'):
+        response.headers['Retry-After'] = str(max(1, int(Config.JOB_POLL_INTERVAL)))
+    return response
+
+
+@app.route('/articles/search')
+def search_articles():
+    """
+    在文章库中全文检索已提取过的文章（标题、作者、标签、正文），按相关度排序
+    
+    Query:
+        q: 检索词，多个词以空格分隔时须同时出现；中文可检索正文中任意连续的词语
+        platform: 可选，只检索该平台的文章（wechat / csdn / ...）
+        limit: 可选，返回条数（默认10，最多50）
+    
+    Response:
+        {
+            "success": true,
+            "data": {
+                "query": "检索词",
+                "results": [{"id": "...", "url": "...", "title": "...", "author": "...", "publish_time": "...",
+                             "platform": "...", "snippet": "正文片段", "updated_at": "...", "article_url": "..."}],
+                "took_ms": 1.2
+            }
+        }
+    """
+    if article_store is None:
+        return jsonify({'success': False, 'error': '文章库不可用'}), 503
+    
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'success': False, 'error': '请提供检索词 q'}), 400
+    try:
+        limit = int(request.args.get('limit', Config.ARTICLE_SEARCH_DEFAULT_LIMIT))
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= Config.ARTICLE_SEARCH_MAX_LIMIT:
+        return jsonify({'success': False, 'error': f'limit 须为 1-{Config.ARTICLE_SEARCH_MAX_LIMIT} 的整数'}), 400
+    
+    start = time.perf_counter()
+    results = article_store.search(query, limit, request.args.get('platform', ''))
+    took_ms = (time.perf_counter() - start) * 1000
+    for item in results:
+        item['updated_at'] = datetime.fromtimestamp(item['updated_at'], timezone.utc).isoformat()
+        item['article_url'] = f"{Config.PROXY_BASE_URL}/articles/{item['id']}"
+    
+    return jsonify({
+        'success': True,
+        'data': {'query': query, 'results': results, 'took_ms': round(took_ms, 2)}
+    })
+
+
+@app.route('/articles/<article_id>')
+def get_article(article_id):
+    """
+    读取文章库中的文章（/articles/search 返回的id），不重新抓取
+    
+    Response:
+        {"success": true, "article": {"id", "url", "platform", "created_at", "updated_at"}, "data": {...}}，
+        data 与 /extract 的 data 结构一致
+    """
+    if article_store is None:
+        return jsonify({'success': False, 'error': '文章库不可用'}), 503
+    
+    stored = article_store.get(article_id)
+    if stored is None:
+        return jsonify({'success': False, 'error': '文章不存在'}), 404
+    
+    return jsonify({
+        'success': True,
+        'article': {
+            'id': stored['id'],
+            'url': stored['url'],
+            'platform': stored['platform'],
+            'created_at': datetime.fromtimestamp(stored['created_at'], timezone.utc).isoformat(),
+            'updated_at': datetime.fromtimestamp(stored['updated_at'], timezone.utc).isoformat()
+        },
+        'data': build_article_payload(stored['article'])
+    })
+
+
 @app.route('/image/<path:encoded_url>')
 def proxy_image(encoded_url):
     """
     图片代理接口，用于绕过防盗链，支持7天缓存过期
     
+    图片经过本地两级缓存（内存LRU + 磁盘），过期后按ETag/Last-Modified重新验证；
+    支持 If-None-Match/If-Modified-Since（返回304）和 Range 请求
+    
     Args:
         encoded_url: Base64编码的图片URL
     
+    Query:
+        w: 最大宽度（等比缩小）；q: 编码质量（1~95）；fmt: 输出格式 jpeg / webp / png
+        指定任一参数时返回缩放/转码后的变体，每个变体单独缓存
+    
     Returns:
         图片内容或错误信息
     """
@@ -184,68 +716,219 @@ def proxy_image(encoded_url):
         image_url = base64.b64decode(encoded_url.encode()).decode()
         image_url = unquote(image_url)
         
-        logger.info(f"代理图片请求: {image_url}")
+        logger.info("代理图片请求: %s", image_url)
         
         # 对于微信图片，直接返回错误信息
-        if 'mmbiz.qpic.cn' in image_url or 'mmecoa.qpic.cn' in image_url:
-            logger.warning(f"微信图片无法代理: {image_url}")
+        if _is_wechat_image(image_url):
+            logger.warning("微信图片无法代理: %s", image_url)
             return jsonify({
                 'error': '微信图片受反盗链保护，无法直接访问',
                 'message': '建议用户直接提供图片内容或使用其他平台的文章',
                 'original_url': image_url
             }), 403
         
-        # 对于其他图片，使用原有逻辑
-        else:
-            # 设置请求头，模拟浏览器访问
-            headers = {
-                'User-Agent': Config.USER_AGENT,
-                'Accept': 'image/webp,image/apng,image/*,*/*;q=0.8',
-                'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-                'Accept-Encoding': 'gzip, deflate, br',
-                'Connection': 'keep-alive',
-            }
-            
-            # 根据图片来源设置合适的Referer
-            if 'csdn.net' in image_url:
-                headers['Referer'] = 'https://blog.csdn.net/'
-            elif 'weixin.qq.com' in image_url:
-                headers['Referer'] = 'https://mp.weixin.qq.com/'
-            else:
-                headers['Referer'] = 'https://www.google.com/'
-            
-            # 获取图片
-            response = requests.get(image_url, headers=headers, timeout=Config.TIMEOUT, stream=True)
-            response.raise_for_status()
-            
-            # 计算缓存过期时间
-            expires_date = datetime.utcnow() + timedelta(days=Config.IMAGE_CACHE_DAYS)
-            expires_str = expires_date.strftime('%a, %d %b %Y %H:%M:%S GMT')
-            
-            # 返回图片，设置缓存
-            return Response(
-                response.content,
-                mimetype=response.headers.get('content-type', 'image/jpeg'),
-                headers={
-                    'Cache-Control': f'public, max-age={Config.IMAGE_CACHE_MAX_AGE}',
-                    'Expires': expires_str,
-                    'Access-Control-Allow-Origin': '*',
-                    'Access-Control-Allow-Methods': 'GET',
-                    'Access-Control-Allow-Headers': 'Content-Type'
-                }
-            )
+        if Config.IMAGE_PREFETCH_ENABLED:
+            image_prefetcher.observe_request(image_url)
+        
+        # 缩放、转码需要完整的原图，不走流式转发
+        variant = parse_variant(request.args)
+        if variant is not None:
+            return _variant_response(image_url, variant)
         
-    except requests.exceptions.Timeout:
-        logger.error(f"图片请求超时: {image_url}")
+        # 流式模式：缓存未命中时边下载边转发，内存占用恒定
+        if Config.IMAGE_PROXY_STREAMING:
+            return _stream_image(image_url)
+        
+        # 缓冲模式：从本地缓存读取，未命中时整张下载
+        image, cache_status = image_cache.get(image_url)
+        return _cached_image_response(image, cache_status)
+        
+    except InvalidVariant as e:
+        return jsonify({'error': str(e)}), 400
+    except ImageTooLarge as e:
+        logger.warning("图片超过大小限制: %s, %s", image_url, e)
+        return jsonify({'error': f'图片超过大小限制: {str(e)}'}), 413
+    except FetchTimeout:
+        logger.error("图片请求超时: %s", image_url)
         return jsonify({'error': '图片请求超时'}), 504
-    except requests.exceptions.RequestException as e:
-        logger.error(f"图片请求失败: {image_url}, 错误: {str(e)}")
+    except FetchError as e:
+        logger.error("图片请求失败: %s, 错误: %s", image_url, e)
         return jsonify({'error': f'图片请求失败: {str(e)}'}), 502
     except Exception as e:
-        logger.error(f"图片代理失败: {str(e)}")
+        logger.error("图片代理失败: %s", e)
         return jsonify({'error': f'图片代理失败: {str(e)}'}), 500
 
 
+def _is_wechat_image(image_url: str) -> bool:
+    """微信图片受反盗链保护，代理和预取都会失败"""
+    return 'mmbiz.qpic.cn' in image_url or 'mmecoa.qpic.cn' in image_url
+
+
+def _default_variant() -> Optional[VariantSpec]:
+    """proxy_url 默认附带的变体（IMAGE_PROXY_DEFAULT_VARIANT）"""
+    return parse_variant(dict(parse_qsl(Config.IMAGE_PROXY_DEFAULT_VARIANT)))
+
+
+def _fetch_image(image_url: str, variant: Optional[VariantSpec]):
+    """从图片缓存取得原图或变体（供预取和打包使用）；变体处理繁忙时取原图"""
+    if variant is None:
+        return image_cache.get(image_url)
+    try:
+        return image_cache.get_variant(image_url, variant.key, _variant_render(variant))
+    except VariantUnavailable:
+        return image_cache.get(image_url)
+
+
+def _proxy_headers(cache_status: str) -> dict:
+    """图片代理响应的缓存和跨域响应头"""
+    # 计算缓存过期时间
+    expires_date = datetime.utcnow() + timedelta(days=Config.IMAGE_CACHE_DAYS)
+    expires_str = expires_date.strftime('%a, %d %b %Y %H:%M:%S GMT')
+    
+    return {
+        'Cache-Control': f'public, max-age={Config.IMAGE_CACHE_MAX_AGE}',
+        'Expires': expires_str,
+        'X-Cache': cache_status.upper(),
+        'Access-Control-Allow-Origin': '*',
+        'Access-Control-Allow-Methods': 'GET',
+        'Access-Control-Allow-Headers': 'Content-Type'
+    }
+
+
+def _variant_response(image_url: str, variant: VariantSpec) -> Response:
+    """返回图片的缩放/转码变体；进程池繁忙或图片无法处理时返回原图"""
+    try:
+        image, cache_status = image_cache.get_variant(image_url, variant.key, _variant_render(variant))
+    except VariantUnavailable as e:
+        logger.warning("图片变体不可用，返回原图: %s, %s", image_url, e)
+        image, cache_status = image_cache.get(image_url)
+        return _cached_image_response(image, cache_status)
+    return _cached_image_response(image, cache_status, cache='image_variant')
+
+
+def _variant_render(variant: VariantSpec):
+    """ImageCache.get_variant 使用的生成函数，记录生成耗时"""
+    def render(data):
+        started = time.perf_counter()
+        try:
+            return variant_renderer.render(data, variant)
+        finally:
+            IMAGE_VARIANT_SECONDS.observe(time.perf_counter() - started, variant.format or 'auto')
+    return render
+
+
+def _cached_image_response(image: CachedImage, cache_status: str, cache: str = 'image') -> Response:
+    """
+    返回缓存中的图片，处理条件请求和Range请求
+    
+    仅有磁盘副本的图片以文件流方式发送，不读入内存
+    """
+    CACHE_RESULTS.inc(cache, cache_status)
+    if image.loaded:
+        response = Response(image.data, mimetype=image.content_type)
+    else:
+        response = send_file(image.path, mimetype=image.content_type, conditional=False, etag=False)
+    
+    etag, weak = unquote_etag(image.strong_etag)
+    if etag:
+        response.set_etag(etag, weak)
+    if image.last_modified:
+        response.headers['Last-Modified'] = image.last_modified
+    response.headers.update(_proxy_headers(cache_status))
+    
+    return response.make_conditional(request, accept_ranges=True, complete_length=image.size)
+
+
+def _stream_image(image_url: str) -> Response:
+    """
+    流式代理图片：命中缓存直接返回，未命中时边转发上游数据边写入缓存
+    
+    超过 Config.MAX_IMAGE_SIZE 时在传输过程中终止，不会先整体缓冲
+    """
+    image, cache_status = image_cache.lookup(image_url)
+    if cache_status in ('memory', 'disk'):
+        return _cached_image_response(image, cache_status)
+    
+    # 未命中时的Range请求直接透传上游，不写入缓存
+    client_range = request.headers.get('Range')
+    writer = None if client_range else image_cache.open_writer(image_url)
+    if writer is None and not client_range:
+        # 其他请求正在下载同一图片，等待其写入缓存
+        image, cache_status = image_cache.get(image_url)
+        return _cached_image_response(image, cache_status)
+    
+    try:
+        stale = image if writer else None
+        upstream = fetch_upstream_image(
+            image_url,
+            etag=stale.etag if stale else '',
+            last_modified=stale.last_modified if stale else '',
+            extra_headers={'Range': client_range} if client_range else None
+        )
+    except Exception:
+        if writer:
+            writer.abort()
+        raise
+    
+    if upstream.status_code == 304 and stale is not None:
+        upstream.close()
+        return _cached_image_response(writer.revalidated(stale), 'revalidated')
+    
+    CACHE_RESULTS.inc('image', 'miss')
+    
+    # 客户端已持有相同版本（If-None-Match 弱比较，或 If-Modified-Since 不早于上游的 Last-Modified）
+    upstream_etag = upstream.headers.get('etag')
+    upstream_last_modified = upstream.headers.get('last-modified')
+    if (upstream_etag or upstream_last_modified) and not is_resource_modified(
+            request.environ, etag=upstream_etag, last_modified=upstream_last_modified):
+        upstream.close()
+        if writer:
+            writer.abort()
+        response = Response(status=304, headers=_proxy_headers('miss'))
+        if upstream_etag:
+            response.headers['ETag'] = upstream_etag
+        return response
+    
+    if writer:
+        writer.set_headers(upstream.headers)
+    
+    def generate():
+        try:
+            for chunk in iter_limited(upstream):
+                if writer:
+                    writer.write(chunk)
+                yield chunk
+            if writer:
+                writer.commit()
+        except ImageTooLarge as e:
+            logger.warning("图片传输中超过大小限制，已终止: %s, %s", image_url, e)
+        finally:
+            upstream.close()
+            if writer:
+                writer.abort()
+    
+    headers = _proxy_headers('miss')
+    for name in ('ETag', 'Last-Modified', 'Content-Range', 'Accept-Ranges'):
+        if name in upstream.headers:
+            headers[name] = upstream.headers[name]
+    # 上游经过压缩时解压后的长度与Content-Length不一致，不透传
+    if 'Content-Length' in upstream.headers and 'Content-Encoding' not in upstream.headers:
+        headers['Content-Length'] = upstream.headers['Content-Length']
+    
+    response = Response(
+        generate(),
+        status=upstream.status_code,
+        mimetype=upstream.headers.get('content-type', 'image/jpeg'),
+        headers=headers,
+        direct_passthrough=True
+    )
+    # 生成器可能从未开始迭代（客户端提前断开），确保释放单飞槽位和上游连接
+    response.call_on_close(upstream.close)
+    if writer:
+        response.call_on_close(writer.abort)
+    return response
+
+
 @app.route('/health')
 def health_check():
     """
@@ -258,10 +941,32 @@ def health_check():
         'status': 'healthy',
         'message': '超级阅读研究助手运行正常',
         'version': '1.0.0',
-        'timestamp': datetime.utcnow().isoformat()
+        'timestamp': datetime.utcnow().isoformat(),
+        'image_cache': image_cache.stats(),
+        'article_cache': article_cache.stats(),
+        'batch': batch_extractor.stats(),
+        'http_client': get_http_client().stats(),
+        'image_probe': scraper.image_prober.stats(),
+        'parse_pool': scraper.parse_pool.stats(),
+        'image_variants': variant_renderer.stats(),
+        'image_prefetch': image_prefetcher.stats(),
+        'bundle': image_bundler.stats(),
+        'jobs': job_worker.stats() if job_worker else {},
+        'article_store': article_store.stats() if article_store else {},
+        'duplicates': duplicate_index.stats() if duplicate_index else {}
     })
 
 
+@app.route('/metrics')
+def metrics():
+    """
+    运行指标（Prometheus文本格式）
+    
+    包括提取各阶段耗时、下载字节数、图片数量、缓存命中情况和接口耗时的直方图/计数器
+    """
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+
 @app.errorhandler(404)
 def not_found(error):
     """404错误处理"""
@@ -277,7 +982,7 @@ def method_not_allowed(error):
 @app.errorhandler(500)
 def internal_error(error):
     """500错误处理"""
-    logger.error(f"内部服务器错误: {str(error)}")
+    logger.error("内部服务器错误: %s", error)
     return jsonify({'error': '内部服务器错误'}), 500
 
 
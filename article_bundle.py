@@ -0,0 +1,180 @@
+"""
+📦 文章打包
+/extract/bundle 一次返回文章文字和图片内容，客户端不必再逐张请求 /image/...
+
+- 图片在共享的线程池中并发获取（经由图片缓存，命中时不请求上游），按完成顺序交给调用方
+- 单张图片受 Config.MAX_IMAGE_SIZE 限制，整个响应的图片总字节数受预算限制，超出的图片只返回代理链接
+- 输出为JSON（图片内联为base64 data URI）或 multipart/mixed 流（第一部分为文章JSON，之后每张图片一个部分）
+"""
+
+import base64
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
+from urllib.parse import quote
+
+from config import Config
+from fast_json import dumps
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+BUNDLE_FORMATS = ('json', 'multipart')
+
+
+class BundledImage:
+    """打包中的一张图片：成功时有image，失败或超出预算时error说明原因"""
+
+    __slots__ = ('index', 'url', 'image', 'error')
+
+    def __init__(self, index: int, url: str, image=None, error: str = ''):
+        self.index = index
+        self.url = url
+        self.image = image
+        self.error = error
+
+
+class ImageBundler:
+    """并发获取一篇文章的图片，控制总字节预算"""
+
+    def __init__(self, workers: int = Config.BUNDLE_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bundle-image')
+        self._lock = threading.Lock()
+        self._stats = {
+            'bundles': 0,
+            'inlined': 0,
+            'inlined_bytes': 0,
+            'over_budget': 0,
+            'failed': 0,
+            'timeouts': 0
+        }
+
+    def fetch_all(self, fetch: Callable[[str], Tuple[object, str]], urls: Iterable[Tuple[int, str]],
+                  max_bytes: int = Config.BUNDLE_MAX_BYTES,
+                  timeout: float = Config.TIMEOUT) -> Iterator[BundledImage]:
+        """
+        立即提交全部图片（timeout从此时开始计算），返回按完成顺序产出结果的迭代器
+
+        总字节数按完成顺序累计，放不下的图片标记为超出预算（较小的后续图片仍可放入）；
+        整体超过timeout时未完成的图片标记为超时。迭代器被关闭（如客户端断开）时取消尚未开始的获取
+
+        Args:
+            fetch: 获取一张图片的函数，返回 (CachedImage, 命中情况)
+            urls: (序号, 图片URL)
+        """
+        self._count('bundles')
+        futures = {self._executor.submit(fetch, url): (index, url) for index, url in urls}
+        return self._collect(futures, max_bytes, time.monotonic() + timeout)
+
+    def _collect(self, futures: Dict, max_bytes: int, deadline: float) -> Iterator[BundledImage]:
+        remaining = max_bytes
+        pending = set(futures)
+        try:
+            while pending:
+                done, pending = wait(pending, timeout=max(0.0, deadline - time.monotonic()),
+                                     return_when=FIRST_COMPLETED)
+                if not done:
+                    break
+                for future in done:
+                    index, url = futures[future]
+                    try:
+                        image, _ = future.result()
+                    except Exception as e:
+                        self._count('failed')
+                        logger.info("打包图片获取失败: %s, 错误: %s", url, e)
+                        yield BundledImage(index, url, error=str(e))
+                        continue
+                    if image.size > remaining:
+                        self._count('over_budget')
+                        yield BundledImage(index, url, error='超出响应大小预算')
+                        continue
+                    remaining -= image.size
+                    self._count('inlined')
+                    self._count('inlined_bytes', image.size)
+                    yield BundledImage(index, url, image=image)
+
+            while pending:
+                future = pending.pop()
+                future.cancel()
+                self._count('timeouts')
+                index, url = futures[future]
+                yield BundledImage(index, url, error='图片获取超时')
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return dict(self._stats)
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._stats[name] += amount
+
+
+def data_uri(image) -> str:
+    """图片内容编码为 data URI"""
+    return f"data:{image.content_type};base64,{base64.b64encode(image.data).decode()}"
+
+
+def inline_images(payload: Dict, results: List[BundledImage]) -> Dict:
+    """把图片结果合并进文章数据（JSON格式）：成功的图片加 data_uri 和 inline_bytes，未内联的加 inline_error"""
+    by_index = {result.index: result for result in results}
+    images = []
+    for img in payload['images']:
+        result = by_index.get(img.index)
+        if result is not None and result.image is not None:
+            img = img.with_extra(data_uri=data_uri(result.image), inline_bytes=result.image.size)
+        elif result is not None:
+            img = img.with_extra(inline_error=result.error)
+        images.append(img)
+    return dict(payload, images=images)
+
+
+def bundle_summary(results: List[BundledImage]) -> Dict:
+    """打包情况汇总，errors列出未内联的图片序号和原因"""
+    inlined = [result for result in results if result.image is not None]
+    return {
+        'inlined': len(inlined),
+        'skipped': len(results) - len(inlined),
+        'bytes': sum(result.image.size for result in inlined),
+        'errors': [{'index': result.index, 'error': result.error} for result in results if result.image is None]
+    }
+
+
+class MultipartWriter:
+    """multipart/mixed 响应的各部分编码"""
+
+    def __init__(self):
+        self.boundary = f"bundle-{uuid.uuid4().hex}"
+
+    @property
+    def content_type(self) -> str:
+        return f'multipart/mixed; boundary="{self.boundary}"'
+
+    def part(self, headers: Dict[str, str], body: bytes) -> bytes:
+        lines = [f"--{self.boundary}"]
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        lines.append(f"Content-Length: {len(body)}")
+        return ('\r\n'.join(lines) + '\r\n\r\n').encode() + body + b'\r\n'
+
+    def json_part(self, name: str, data: Dict) -> bytes:
+        body = dumps(data)
+        return self.part({
+            'Content-Type': 'application/json; charset=utf-8',
+            'Content-Disposition': f'inline; name="{name}"'
+        }, body)
+
+    def image_part(self, result: BundledImage) -> bytes:
+        return self.part({
+            'Content-Type': result.image.content_type,
+            'Content-Disposition': f'inline; name="image-{result.index}"',
+            'Content-ID': f"<image-{result.index}>",
+            'Content-Location': quote(result.url, safe=":/?&=%#+,;@~!$'()*[]")
+        }, result.image.data)
+
+    def close(self) -> bytes:
+        return f"--{self.boundary}--\r\n".encode()
@@ -0,0 +1,326 @@
+"""
+📚 文章提取结果缓存
+缓存 WebScraper.scrape_article 的结果，避免同一链接重复抓取和解析
+
+- 以去除跟踪参数后的规范化URL为键
+- 按平台设置TTL，内存中按条目数LRU淘汰
+- 可选持久化后端：SQLite 或本地文件
+- stale-while-revalidate：过期不久的结果立即返回，同时在后台刷新
+- 请求合并：同一链接的并发未命中只抓取一次；使用持久化后端时可跨worker合并（见 single_flight）
+- 条件刷新：刷新过期条目时把旧结果交给抓取函数，上游返回304或页面内容未变时沿用旧结果，只延长有效期
+- 可选文章库（见 article_store）：每次新抓取的结果同时写入带全文索引的文章库
+- 可选近似重复检测（见 near_duplicates）：新抓取的文章按正文指纹查找原文，结果的 duplicate_of 指向原文
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+
+from article_store import ArticleStore
+from config import Config
+from near_duplicates import DuplicateIndex
+from single_flight import SingleFlight
+from url_utils import normalize_article_url, url_key
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+
+class SQLiteArticleBackend:
+    """SQLite持久化后端"""
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS article_cache ('
+                ' key TEXT PRIMARY KEY,'
+                ' url TEXT NOT NULL,'
+                ' data TEXT NOT NULL,'
+                ' fetched_at REAL NOT NULL,'
+                ' expires_at REAL NOT NULL)'
+            )
+            self._conn.commit()
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT data, fetched_at, expires_at FROM article_cache WHERE key = ?', (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {'article': json.loads(row[0]), 'fetched_at': row[1], 'expires_at': row[2]}
+
+    def set(self, key: str, url: str, entry: Dict):
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO article_cache (key, url, data, fetched_at, expires_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (key, url, json.dumps(entry['article'], ensure_ascii=False),
+                 entry['fetched_at'], entry['expires_at'])
+            )
+            self._conn.commit()
+
+    def purge(self, before: float) -> int:
+        """删除在before之前就已过期的条目"""
+        with self._lock:
+            cursor = self._conn.execute('DELETE FROM article_cache WHERE expires_at < ?', (before,))
+            self._conn.commit()
+        return cursor.rowcount
+
+
+class FileArticleBackend:
+    """本地文件持久化后端，每篇文章一个JSON文件"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def get(self, key: str) -> Optional[Dict]:
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def set(self, key: str, url: str, entry: Dict):
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(dict(entry, url=url), f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def purge(self, before: float) -> int:
+        """删除在before之前就已过期的条目"""
+        removed = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    expires_at = json.load(f)['expires_at']
+                if expires_at < before:
+                    os.remove(path)
+                    removed += 1
+            except (OSError, ValueError, KeyError):
+                continue
+        return removed
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+
+def create_backend(name: str):
+    """按名称创建持久化后端，memory 表示不持久化"""
+    if name == 'sqlite':
+        return SQLiteArticleBackend(Config.ARTICLE_CACHE_SQLITE_PATH)
+    if name == 'file':
+        return FileArticleBackend(Config.ARTICLE_CACHE_FILE_DIR)
+    return None
+
+
+class ArticleCache:
+    """文章提取结果缓存"""
+
+    def __init__(self, max_entries: int = Config.ARTICLE_CACHE_MAX_ENTRIES,
+                 backend: str = Config.ARTICLE_CACHE_BACKEND, store: Optional[ArticleStore] = None,
+                 duplicates: Optional[DuplicateIndex] = None):
+        self.max_entries = max_entries
+        self.store = store
+        self.duplicates = duplicates
+        self._lock = threading.Lock()
+        self._memory: 'OrderedDict[str, Dict]' = OrderedDict()
+        self._refreshing = set()
+        self._last_purge = time.time()
+        self._refresh_pool = ThreadPoolExecutor(
+            max_workers=Config.ARTICLE_CACHE_REFRESH_WORKERS,
+            thread_name_prefix='article-refresh'
+        )
+        self._stats = {
+            'hits': 0,
+            'stale_hits': 0,
+            'misses': 0,
+            'refreshes': 0,
+            'not_modified': 0,
+            'evictions': 0
+        }
+
+        try:
+            self.backend = create_backend(backend)
+        except (OSError, sqlite3.Error) as e:
+            logger.warning("文章缓存持久化后端不可用，仅使用内存缓存: %s, 错误: %s", backend, e)
+            self.backend = None
+
+        # 跨worker合并需要从共享的持久化后端读取其他worker的结果，仅内存缓存时只在进程内合并
+        self._flights = SingleFlight('articles', Config.SINGLE_FLIGHT_LOCK_DIR if self.backend else '')
+
+    def get_or_fetch(self, url: str, fetch: Callable[[str], Dict]) -> Tuple[Dict, str]:
+        """
+        获取文章提取结果，未命中时调用fetch抓取
+
+        Args:
+            url: 文章链接
+            fetch: 抓取函数，通常为 scraper.scrape_article；存在过期条目时以 previous=旧结果 调用，
+                页面未变化时应原样返回旧结果
+
+        Returns:
+            (文章信息, 命中情况)，命中情况为 hit / stale / miss / coalesced（等到了同一链接进行中的抓取结果）
+        """
+        key = url_key(normalize_article_url(url))
+        entry = self._get_entry(key)
+        now = time.time()
+
+        if entry and now < entry['expires_at']:
+            self._count('hits')
+            return entry['article'], 'hit'
+
+        if entry and now < entry['expires_at'] + Config.ARTICLE_CACHE_STALE_SECONDS:
+            self._count('stale_hits')
+            self._schedule_refresh(key, url, fetch, entry['article'])
+            return entry['article'], 'stale'
+
+        previous = entry['article'] if entry else None
+        article, shared = self._flights.do(
+            key, lambda: self._fetch_and_store(key, url, fetch, previous), lambda: self._fresh_from_backend(key)
+        )
+        if shared:
+            return article, 'coalesced'
+        self._count('misses')
+        return article, 'miss'
+
+    def stats(self) -> Dict:
+        """缓存命中、未命中、淘汰等计数"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._memory)
+        stats.update(self._flights.stats())
+        stats['backend'] = type(self.backend).__name__ if self.backend else 'memory'
+        return stats
+
+    def _fetch_and_store(self, key: str, url: str, fetch: Callable[[str], Dict],
+                         previous: Optional[Dict] = None) -> Dict:
+        if previous is not None and Config.ARTICLE_CACHE_REVALIDATE:
+            article = fetch(url, previous=previous)
+        else:
+            article = fetch(url)
+
+        # 抓取失败的结果不缓存
+        if 'error' in article:
+            return article
+
+        if article is previous:
+            self._count('not_modified')
+        elif self.duplicates is not None and article.get('fingerprint'):
+            article['duplicate_of'] = self.duplicates.check(
+                key, normalize_article_url(url), int(article['fingerprint'], 16)
+            )
+
+        now = time.time()
+        ttl = Config.ARTICLE_CACHE_TTL.get(article.get('platform'), Config.ARTICLE_CACHE_DEFAULT_TTL)
+        entry = {'article': article, 'fetched_at': now, 'expires_at': now + ttl}
+        self._memory_put(key, entry)
+
+        if self.backend:
+            try:
+                self.backend.set(key, normalize_article_url(url), entry)
+            except (OSError, sqlite3.Error) as e:
+                logger.warning("写入文章持久化缓存失败: %s, 错误: %s", url, e)
+
+            if now - self._last_purge > Config.ARTICLE_CACHE_PURGE_INTERVAL:
+                self._last_purge = now
+                self._refresh_pool.submit(self._purge_backend)
+
+        # 页面未变化时文章库中已是同样的内容
+        if self.store is not None and article is not previous:
+            try:
+                self.store.upsert(normalize_article_url(url), article)
+            except sqlite3.Error as e:
+                logger.warning("写入文章库失败: %s, 错误: %s", url, e)
+
+        return article
+
+    def _purge_backend(self):
+        """清理持久化后端中连过期宽限期也已超过的条目"""
+        try:
+            removed = self.backend.purge(time.time() - Config.ARTICLE_CACHE_STALE_SECONDS)
+            if removed:
+                self._count('evictions', removed)
+                logger.info("清理过期文章缓存: %d 条", removed)
+        except (OSError, sqlite3.Error) as e:
+            logger.warning("清理文章持久化缓存失败: %s", e)
+
+    def _schedule_refresh(self, key: str, url: str, fetch: Callable[[str], Dict], previous: Dict):
+        """后台刷新过期条目，同一键同时只刷新一次"""
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                self._flights.do(
+                    key, lambda: self._fetch_and_store(key, url, fetch, previous),
+                    lambda: self._fresh_from_backend(key)
+                )
+                self._count('refreshes')
+            except Exception as e:
+                logger.warning("后台刷新文章缓存失败: %s, 错误: %s", url, e)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        self._refresh_pool.submit(refresh)
+
+    def _fresh_from_backend(self, key: str) -> Optional[Dict]:
+        """其他worker完成抓取后，从持久化后端读取未过期的结果"""
+        try:
+            entry = self.backend.get(key)
+        except (OSError, sqlite3.Error) as e:
+            logger.warning("读取文章持久化缓存失败: %s, 错误: %s", key, e)
+            return None
+        if entry is None or time.time() >= entry['expires_at']:
+            return None
+        self._memory_put(key, entry)
+        return entry['article']
+
+    def _get_entry(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                return entry
+
+        if self.backend is None:
+            return None
+
+        try:
+            entry = self.backend.get(key)
+        except (OSError, sqlite3.Error) as e:
+            logger.warning("读取文章持久化缓存失败: %s, 错误: %s", key, e)
+            return None
+
+        if entry is not None:
+            self._memory_put(key, entry)
+        return entry
+
+    def _memory_put(self, key: str, entry: Dict):
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._stats[name] += amount
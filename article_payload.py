@@ -0,0 +1,87 @@
+"""
+📤 文章输出数据
+把 WebScraper.scrape_article 的提取结果整理为接口返回的文章数据（/extract、/jobs、/articles 等共用）
+
+- 文章数据只引用提取结果中的字段，不复制正文等字符串
+- 每张图片是一个 ImageRef，直接引用提取结果中的图片字典；
+  proxy_url、description 等派生字段在编码JSON时才生成（见 fast_json），不为每张图片预先构建字典
+- 代理URL的生成（quote逐字节转义）是输出阶段的主要耗时，按图片链接缓存；
+  缓存命中的文章再次返回时不再重复计算
+"""
+
+import base64
+from functools import lru_cache
+from typing import Dict, Optional
+from urllib.parse import quote
+
+from config import Config
+
+# 缓存的代理URL数
+_PROXY_URL_CACHE_SIZE = 8192
+
+
+@lru_cache(maxsize=_PROXY_URL_CACHE_SIZE)
+def proxy_image_url(image_url: str) -> str:
+    """图片的代理URL（附带 Config.IMAGE_PROXY_DEFAULT_VARIANT 变体参数）"""
+    encoded_url = base64.b64encode(quote(image_url, safe='').encode()).decode()
+    proxy_url = f"{Config.PROXY_BASE_URL}/image/{encoded_url}"
+    if Config.IMAGE_PROXY_DEFAULT_VARIANT:
+        proxy_url += f"?{Config.IMAGE_PROXY_DEFAULT_VARIANT}"
+    return proxy_url
+
+
+class ImageRef:
+    """文章数据中的一张图片"""
+
+    __slots__ = ('index', 'image', 'extra')
+
+    def __init__(self, index: int, image: Dict, extra: Optional[Dict] = None):
+        """
+        Args:
+            index: 图片序号（从1开始）
+            image: 提取结果中的图片字典（absolute_url、alt、title，开启探测时有probe）
+            extra: 附加输出的字段（如文章打包时内联的 data_uri）
+        """
+        self.index = index
+        self.image = image
+        self.extra = extra
+
+    @property
+    def original_url(self) -> str:
+        return self.image['absolute_url']
+
+    def with_extra(self, **fields) -> 'ImageRef':
+        """附加输出字段，返回新的ImageRef（不修改原对象，缓存的文章数据可能被并发请求共用）"""
+        return ImageRef(self.index, self.image, dict(self.extra or {}, **fields))
+
+    def to_json(self) -> Dict:
+        alt = self.image['alt']
+        data = {
+            'original_url': self.image['absolute_url'],
+            'proxy_url': proxy_image_url(self.image['absolute_url']),
+            'alt': alt,
+            'title': self.image['title'],
+            'index': self.index,
+            'description': f"图片{self.index}" + (f" - {alt}" if alt else "")
+        }
+        # 开启图片探测时附带真实尺寸、格式和文件大小
+        if self.image.get('probe'):
+            data.update(self.image['probe'])
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+
+def build_article_payload(article_data: Dict) -> Dict:
+    """为GPTs准备文章数据，包含代理图片URL"""
+    return {
+        'title': article_data['title'],
+        'content': article_data['content'],
+        'author': article_data['author'],
+        'publish_time': article_data['publish_time'],
+        'summary': article_data['summary'],
+        'images': [ImageRef(i + 1, img) for i, img in enumerate(article_data['images'])],
+        'tags': article_data['tags'],
+        'field_sources': article_data.get('field_sources', {}),
+        'duplicate_of': article_data.get('duplicate_of')
+    }
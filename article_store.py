@@ -0,0 +1,272 @@
+"""
+🗄️ 文章库
+持久保存每次提取的文章（标题、正文、作者、发布时间、标签、平台、图片列表），并建立全文索引，
+重复分析、检索或对比文章时直接从本地读取，不必重新抓取
+
+- SQLite + FTS5：文章表保存完整提取结果，全文索引覆盖标题、作者、标签和正文
+- 以规范化URL为键增量写入（upsert），内容未变化时只更新时间和图片等非索引字段，不重建索引
+- 中文等CJK文字没有空格分词，写入索引前按相邻两字切分（二元分词），
+  检索词按同样的方式切分后作为短语查询，可检索正文中任意连续的词语
+- 文章id为规范化URL的哈希（与文章缓存的键一致），同一链接多次提取id不变
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+from config import Config
+from url_utils import url_key
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+# CJK文字（中日韩统一表意文字及扩展A、兼容表意文字、假名、韩文音节），按二元切分
+_CJK = '㐀-䶿一-鿿豈-﫿぀-ヿ가-힯'
+_TOKEN_RE = re.compile(f'([{_CJK}]+)|[^\\W_{_CJK}]+')
+
+# 全文索引各列（title, author, tags, content）在相关度排序中的权重
+_RANK_WEIGHTS = (10.0, 3.0, 5.0, 1.0)
+
+
+def tokenize(text: str, index: bool = True) -> Iterator[str]:
+    """
+    切分文本：CJK连续文字切为相邻两字，其余按字母数字连续串切分，统一小写
+
+    Args:
+        text: 文本
+        index: 为索引切分时，在每段CJK文字末尾额外输出最后一个字，
+            使单字检索（前缀匹配）可以命中位于段末的字；切分检索词时不输出
+    """
+    for match in _TOKEN_RE.finditer(text.lower()):
+        run = match.group(1)
+        if run is None:
+            yield match.group()
+            continue
+        if len(run) == 1:
+            yield run
+            continue
+        for i in range(len(run) - 1):
+            yield run[i:i + 2]
+        if index:
+            yield run[-1]
+
+
+def build_query(text: str) -> str:
+    """
+    把检索词转换为FTS5查询：空格分隔的各词须同时出现，每个词切分后作为短语匹配（保证相邻）
+
+    Returns:
+        FTS5 MATCH 表达式，没有可检索的词时返回空字符串
+    """
+    phrases = []
+    for term in text.split():
+        tokens = list(tokenize(term, index=False))
+        if not tokens:
+            continue
+        phrase = '"' + ' '.join(tokens) + '"'
+        # 单个汉字：前缀匹配以该字开头的二元词和段末的单字
+        if len(tokens) == 1 and len(tokens[0]) == 1 and _TOKEN_RE.fullmatch(tokens[0]).group(1):
+            phrase += ' *'
+        phrases.append(phrase)
+    return ' AND '.join(phrases)
+
+
+def _indexed_text(article: Dict) -> Dict[str, str]:
+    """文章中参与全文索引的字段"""
+    return {
+        'title': article.get('title') or '',
+        'author': article.get('author') or '',
+        'tags': ' '.join(article.get('tags') or []),
+        'content': article.get('content') or ''
+    }
+
+
+def _snippet(content: str, query: str, width: int = Config.ARTICLE_SEARCH_SNIPPET_CHARS) -> str:
+    """截取正文中第一个检索词附近的片段，没有命中时取开头"""
+    lowered = content.lower()
+    positions = [lowered.find(term) for term in query.lower().split()]
+    positions = [position for position in positions if position >= 0]
+    start = max(0, min(positions) - width // 4) if positions else 0
+    snippet = content[start:start + width]
+    return ('…' if start > 0 else '') + snippet + ('…' if start + width < len(content) else '')
+
+
+class ArticleStore:
+    """SQLite文章库，可被同一台机器上的多个进程共享"""
+
+    def __init__(self, path: str = Config.ARTICLE_STORE_PATH):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._lock = threading.Lock()
+        # 多个进程同时写入时等待锁，而不是立即报 database is locked
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._stats = {
+            'inserted': 0,
+            'updated': 0,
+            'unchanged': 0,
+            'searches': 0
+        }
+        with self._lock:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS articles ('
+                ' seq INTEGER PRIMARY KEY,'
+                ' id TEXT NOT NULL UNIQUE,'
+                ' url TEXT NOT NULL,'
+                ' platform TEXT NOT NULL,'
+                ' title TEXT NOT NULL,'
+                ' author TEXT NOT NULL,'
+                ' publish_time TEXT NOT NULL,'
+                ' data TEXT NOT NULL,'
+                ' index_hash TEXT NOT NULL,'
+                ' created_at REAL NOT NULL,'
+                ' updated_at REAL NOT NULL)'
+            )
+            # FTS5表的rowid与articles.seq一致；索引的是切分后以空格连接的词
+            self._conn.execute(
+                'CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts '
+                "USING fts5(title, author, tags, content, tokenize='unicode61')"
+            )
+            self._conn.commit()
+
+    def upsert(self, url: str, article: Dict) -> str:
+        """
+        写入或更新文章
+
+        Args:
+            url: 规范化后的文章链接
+            article: scrape_article 的提取结果
+
+        Returns:
+            文章id
+        """
+        article_id = url_key(url)
+        fields = _indexed_text(article)
+        index_hash = hashlib.sha256(json.dumps(fields, ensure_ascii=False).encode('utf-8')).hexdigest()
+        now = time.time()
+        values = (url, article.get('platform') or '', fields['title'], fields['author'],
+                  article.get('publish_time') or '', json.dumps(article, ensure_ascii=False))
+
+        with self._lock:
+            # 在写事务中查询并更新，多个进程同时写入同一篇文章时不会重复建立索引
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = self._conn.execute(
+                    'SELECT seq, index_hash FROM articles WHERE id = ?', (article_id,)
+                ).fetchone()
+                if row is None:
+                    cursor = self._conn.execute(
+                        'INSERT INTO articles (id, url, platform, title, author, publish_time, data, index_hash, '
+                        'created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                        (article_id,) + values + (index_hash, now, now)
+                    )
+                    rowid, action = cursor.lastrowid, 'inserted'
+                else:
+                    self._conn.execute(
+                        'UPDATE articles SET url = ?, platform = ?, title = ?, author = ?, publish_time = ?, '
+                        'data = ?, index_hash = ?, updated_at = ? WHERE seq = ?',
+                        values + (index_hash, now, row[0])
+                    )
+                    rowid, action = row[0], 'unchanged' if row[1] == index_hash else 'updated'
+                    if action == 'updated':
+                        self._conn.execute('DELETE FROM articles_fts WHERE rowid = ?', (rowid,))
+
+                if action != 'unchanged':
+                    self._conn.execute(
+                        'INSERT INTO articles_fts (rowid, title, author, tags, content) VALUES (?, ?, ?, ?, ?)',
+                        (rowid,) + tuple(' '.join(tokenize(text)) for text in fields.values())
+                    )
+                self._conn.commit()
+            except sqlite3.Error:
+                self._conn.rollback()
+                raise
+            self._stats[action] += 1
+        return article_id
+
+    def get(self, article_id: str) -> Optional[Dict]:
+        """
+        按id读取文章
+
+        Returns:
+            {'id', 'url', 'platform', 'article', 'created_at', 'updated_at'}，article为完整提取结果；
+            不存在时返回None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT id, url, platform, data, created_at, updated_at FROM articles WHERE id = ?', (article_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            'id': row[0],
+            'url': row[1],
+            'platform': row[2],
+            'article': json.loads(row[3]),
+            'created_at': row[4],
+            'updated_at': row[5]
+        }
+
+    def search(self, query: str, limit: int = 10, platform: str = '') -> List[Dict]:
+        """
+        全文检索，按相关度（BM25，标题和标签权重高于正文）排序
+
+        Args:
+            query: 检索词，多个词以空格分隔
+            limit: 最多返回条数
+            platform: 只检索该平台的文章，为空时不限
+
+        Returns:
+            [{'id', 'url', 'platform', 'title', 'author', 'publish_time', 'snippet', 'updated_at'}]
+        """
+        expression = build_query(query)
+        if not expression:
+            return []
+
+        sql = (
+            'SELECT a.id, a.url, a.platform, a.title, a.author, a.publish_time, a.data, a.updated_at '
+            'FROM articles_fts JOIN articles a ON a.seq = articles_fts.rowid '
+            'WHERE articles_fts MATCH ?'
+        )
+        params = [expression]
+        if platform:
+            sql += ' AND a.platform = ?'
+            params.append(platform)
+        sql += f" ORDER BY bm25(articles_fts, {', '.join(map(str, _RANK_WEIGHTS))}) LIMIT ?"
+        params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+            self._stats['searches'] += 1
+        return [{
+            'id': row[0],
+            'url': row[1],
+            'platform': row[2],
+            'title': row[3],
+            'author': row[4],
+            'publish_time': row[5],
+            'snippet': _snippet(json.loads(row[6]).get('content') or '', query),
+            'updated_at': row[7]
+        } for row in rows]
+
+    def stats(self) -> Dict:
+        """本进程的写入、检索计数和文章总数"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['articles'] = self._conn.execute('SELECT COUNT(*) FROM articles').fetchone()[0]
+        return stats
+
+
+def open_article_store(path: str = Config.ARTICLE_STORE_PATH) -> Optional[ArticleStore]:
+    """打开文章库，未开启或不可用（如SQLite未编译FTS5）时返回None，提取不受影响"""
+    if not Config.ARTICLE_STORE_ENABLED:
+        return None
+    try:
+        return ArticleStore(path)
+    except (OSError, sqlite3.Error) as e:
+        logger.warning("文章库不可用: %s, 错误: %s", path, e)
+        return None
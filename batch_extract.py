@@ -0,0 +1,99 @@
+"""
+📦 批量文章提取
+并发抓取一组文章链接，按完成顺序逐条产出结果
+
+- 全局有界线程池，限制同时进行的抓取总数
+- 按域名限制并发，避免被 mp.weixin.qq.com 等平台限流
+- 某个域名已达上限时，其余链接不占用线程池，先调度其他域名
+"""
+
+import logging
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterator, List
+from urllib.parse import urlparse
+
+from config import Config
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+
+class BatchExtractor:
+    """批量提取调度器"""
+
+    def __init__(self, max_workers: int = Config.BATCH_MAX_WORKERS):
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='batch-extract')
+        self._lock = threading.Lock()
+        self._stats = {'batches': 0, 'urls': 0, 'errors': 0}
+
+    @staticmethod
+    def host_limit(host: str) -> int:
+        """某个域名允许的并发抓取数"""
+        for domain, limit in Config.BATCH_HOST_LIMITS.items():
+            if host == domain or host.endswith('.' + domain):
+                return limit
+        return Config.BATCH_PER_HOST_LIMIT
+
+    def run(self, urls: List[str], fetch: Callable[[str], Dict],
+            on_error: Callable[[str, str], Dict]) -> Iterator[Dict]:
+        """
+        并发抓取，按完成顺序逐条产出结果
+
+        Args:
+            urls: 文章链接列表
+            fetch: 单篇抓取函数，返回文章信息字典
+            on_error: 抓取抛出异常时生成错误结果的函数，签名同 _create_error_response
+
+        Yields:
+            文章信息字典，附带 index（在输入列表中的序号）
+        """
+        with self._lock:
+            self._stats['batches'] += 1
+            self._stats['urls'] += len(urls)
+
+        pending = list(enumerate(urls))
+        hosts = {index: urlparse(url).netloc.lower() for index, url in pending}
+        in_flight_per_host: Dict[str, int] = {}
+        running = {}
+
+        try:
+            while pending or running:
+                # 在总并发和域名并发允许的范围内提交任务
+                deferred = []
+                for index, url in pending:
+                    host = hosts[index]
+                    if (len(running) < self.max_workers
+                            and in_flight_per_host.get(host, 0) < self.host_limit(host)):
+                        future = self._pool.submit(fetch, url)
+                        running[future] = (index, url)
+                        in_flight_per_host[host] = in_flight_per_host.get(host, 0) + 1
+                    else:
+                        deferred.append((index, url))
+                pending = deferred
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, url = running.pop(future)
+                    in_flight_per_host[hosts[index]] -= 1
+
+                    try:
+                        article = future.result()
+                    except Exception as e:
+                        logger.error("批量抓取失败: %s, 错误: %s", url, e)
+                        article = on_error(url, str(e))
+
+                    if 'error' in article:
+                        with self._lock:
+                            self._stats['errors'] += 1
+
+                    yield dict(article, index=index)
+        finally:
+            # 客户端提前断开时取消尚未开始的任务
+            for future in running:
+                future.cancel()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return dict(self._stats)
@@ -0,0 +1,147 @@
+"""
+⏱️ 文章输出基准测试
+对比原实现（为每张图片构建字典并预先生成代理URL，Flask默认JSON编码：转义中文、排序键）
+与 article_payload + fast_json（ImageRef在编码时生成派生字段，orjson或不转义中文的标准库编码）
+从提取结果到响应体的耗时、内存分配和响应大小；-cold 为图片链接首次出现（代理URL缓存未命中）时
+
+用法：
+    python benchmarks/bench_article_payload.py [--images 200] [--chars 20000] [--repeat 200]
+
+文章为仿真的图片密集型中文文章；各方式的响应解析后必须与原实现完全一致，否则报错退出。
+"""
+
+import argparse
+import base64
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from urllib.parse import quote
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask  # noqa: E402
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+
+import fast_json  # noqa: E402
+from article_payload import build_article_payload, proxy_image_url  # noqa: E402
+from config import Config  # noqa: E402
+
+
+def legacy_build_article_payload(article_data: dict) -> dict:
+    """原实现"""
+    processed_images = []
+    for i, img in enumerate(article_data['images']):
+        encoded_url = base64.b64encode(quote(img['absolute_url'], safe='').encode()).decode()
+        proxy_url = f"{Config.PROXY_BASE_URL}/image/{encoded_url}"
+        if Config.IMAGE_PROXY_DEFAULT_VARIANT:
+            proxy_url += f"?{Config.IMAGE_PROXY_DEFAULT_VARIANT}"
+        image = {
+            'original_url': img['absolute_url'],
+            'proxy_url': proxy_url,
+            'alt': img['alt'],
+            'title': img['title'],
+            'index': i + 1,
+            'description': f"图片{i+1}" + (f" - {img['alt']}" if img['alt'] else "")
+        }
+        if img.get('probe'):
+            image.update(img['probe'])
+        processed_images.append(image)
+    return {
+        'title': article_data['title'],
+        'content': article_data['content'],
+        'author': article_data['author'],
+        'publish_time': article_data['publish_time'],
+        'summary': article_data['summary'],
+        'images': processed_images,
+        'tags': article_data['tags'],
+        'field_sources': article_data.get('field_sources', {}),
+        'duplicate_of': article_data.get('duplicate_of')
+    }
+
+
+def make_article(images: int, chars: int) -> dict:
+    sentence = '这是一篇图片很多的文章，正文夹杂着大量配图和说明文字。'
+    return {
+        'title': '图片密集型文章',
+        'content': (sentence * (chars // len(sentence) + 1))[:chars],
+        'author': '作者',
+        'publish_time': '2024-01-01 12:00',
+        'summary': sentence,
+        'images': [{
+            'absolute_url': f'https://mmbiz.qpic.cn/mmbiz_jpg/AbCdEfGh{index:04d}IjKlMnOpQrStUvWxYz/640?wx_fmt=jpeg&from=appmsg',
+            'alt': f'第{index}张配图' if index % 2 else '',
+            'title': '',
+            'probe': {'width': 1080, 'height': 720, 'format': 'jpeg', 'bytes': 123456}
+        } for index in range(images)],
+        'tags': ['图片', '测试'],
+        'field_sources': {'title': 'platform', 'author': 'dom'},
+        'duplicate_of': None
+    }
+
+
+def measure(render, article: dict, repeat: int):
+    """返回 (耗时中位数秒, 分配峰值字节, 响应体)"""
+    body = render(article)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        render(article)
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    render(article)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(timings), peak, body
+
+
+def main():
+    parser = argparse.ArgumentParser(description='文章输出基准测试')
+    parser.add_argument('--images', type=int, default=200, help='每篇文章的图片数')
+    parser.add_argument('--chars', type=int, default=20000, help='正文字数')
+    parser.add_argument('--repeat', type=int, default=200, help='每种方式的重复次数')
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    legacy_provider = DefaultJSONProvider(app)
+    fast_provider = fast_json.FastJSONProvider(app)
+    article = make_article(args.images, args.chars)
+
+    def legacy(data):
+        return legacy_provider.response({'success': True, 'data': legacy_build_article_payload(data)}).get_data()
+
+    def fast(data):
+        return fast_provider.response({'success': True, 'data': build_article_payload(data)}).get_data()
+
+    def cold(data):
+        # 图片链接首次出现（代理URL缓存未命中）
+        proxy_image_url.cache_clear()
+        return fast(data)
+
+    modes = [('legacy', legacy, None)]
+    for encoder, use_orjson in (('orjson', True), ('stdlib', False)):
+        if use_orjson and not fast_json.ORJSON_AVAILABLE:
+            continue
+        modes.append((f'{encoder}', fast, use_orjson))
+        modes.append((f'{encoder}-cold', cold, use_orjson))
+
+    print(f"图片 {args.images} 张，正文 {args.chars} 字")
+    print(f"{'方式':<14}{'耗时':>10}{'加速比':>8}{'分配峰值':>12}{'响应大小':>12}")
+    baseline = None
+    for name, render, use_orjson in modes:
+        if use_orjson is not None:
+            fast_json.USE_ORJSON = use_orjson
+        elapsed, peak, body = measure(render, article, args.repeat)
+        if baseline is None:
+            baseline = (elapsed, json.loads(body))
+        elif json.loads(body) != baseline[1]:
+            raise SystemExit(f"{name} 的响应与原实现不一致")
+        print(f"{name:<14}{elapsed * 1000:>8.2f}ms{baseline[0] / elapsed:>8.2f}"
+              f"{peak / 1024:>10.0f}KB{len(body) / 1024:>10.0f}KB")
+
+
+if __name__ == '__main__':
+    main()
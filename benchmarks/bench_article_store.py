@@ -0,0 +1,96 @@
+"""
+⏱️ 文章库检索基准测试
+向临时文章库写入若干篇仿真中文文章，测量写入耗时和全文检索的延迟分布
+
+用法：
+    python benchmarks/bench_article_store.py [--articles 5000] [--queries 500]
+
+文章正文由常用词随机组成（每篇约3000字），检索词为正文中随机截取的2-6个连续汉字、
+单个汉字和多词组合；每个检索词都取自某篇文章，必须至少命中一篇，否则报错退出。
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from article_store import ArticleStore  # noqa: E402
+
+WORDS = (
+    '人工智能 机器学习 数据分析 模型 训练 推理 城市 交通 新能源 汽车 电池 芯片 半导体 产业链 政策 市场 '
+    '消费者 价格 增长 经济 教育 学生 老师 课程 医疗 医院 健康 疫苗 研究 科学家 实验 论文 互联网 平台 '
+    '用户 内容 算法 推荐 隐私 安全 环境 气候 能源 污染 旅游 文化 历史 博物馆 音乐 电影 体育 比赛'
+).split()
+
+
+def make_article(rng: random.Random, index: int) -> dict:
+    content = ''.join(rng.choice(WORDS) + ('。' if rng.random() < 0.1 else '') for _ in range(1000))
+    return {
+        'title': ''.join(rng.sample(WORDS, 4)) + f'（第{index}篇）',
+        'author': f'作者{index % 97}',
+        'publish_time': '2024-01-01',
+        'content': content,
+        'summary': content[:100],
+        'tags': rng.sample(WORDS, 3),
+        'images': [],
+        'platform': rng.choice(('wechat', 'csdn', 'toutiao', 'generic'))
+    }
+
+
+def make_query(rng: random.Random, article: dict) -> str:
+    # 检索词不跨句（句号处不相邻）
+    content = max(article['content'].split('。'), key=len)
+    kind = rng.random()
+    if kind < 0.2:
+        return rng.choice(content)
+    if kind < 0.4:
+        first, second = rng.randrange(len(content) - 4), rng.randrange(len(content) - 4)
+        return f'{content[first:first + 2]} {content[second:second + 3]}'
+    start = rng.randrange(len(content) - 6)
+    return content[start:start + rng.randint(2, 6)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='文章库检索基准测试')
+    parser.add_argument('--articles', type=int, default=5000, help='写入的文章数')
+    parser.add_argument('--queries', type=int, default=500, help='检索次数')
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    articles = [make_article(rng, index) for index in range(args.articles)]
+    with tempfile.TemporaryDirectory() as directory:
+        store = ArticleStore(os.path.join(directory, 'library.db'))
+
+        start = time.perf_counter()
+        for index, article in enumerate(articles):
+            store.upsert(f'https://example.com/articles/{index}', article)
+        elapsed = time.perf_counter() - start
+        print(f"写入 {args.articles} 篇: {elapsed:.1f}s（每篇 {elapsed / args.articles * 1000:.2f}ms）")
+
+        start = time.perf_counter()
+        for index, article in enumerate(articles[:1000]):
+            store.upsert(f'https://example.com/articles/{index}', article)
+        elapsed = time.perf_counter() - start
+        print(f"重复写入未变化的文章: 每篇 {elapsed / min(1000, args.articles) * 1000:.2f}ms")
+
+        latencies = []
+        for _ in range(args.queries):
+            query = make_query(rng, rng.choice(articles))
+            start = time.perf_counter()
+            results = store.search(query)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if not results:
+                raise SystemExit(f"检索词没有命中: {query}")
+
+        latencies.sort()
+        print(f"检索 {args.queries} 次: 中位数 {statistics.median(latencies):.2f}ms，"
+              f"p95 {latencies[int(len(latencies) * 0.95)]:.2f}ms，最大 {latencies[-1]:.2f}ms")
+
+
+if __name__ == '__main__':
+    main()
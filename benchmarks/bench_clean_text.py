@@ -0,0 +1,101 @@
+"""
+⏱️ 文本清理基准测试
+对比原 _clean_text（每次调用两次 re.sub）与 text_utils.clean_text 的耗时
+
+用法：
+    python benchmarks/bench_clean_text.py [--pages 保存的网页目录] [--repeat 5]
+
+对目录下每个 .html/.htm 文件，取 _extract_content 会清理的文本
+（各正文选择器命中的元素以及body）作为语料；未指定目录时使用 bench_extraction 中的仿真页面。
+两种实现的结果必须完全一致，否则报错退出。
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_extraction import PAGES  # noqa: E402
+
+from extraction_engine import parse_document  # noqa: E402
+from text_utils import clean_text  # noqa: E402
+from web_scraper import WebScraper  # noqa: E402
+
+
+def legacy_clean_text(text: str) -> str:
+    """原实现"""
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'[^\w\s一-鿿.,!?;:()（）【】""''""''，。！？；：]', '', text)
+    return text.strip()
+
+
+def load_pages(directory: str):
+    if not directory:
+        return [html for _, _, html in PAGES]
+    pages = []
+    for root, _, names in os.walk(directory):
+        for name in names:
+            if name.endswith(('.html', '.htm')):
+                with open(os.path.join(root, name), 'rb') as f:
+                    pages.append(f.read())
+    return pages
+
+
+def collect_texts(pages):
+    """_extract_content 会清理的文本：正文选择器命中的元素以及body"""
+    scraper = WebScraper()
+    selectors = list(scraper.generic_selectors['content'])
+    for platform in scraper.platform_selectors.values():
+        selectors.extend(platform['content'])
+
+    texts = []
+    for html in pages:
+        doc = parse_document(html, scraper.selector_index, parser='lxml_native')
+        doc.remove_boilerplate()
+        for selector in selectors:
+            element = doc.select_one(selector)
+            if element is not None:
+                texts.append(doc.get_text(element))
+        if doc.body() is not None:
+            texts.append(doc.get_text(doc.body()))
+    return texts
+
+
+def _best(fn, texts, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in texts:
+            fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='文本清理基准测试')
+    parser.add_argument('--pages', default='', help='保存的网页目录（递归读取.html/.htm）')
+    parser.add_argument('--repeat', type=int, default=5, help='重复次数，取最快一次')
+    args = parser.parse_args()
+
+    texts = collect_texts(load_pages(args.pages))
+    for text in texts:
+        if clean_text(text) != legacy_clean_text(text):
+            raise SystemExit("clean_text 与原实现结果不一致")
+
+    chars = sum(len(text) for text in texts)
+    ascii_count = sum(text.isascii() for text in texts)
+    legacy_ms = _best(legacy_clean_text, texts, args.repeat)
+    fast_ms = _best(clean_text, texts, args.repeat)
+
+    print(f"文本 {len(texts)} 段（纯ASCII {ascii_count} 段），共 {chars / 1024 / 1024:.1f}M 字符")
+    print(f"{'原实现':<10}{legacy_ms:>10.1f}ms{legacy_ms * 1e6 / chars:>8.1f}ns/字符")
+    print(f"{'clean_text':<10}{fast_ms:>10.1f}ms{fast_ms * 1e6 / chars:>8.1f}ns/字符")
+    print(f"加速 {legacy_ms / fast_ms:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
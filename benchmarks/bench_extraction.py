@@ -0,0 +1,191 @@
+"""
+⏱️ 提取引擎基准测试
+对比逐选择器扫描（cascade）与单遍提取（single_pass）每篇文章的解析+提取耗时，
+以及不同解析后端（html.parser / lxml / lxml_native）的耗时
+
+用法：
+    python benchmarks/bench_extraction.py [--repeat 20]
+
+页面为本地生成的仿真文章（微信约300KB、CSDN、通用博客，以及 <template> 内有匹配元素的页面），不需要网络。
+两种引擎的提取结果必须完全一致，lxml与lxml_native的结果也必须一致，否则报错退出。
+输出各引擎解析+提取的中位耗时，以及单独解析（BeautifulSoup建树）的耗时作为参照。
+"""
+
+import argparse
+import gc
+import logging
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+from config import Config  # noqa: E402
+from web_scraper import WebScraper  # noqa: E402
+
+
+def _paragraphs(count: int, text: str) -> str:
+    """生成带行内样式和嵌套span的段落，模拟编辑器导出的HTML"""
+    return ''.join(
+        f'<section style="margin: 0 8px;"><p style="line-height: 1.75em;">'
+        f'<span style="font-size: 15px;color: rgb(62, 62, 62);">{text}{i}</span>'
+        f'<span style="font-size: 15px;"><strong>重点{i}</strong></span></p></section>'
+        for i in range(count)
+    )
+
+
+def wechat_page() -> bytes:
+    """仿微信公众号文章，约300KB"""
+    images = ''.join(
+        f'<p style="text-align: center;"><img class="rich_pages wxw-img" '
+        f'data-src="https://mmbiz.qpic.cn/mmbiz_png/abc{i}/640?wx_fmt=png" '
+        f'data-ratio="0.56" data-w="1080" style="width: 100%;"></p>'
+        for i in range(40)
+    )
+    return f'''<!DOCTYPE html><html><head><meta charset="utf-8">
+<title>一篇很长的公众号文章</title>
+<meta name="description" content="文章摘要">
+<meta property="og:title" content="一篇很长的公众号文章">
+<script>{'var x = 1;' * 2000}</script><style>{'.a{{color:red}}' * 1000}</style>
+</head><body id="activity-detail" class="zh_CN">
+<div class="rich_media_wrp"><div id="js_article" class="rich_media">
+<div class="rich_media_inner"><div id="page-content" class="rich_media_area_primary">
+<h1 class="rich_media_title" id="activity-name">一篇很长的公众号文章</h1>
+<div id="meta_content" class="rich_media_meta_list">
+<span class="rich_media_meta rich_media_meta_text">原创</span>
+<span class="rich_media_meta rich_media_meta_nickname" id="profileBt"><a id="js_name">公众号名称</a></span>
+<em id="publish_time" class="rich_media_meta rich_media_meta_text">2025-09-28 08:00</em>
+</div>
+<div class="rich_media_content js_underline_content" id="js_content">
+{_paragraphs(850, '这是文章正文的一部分内容，用于模拟真实的微信公众号排版。')}
+{images}
+</div></div></div></div></div>
+<div id="js_pc_qr_code" class="qr_code_pc"><img class="qr_code_pc_img" src="/qrcode.png"></div>
+<script>{'var y = 2;' * 2000}</script>
+</body></html>'''.encode('utf-8')
+
+
+def csdn_page() -> bytes:
+    """仿CSDN博客文章"""
+    code = ''.join(f'<code><span class="hljs-keyword">def</span> func{i}():</code>\n' for i in range(300))
+    return f'''<!DOCTYPE html><html><head><meta charset="utf-8">
+<title>Python教程 - CSDN博客</title>
+<meta name="keywords" content="python,教程,爬虫">
+<meta name="description" content="一篇CSDN技术文章">
+</head><body>
+<header><div class="toolbar-container">{'<a class="toolbar-link">链接</a>' * 200}</div></header>
+<main><div class="blog-content-box">
+<div class="article-header-box"><h1 class="title-article" id="articleContentId">Python教程</h1>
+<div class="article-info-box"><a class="follow-nickName">博主</a><span class="time">2025-09-01 10:00:00</span></div></div>
+<div id="article_content" class="article_content clearfix"><div id="content_views" class="markdown_views prism-atom-one-dark">
+{_paragraphs(300, 'Python是一种广泛使用的解释型、高级和通用的编程语言。')}
+<pre>{code}</pre>
+{''.join(f'<p><img src="https://img-blog.csdnimg.cn/direct/pic{i}.png" alt="示意图{i}"></p>' for i in range(20))}
+</div></div>
+<div class="tags-box"><a class="tag-link">Python</a><a class="tag-link">教程</a></div>
+</div></main>
+<aside class="blog_container_aside">{'<div class="aside-box"><a>推荐文章</a></div>' * 100}</aside>
+<footer>{'<p>版权信息</p>' * 50}</footer>
+</body></html>'''.encode('utf-8')
+
+
+def generic_page() -> bytes:
+    """仿普通博客文章"""
+    return f'''<!DOCTYPE html><html><head><meta charset="utf-8">
+<title>A generic blog post - Example Blog</title>
+<meta name="author" content="Someone">
+<meta property="article:published_time" content="2025-01-01T00:00:00Z">
+</head><body>
+<nav>{'<a href="#">menu</a>' * 100}</nav>
+<div class="container"><div class="row"><div class="col">
+<article class="post"><h1 class="post-title">A generic blog post</h1>
+<div class="post-content">{_paragraphs(250, 'Some paragraph text for a generic blog article. ')}</div>
+<div class="tags"><a>web</a><a>python</a></div>
+</article></div></div></div>
+<footer>{'<p>footer</p>' * 50}</footer>
+</body></html>'''.encode('utf-8')
+
+
+def template_page() -> bytes:
+    """<template> 内有匹配选择器的元素：BeautifulSoup不返回其中的文本，lxml_native须一致"""
+    return f'''<!DOCTYPE html><html><head><meta charset="utf-8"></head><body>
+<template><div class="card-title">tmpl</div><span class="author">template author</span></template>
+<div class="page"><div class="page-title">A page without h1</div>
+<span class="author">Real Author</span>
+<div class="content">{_paragraphs(100, 'Paragraph text of a page that renders cards from templates. ')}</div>
+</div></body></html>'''.encode('utf-8')
+
+
+PAGES = [
+    ('wechat', 'https://mp.weixin.qq.com/s/benchmark', wechat_page()),
+    ('csdn', 'https://blog.csdn.net/user/article/details/1', csdn_page()),
+    ('generic', 'https://example.com/posts/1', generic_page()),
+    ('template', 'https://example.com/pages/1', template_page()),
+]
+
+
+def _time(fn, repeat: int):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        # 先回收上一轮的文档树，避免GC停顿计入本轮
+        gc.collect()
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='提取引擎基准测试')
+    parser.add_argument('--repeat', type=int, default=20, help='每个页面重复次数')
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    scraper = WebScraper()
+
+    print(f"{'页面':<8}{'大小':>9}{'仅解析':>10}{'cascade':>12}{'single_pass':>14}{'加速':>8}")
+    for name, url, html in PAGES:
+        parse_ms, _ = _time(lambda: BeautifulSoup(html, 'html.parser'), args.repeat)
+
+        results = {}
+        timings = {}
+        Config.PARSER_BACKEND = 'html.parser'
+        for engine in ('cascade', 'single_pass'):
+            Config.EXTRACTION_ENGINE = engine
+            timings[engine], results[engine] = _time(lambda: scraper._parse_article(html, url), args.repeat)
+
+        cascade, single = results['cascade'], results['single_pass']
+        cascade['tags'], single['tags'] = sorted(cascade['tags']), sorted(single['tags'])
+        if cascade != single:
+            raise SystemExit(f"{name}: 两种引擎的提取结果不一致")
+
+        speedup = timings['cascade'] / timings['single_pass']
+        print(f"{name:<8}{len(html) / 1024:>7.0f}KB{parse_ms:>8.1f}ms"
+              f"{timings['cascade']:>10.1f}ms{timings['single_pass']:>12.1f}ms{speedup:>7.1f}x")
+
+    print()
+    print(f"{'页面':<8}{'html.parser':>14}{'lxml':>10}{'lxml_native':>14}{'加速':>8}")
+    Config.EXTRACTION_ENGINE = 'single_pass'
+    for name, url, html in PAGES:
+        results = {}
+        timings = {}
+        for backend in ('html.parser', 'lxml', 'lxml_native'):
+            Config.PARSER_BACKEND = backend
+            timings[backend], results[backend] = _time(lambda: scraper._parse_article(html, url), args.repeat)
+            results[backend]['tags'] = sorted(results[backend]['tags'])
+        Config.PARSER_BACKEND = 'html.parser'
+
+        if results['lxml'] != results['lxml_native']:
+            raise SystemExit(f"{name}: lxml与lxml_native的提取结果不一致")
+
+        speedup = timings['html.parser'] / timings['lxml_native']
+        print(f"{name:<8}{timings['html.parser']:>12.1f}ms{timings['lxml']:>8.1f}ms"
+              f"{timings['lxml_native']:>12.1f}ms{speedup:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
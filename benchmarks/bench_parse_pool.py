@@ -0,0 +1,92 @@
+"""
+⏱️ 解析进程池基准测试
+并发提取多篇大页面时，对比在线程中解析（受GIL限制）与在不同大小的解析进程池中解析的吞吐量
+
+用法：
+    python benchmarks/bench_parse_pool.py [--pages 64] [--concurrency 16] [--backend lxml_native]
+
+页面为本地生成的仿真文章（微信约300KB、CSDN、通用博客），只测解析+提取阶段，不需要网络。
+进程池大小从1逐倍增加到CPU核数，输出每秒处理的页面数和相对线程解析的加速比（扩展曲线）；
+各方式的提取结果必须与线程解析完全一致，否则报错退出。
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_extraction import csdn_page, generic_page, wechat_page  # noqa: E402
+
+from config import Config  # noqa: E402
+from metrics import StageTimings  # noqa: E402
+from parse_pool import ParsePool  # noqa: E402
+from web_scraper import WebScraper  # noqa: E402
+
+PAGES = [
+    ('https://mp.weixin.qq.com/s/benchmark', wechat_page()),
+    ('https://blog.csdn.net/benchmark/article/details/1', csdn_page()),
+    ('https://blog.example.com/posts/benchmark', generic_page()),
+]
+
+
+async def _run(scraper: WebScraper, count: int, concurrency: int):
+    """以concurrency的并发解析count个页面，返回 (耗时, 每个页面的结果)"""
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one(index: int):
+        url, page = PAGES[index % len(PAGES)]
+        async with slots:
+            return await scraper._parse_off_loop(page, url, StageTimings())
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(one(index) for index in range(count)))
+    return time.perf_counter() - start, results
+
+
+def _pool_sizes():
+    sizes, size = [], 1
+    while size < (os.cpu_count() or 1):
+        sizes.append(size)
+        size *= 2
+    return sizes + [os.cpu_count() or 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='解析进程池基准测试')
+    parser.add_argument('--pages', type=int, default=64, help='每轮解析的页面数')
+    parser.add_argument('--concurrency', type=int, default=16, help='同时进行的解析数')
+    parser.add_argument('--backend', default='lxml_native', help='解析后端（html.parser / lxml / lxml_native）')
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    # 子进程以spawn方式启动并重新读取配置，解析后端通过环境变量传递
+    os.environ['PARSER_BACKEND'] = Config.PARSER_BACKEND = args.backend
+    scraper = WebScraper()
+
+    print(f"CPU核数 {os.cpu_count()}，页面 {args.pages} 篇，并发 {args.concurrency}，解析后端 {args.backend}")
+    print(f"{'方式':<14}{'耗时':>10}{'页面/秒':>10}{'加速比':>8}")
+
+    scraper.parse_pool = ParsePool(workers=0)
+    asyncio.run(_run(scraper, len(PAGES), args.concurrency))  # 预热
+    baseline_elapsed, baseline = asyncio.run(_run(scraper, args.pages, args.concurrency))
+    print(f"{'threads':<14}{baseline_elapsed * 1000:>8.0f}ms{args.pages / baseline_elapsed:>10.1f}{1:>8.2f}")
+
+    for workers in _pool_sizes():
+        scraper.parse_pool = ParsePool(workers=workers, min_bytes=0)
+        scraper.parse_pool.start()
+        asyncio.run(_run(scraper, len(PAGES), args.concurrency))  # 预热
+        elapsed, results = asyncio.run(_run(scraper, args.pages, args.concurrency))
+        print(f"{f'processes={workers}':<14}{elapsed * 1000:>8.0f}ms{args.pages / elapsed:>10.1f}"
+              f"{baseline_elapsed / elapsed:>8.2f}")
+        scraper.parse_pool.shutdown()
+        if results != baseline:
+            raise SystemExit(f"进程池（{workers}）与线程解析的提取结果不一致")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+⏱️ 流式提取基准测试
+对比完整下载后解析与流式增量解析（正文容器闭合后停止下载）的耗时和峰值内存
+
+用法：
+    python benchmarks/bench_streaming.py [--repeat 5] [--bandwidth 5]
+
+页面为仿微信公众号文章（正文之后附带大量评论/推荐内容），
+由本地HTTP服务按指定带宽（MB/s）分块发送，不需要外部网络。
+两种方式的提取结果必须完全一致，否则报错退出。峰值内存为tracemalloc统计的Python分配，
+不含lxml树本身占用的内存。
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_extraction import wechat_page  # noqa: E402
+
+from config import Config  # noqa: E402
+from web_scraper import WebScraper  # noqa: E402
+
+
+def long_tail_page() -> bytes:
+    """正文之后带有约700KB评论和推荐文章的微信页面"""
+    tail = ''.join(
+        f'<div class="discuss_item"><img class="avatar" src="/avatar{i}.png">'
+        f'<p class="discuss_message">这是第{i}条留言，内容比较长，用来模拟热门文章的评论区。</p></div>'
+        for i in range(4000)
+    )
+    return wechat_page().replace(b'</body>', f'<div id="js_cmt_area">{tail}</div></body>'.encode('utf-8'))
+
+
+def serve(page: bytes, bandwidth: float) -> ThreadingHTTPServer:
+    """在本地端口按带宽限制分块发送页面"""
+    chunk_size = 16 * 1024
+    delay = chunk_size / (bandwidth * 1024 * 1024)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(page)))
+            self.end_headers()
+            try:
+                for offset in range(0, len(page), chunk_size):
+                    self.wfile.write(page[offset:offset + chunk_size])
+                    time.sleep(delay)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _measure(scraper: WebScraper, url: str, repeat: int):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = scraper.scrape_article(url)
+        samples.append((time.perf_counter() - start) * 1000)
+
+    # tracemalloc会显著拖慢执行，峰值内存单独测一次（只统计Python分配的内存）
+    tracemalloc.start()
+    scraper.scrape_article(url)
+    peak = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+    tracemalloc.stop()
+    return statistics.median(samples), peak, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='流式提取基准测试')
+    parser.add_argument('--repeat', type=int, default=5, help='重复次数')
+    parser.add_argument('--bandwidth', type=float, default=5, help='模拟带宽（MB/s）')
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    page = long_tail_page()
+    server = serve(page, args.bandwidth)
+
+    scraper = WebScraper()
+    # 本地服务的域名无法识别平台，按微信文章处理
+    scraper._identify_platform = lambda url: 'wechat'
+    url = f'http://127.0.0.1:{server.server_port}/s/benchmark'
+    Config.PARSER_BACKEND = 'lxml_native'
+
+    results = {}
+    print(f"页面大小 {len(page) / 1024:.0f}KB，带宽 {args.bandwidth}MB/s")
+    print(f"{'方式':<12}{'耗时':>10}{'峰值内存':>12}")
+    for streaming in (False, True):
+        Config.STREAMING_EXTRACTION = streaming
+        elapsed, peak, results[streaming] = _measure(scraper, url, args.repeat)
+        name = 'streaming' if streaming else 'full'
+        print(f"{name:<12}{elapsed:>8.0f}ms{peak:>10.1f}MB")
+
+    server.shutdown()
+    if 'error' in results[False] or results[False] != results[True]:
+        raise SystemExit("完整解析与流式解析的提取结果不一致")
+
+
+if __name__ == '__main__':
+    main()
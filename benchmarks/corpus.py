@@ -0,0 +1,231 @@
+"""
+📁 基准测试语料
+固定的页面/图片语料，由本地替身源站（origin.py）按原始URL提供
+
+用法：
+    python benchmarks/corpus.py build                # 重新生成仿真页面语料
+    python benchmarks/corpus.py record URL [URL...]  # 抓取真实页面加入语料
+
+语料目录结构：
+    fixtures/manifest.json   URL -> 文件、Content-Type、平台
+    fixtures/pages/*.html    页面
+    图片直接引用仓库中的 test_image.jpg 等文件
+
+仿真页面覆盖微信、CSDN、微博、小红书和普通博客，结构参照各平台真实页面；
+页面中的图片链接指向语料中的图片，因此 /extract 返回的代理链接可以直接用于 /image 测试。
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+from typing import Dict, List
+from urllib.parse import urlsplit
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from bench_extraction import _paragraphs, csdn_page, generic_page, wechat_page  # noqa: E402
+
+FIXTURES_DIR = os.path.join(BENCH_DIR, 'fixtures')
+
+# 仓库中的测试图片，作为各平台图片链接的内容
+REPO_IMAGES = ['test_image.jpg', 'check_image.jpg', 'final_test.jpg', 'original_wechat.jpg', 'test_image_new.jpg']
+
+CSDN_IMAGE_HOST = 'http://img-blog.csdnimg.cn/direct'
+WEIBO_IMAGE_HOST = 'http://wx1.sinaimg.cn/large'
+XHS_IMAGE_HOST = 'http://sns-webpic-qc.xhscdn.com/notes'
+GENERIC_IMAGE_HOST = 'http://blog.example.com/images'
+
+
+def weibo_page() -> bytes:
+    """仿微博正文页"""
+    images = ''.join(
+        f'<li class="WB_pic"><img src="{WEIBO_IMAGE_HOST}/pic{i}.jpg" alt="微博配图{i}"></li>'
+        for i in range(9)
+    )
+    comments = ''.join(
+        f'<div class="list_li S_line1"><div class="WB_face"><img class="W_face_radius" '
+        f'src="http://tvax1.sinaimg.cn/crop/avatar{i}.jpg" width="30" height="30"></div>'
+        f'<div class="WB_text"><a class="W_f14">用户{i}</a>：评论内容{i}，说得很有道理。</div></div>'
+        for i in range(200)
+    )
+    return f'''<!DOCTYPE html><html><head><meta charset="utf-8">
+<title>微博正文 - 微博</title>
+<meta name="description" content="一条较长的微博">
+</head><body class="FRAME_main">
+<div class="WB_frame"><div class="WB_main_c">
+<div class="WB_cardwrap WB_feed_type"><div class="WB_feed_detail">
+<div class="WB_detail">
+<div class="WB_info"><a class="W_f14 W_fb S_txt1 WB_name">某个博主</a></div>
+<div class="WB_from S_txt2"><a class="S_txt2 WB_time" date="1727500000000">9月28日 08:00</a> 来自 微博 weibo.com</div>
+<div class="WB_text W_f14">{'今天分享一个长微博，内容包括很多细节和观点。' * 40}</div>
+<div class="WB_media_wrap"><ul class="WB_media_a">{images}</ul></div>
+</div></div></div>
+<div class="WB_feed_repeat"><div class="repeat_list">{comments}</div></div>
+</div></div>
+<div class="WB_footer">{'<a>链接</a>' * 50}</div>
+</body></html>'''.encode('utf-8')
+
+
+def xiaohongshu_page() -> bytes:
+    """仿小红书笔记页"""
+    images = ''.join(
+        f'<div class="swiper-slide"><img class="note-slider-img" src="{XHS_IMAGE_HOST}/{i}.jpg" '
+        f'alt="笔记图片{i}" width="1080" height="1440"></div>'
+        for i in range(6)
+    )
+    comments = ''.join(
+        f'<div class="comment-item"><img class="avatar-item" src="http://sns-avatar-qc.xhscdn.com/avatar/{i}.jpg">'
+        f'<div class="content">评论{i}：好看，求链接</div></div>'
+        for i in range(150)
+    )
+    return f'''<!DOCTYPE html><html><head><meta charset="utf-8">
+<title>周末去哪儿｜城市漫步路线分享 - 小红书</title>
+<meta name="description" content="城市漫步路线分享">
+<meta name="keywords" content="城市漫步,周末,旅行">
+<script>window.__INITIAL_STATE__ = {{"note": {{"id": "abc"}}}};{'var s = 1;' * 500}</script>
+</head><body>
+<div id="app"><div class="note-container">
+<div class="media-container"><div class="swiper">{images}</div></div>
+<div class="interaction-container">
+<div class="author-container"><div class="author"><a class="name"><span class="username">旅行博主</span></a></div></div>
+<div class="note-scroller"><div class="note-content">
+<div class="title note-title">周末去哪儿｜城市漫步路线分享</div>
+<div class="desc"><span class="note-text">{'这条路线适合周末慢慢走，沿途有咖啡馆、书店和公园。' * 30}</span>
+<a class="tag" href="/search_result?keyword=城市漫步">#城市漫步</a><a class="tag">#周末去哪儿</a></div>
+<div class="bottom-container"><span class="date publish-time">2025-09-28 上海</span></div>
+</div>
+<div class="comments-container">{comments}</div>
+</div></div></div></div>
+</body></html>'''.encode('utf-8')
+
+
+def _csdn_fixture() -> bytes:
+    """CSDN页面，图片链接指向语料中的图片"""
+    return csdn_page().replace(b'https://img-blog.csdnimg.cn/direct', CSDN_IMAGE_HOST.encode())
+
+
+def _generic_fixture() -> bytes:
+    """普通博客页面，附带几张文章配图"""
+    figures = ''.join(
+        f'<figure><img src="{GENERIC_IMAGE_HOST}/figure{i}.jpg" alt="配图{i}"></figure>' for i in range(5)
+    )
+    return generic_page().replace(b'<div class="tags">', f'{figures}<div class="tags">'.encode())
+
+
+def _long_wechat_fixture() -> bytes:
+    """正文之后带有大量留言的微信页面（流式提取可提前结束）"""
+    tail = _paragraphs(2000, '这是一条留言，用来模拟热门文章的评论区。')
+    return wechat_page().replace(b'</body>', f'<div id="js_cmt_area">{tail}</div></body>'.encode('utf-8'))
+
+
+# 仿真页面：(URL, 平台, 生成函数)
+SYNTHETIC_PAGES = [
+    ('http://mp.weixin.qq.com/s/benchmark-wechat', 'wechat', wechat_page),
+    ('http://mp.weixin.qq.com/s/benchmark-wechat-comments', 'wechat', _long_wechat_fixture),
+    ('http://blog.csdn.net/benchmark/article/details/100001', 'csdn', _csdn_fixture),
+    ('http://weibo.com/1234567890/Benchmark', 'weibo', weibo_page),
+    ('http://www.xiaohongshu.com/explore/benchmark', 'xiaohongshu', xiaohongshu_page),
+    ('http://blog.example.com/posts/benchmark', 'other', _generic_fixture),
+]
+
+
+def _image_urls() -> List[str]:
+    urls = [f'{CSDN_IMAGE_HOST}/pic{i}.png' for i in range(20)]
+    urls += [f'{WEIBO_IMAGE_HOST}/pic{i}.jpg' for i in range(9)]
+    urls += [f'{XHS_IMAGE_HOST}/{i}.jpg' for i in range(6)]
+    urls += [f'{GENERIC_IMAGE_HOST}/figure{i}.jpg' for i in range(5)]
+    return urls
+
+
+def _page_file(url: str) -> str:
+    parts = urlsplit(url)
+    digest = hashlib.sha256(url.encode('utf-8')).hexdigest()[:12]
+    return f"pages/{parts.hostname}-{digest}.html"
+
+
+def load_manifest(directory: str = FIXTURES_DIR) -> Dict:
+    with open(os.path.join(directory, 'manifest.json'), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _save_manifest(manifest: Dict, directory: str):
+    with open(os.path.join(directory, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+        f.write('\n')
+
+
+def build(directory: str = FIXTURES_DIR) -> Dict:
+    """生成仿真页面语料，保留已录制的真实页面"""
+    os.makedirs(os.path.join(directory, 'pages'), exist_ok=True)
+    try:
+        recorded = [page for page in load_manifest(directory)['pages'] if page.get('recorded')]
+    except (OSError, ValueError, KeyError):
+        recorded = []
+
+    pages = []
+    for url, platform, generate in SYNTHETIC_PAGES:
+        file = _page_file(url)
+        with open(os.path.join(directory, file), 'wb') as f:
+            f.write(generate())
+        pages.append({'url': url, 'platform': platform, 'file': file,
+                      'content_type': 'text/html; charset=utf-8'})
+
+    images = [
+        {'url': url, 'file': os.path.join('..', '..', REPO_IMAGES[i % len(REPO_IMAGES)]),
+         'content_type': 'image/jpeg'}
+        for i, url in enumerate(_image_urls())
+    ]
+
+    manifest = {'pages': pages + recorded, 'images': images}
+    _save_manifest(manifest, directory)
+    return manifest
+
+
+def record(urls: List[str], directory: str = FIXTURES_DIR):
+    """抓取真实页面存入语料（以原URL作为替身源站中的地址）"""
+    from web_scraper import WebScraper
+
+    scraper = WebScraper()
+    manifest = load_manifest(directory)
+    known = {page['url']: page for page in manifest['pages']}
+
+    for url in urls:
+        response = scraper.client.get_sync(url, headers=scraper.headers)
+        file = _page_file(url)
+        with open(os.path.join(directory, file), 'wb') as f:
+            f.write(response.content)
+        known[url] = {
+            'url': url,
+            'platform': scraper._identify_platform(url),
+            'file': file,
+            'content_type': response.headers.get('content-type', 'text/html'),
+            'recorded': True
+        }
+        print(f"已录制 {url} ({len(response.content)} 字节)")
+
+    manifest['pages'] = list(known.values())
+    _save_manifest(manifest, directory)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='基准测试语料')
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('build', help='重新生成仿真页面语料')
+    record_parser = sub.add_parser('record', help='抓取真实页面加入语料')
+    record_parser.add_argument('urls', nargs='+')
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        manifest = build()
+        print(f"已生成 {len(manifest['pages'])} 个页面、{len(manifest['images'])} 张图片的语料: {FIXTURES_DIR}")
+    else:
+        record(args.urls)
+
+
+if __name__ == '__main__':
+    main()
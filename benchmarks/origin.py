@@ -0,0 +1,124 @@
+"""
+🛰️ 本地替身源站
+按原始URL提供基准测试语料，替代微信、CSDN等真实站点
+
+以HTTP代理的方式工作：把 HTTP_PROXY 指向本服务后，
+对 http://mp.weixin.qq.com/s/... 等地址的请求都会由本服务按语料清单应答，
+抓取器和图片代理的代码路径（平台识别、Referer、缓存键等）与访问真实站点时一致。
+
+支持 ETag/If-None-Match（304）、Range 请求，以及模拟首字节延迟和带宽。
+"""
+
+import hashlib
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+from corpus import FIXTURES_DIR, load_manifest
+
+
+class StandInOrigin:
+    """替身源站"""
+
+    def __init__(self, directory: str = FIXTURES_DIR, latency_ms: float = 0, bandwidth_mbps: float = 0):
+        self.latency = latency_ms / 1000
+        self.bandwidth = bandwidth_mbps * 1024 * 1024
+        self.resources: Dict[str, Tuple[bytes, str, str]] = {}
+        self.hits = 0
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+        manifest = load_manifest(directory)
+        for item in manifest['pages'] + manifest['images']:
+            with open(os.path.join(directory, item['file']), 'rb') as f:
+                data = f.read()
+            etag = '"' + hashlib.sha256(data).hexdigest()[:16] + '"'
+            self.resources[self._key(item['url'])] = (data, item['content_type'], etag)
+
+    @staticmethod
+    def _key(url: str) -> str:
+        """忽略查询参数，基准测试可通过不同参数绕过代理服务的缓存"""
+        parts = urlsplit(url)
+        return urlunsplit(('http', (parts.hostname or '').lower(), parts.path or '/', '', ''))
+
+    @property
+    def proxy_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def start(self) -> 'StandInOrigin':
+        origin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                origin._handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name='stand-in-origin', daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def _handle(self, handler: BaseHTTPRequestHandler):
+        # 代理请求的请求行是完整URL；直接访问时按Host头拼接
+        url = handler.path if handler.path.startswith('http') else f"http://{handler.headers.get('Host')}{handler.path}"
+        resource = self.resources.get(self._key(url))
+        with self._lock:
+            self.hits += 1
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        if resource is None:
+            self._send(handler, 404, b'not found', 'text/plain', {})
+            return
+
+        data, content_type, etag = resource
+        if handler.headers.get('If-None-Match') == etag:
+            self._send(handler, 304, b'', content_type, {'ETag': etag})
+            return
+
+        status, headers = 200, {'ETag': etag, 'Accept-Ranges': 'bytes'}
+        range_header = handler.headers.get('Range', '')
+        if range_header.startswith('bytes='):
+            start_text, _, end_text = range_header[6:].partition('-')
+            if start_text.isdigit():
+                start = int(start_text)
+                end = min(int(end_text), len(data) - 1) if end_text.isdigit() else len(data) - 1
+                headers['Content-Range'] = f"bytes {start}-{end}/{len(data)}"
+                status, data = 206, data[start:end + 1]
+        self._send(handler, status, data, content_type, headers)
+
+    def _send(self, handler, status: int, data: bytes, content_type: str, headers: Dict[str, str]):
+        handler.send_response(status)
+        handler.send_header('Content-Type', content_type)
+        handler.send_header('Content-Length', str(len(data)))
+        for name, value in headers.items():
+            handler.send_header(name, value)
+        handler.end_headers()
+
+        chunk_size = 16 * 1024
+        try:
+            for offset in range(0, len(data), chunk_size):
+                handler.wfile.write(data[offset:offset + chunk_size])
+                if self.bandwidth:
+                    time.sleep(chunk_size / self.bandwidth)
+        except (BrokenPipeError, ConnectionResetError):
+            # 流式提取提前结束下载时客户端会断开连接
+            handler.close_connection = True
+            return
+
+        with self._lock:
+            self.bytes_sent += len(data)
@@ -0,0 +1,379 @@
+"""
+📊 离线基准测试套件
+用固定语料和本地替身源站测量抓取、提取和接口性能，结果写入JSON以便跨提交对比
+
+用法：
+    python benchmarks/suite.py [--iterations 20] [--concurrency 16] [--requests 400]
+                               [--latency-ms 20] [--output 结果.json] [--compare 基线.json]
+
+测量内容：
+- scrape_article 每个页面的延迟分位数（p50/p90/p99）
+- 解析和各 _extract_* 步骤的CPU时间
+- /extract（缓存命中/未命中）和 /image（缓存命中/未命中）在并发下的吞吐量和延迟
+- 进程峰值RSS
+
+压测结束后检查 /metrics 的每一行都是合法的Prometheus样本，否则报错退出。
+
+语料见 corpus.py，替身源站见 origin.py。不访问外部网络。
+"""
+
+import argparse
+import base64
+import http.client
+import json
+import logging
+import os
+import platform
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List
+from urllib.parse import quote
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+FIXTURES_DIR = os.path.join(BENCH_DIR, 'fixtures')
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+
+# 分别计时的提取步骤
+EXTRACTORS = [
+    '_extract_title', '_extract_content', '_extract_images', '_extract_author',
+    '_extract_publish_time', '_extract_summary', '_extract_tags'
+]
+
+# 对比时数值越大越好的指标（其余均为越小越好）
+HIGHER_IS_BETTER = ('rps',)
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """p50/p90/p99/平均值（毫秒）"""
+    if not samples:
+        return {'count': 0}
+    ordered = sorted(samples)
+
+    def pick(q):
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 3)
+
+    return {
+        'count': len(ordered),
+        'p50': pick(0.5),
+        'p90': pick(0.9),
+        'p99': pick(0.99),
+        'mean': round(sum(ordered) / len(ordered), 3)
+    }
+
+
+class StageTimer:
+    """累计各步骤的CPU时间（线程CPU时间，不含等待网络的时间）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples: Dict[str, List[float]] = {}
+
+    def wrap(self, name: str, fn: Callable) -> Callable:
+        def timed(*args, **kwargs):
+            start = time.thread_time()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed = (time.thread_time() - start) * 1000
+                with self._lock:
+                    self.samples.setdefault(name, []).append(elapsed)
+        return timed
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        return {name: percentiles(values) for name, values in self.samples.items()}
+
+
+def _http_url(url: str) -> str:
+    """替身源站以HTTP代理方式工作，录制的https页面改用http访问"""
+    return 'http://' + url[len('https://'):] if url.startswith('https://') else url
+
+
+def bench_scrape(scraper, pages: List[Dict], iterations: int) -> Dict:
+    """直接调用 scrape_article（不经过文章缓存），记录延迟和各步骤CPU时间"""
+    import web_scraper
+
+    timer = StageTimer()
+    original_parse = web_scraper.parse_document
+    web_scraper.parse_document = timer.wrap('parse', original_parse)
+    for name in EXTRACTORS:
+        setattr(scraper, name, timer.wrap(name, getattr(scraper, name)))
+
+    latency = {}
+    all_samples = []
+    try:
+        for page in pages:
+            url = _http_url(page['url'])
+            result = scraper.scrape_article(url)
+            if 'error' in result:
+                raise SystemExit(f"抓取语料页面失败: {url}, {result['error']}")
+
+            samples = []
+            for _ in range(iterations):
+                start = time.perf_counter()
+                scraper.scrape_article(url)
+                samples.append((time.perf_counter() - start) * 1000)
+            label = f"{page['platform']}:{page['url'].rsplit('/', 1)[-1]}"
+            latency[label] = percentiles(samples)
+            all_samples.extend(samples)
+    finally:
+        web_scraper.parse_document = original_parse
+        for name in EXTRACTORS:
+            delattr(scraper, name)
+
+    latency['all'] = percentiles(all_samples)
+    return {'latency_ms': latency, 'cpu_ms': timer.summary()}
+
+
+class LoadGenerator:
+    """并发请求本地Flask服务，每个线程复用一个keep-alive连接"""
+
+    def __init__(self, port: int, concurrency: int):
+        self.port = port
+        self.concurrency = concurrency
+        self._local = threading.local()
+
+    def _connection(self) -> http.client.HTTPConnection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=60)
+        return conn
+
+    def _request(self, method: str, path: str, body: bytes = None):
+        headers = {'Content-Type': 'application/json'} if body else {}
+        for attempt in range(2):
+            conn = self._connection()
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                return response.status
+            except (http.client.HTTPException, OSError):
+                conn.close()
+                self._local.conn = None
+                if attempt:
+                    raise
+
+    def run(self, make_request: Callable[[int], tuple], total: int) -> Dict:
+        """发送total个请求，make_request(i) 返回 (method, path, body)"""
+        latencies = []
+        errors = [0]
+        lock = threading.Lock()
+
+        def one(i):
+            method, path, body = make_request(i)
+            start = time.perf_counter()
+            try:
+                status = self._request(method, path, body)
+            except (http.client.HTTPException, OSError):
+                status = 0
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                latencies.append(elapsed)
+                if status not in (200, 206, 304):
+                    errors[0] += 1
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            list(pool.map(one, range(total)))
+        duration = time.perf_counter() - start
+
+        result = percentiles(latencies)
+        result['rps'] = round(total / duration, 1)
+        result['errors'] = errors[0]
+        return result
+
+
+def bench_endpoints(app, pages: List[Dict], images: List[Dict], concurrency: int, total: int) -> Dict:
+    """/extract 和 /image 在并发下的吞吐量"""
+    from werkzeug.serving import make_server
+
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    load = LoadGenerator(server.server_port, concurrency)
+    page_urls = [_http_url(page['url']) for page in pages]
+    image_urls = [image['url'] for image in images]
+
+    def extract(url):
+        return 'POST', '/extract', json.dumps({'url': url}).encode('utf-8')
+
+    def image(url):
+        encoded = base64.b64encode(quote(url, safe='').encode()).decode()
+        return 'GET', f'/image/{encoded}', None
+
+    results = {}
+    try:
+        # 预热缓存
+        load.run(lambda i: extract(page_urls[i % len(page_urls)]), len(page_urls))
+        load.run(lambda i: image(image_urls[i % len(image_urls)]), len(image_urls))
+
+        results['extract_cached'] = load.run(lambda i: extract(page_urls[i % len(page_urls)]), total)
+        # 不同的查询参数产生不同的缓存键，替身源站忽略查询参数
+        results['extract_uncached'] = load.run(
+            lambda i: extract(f"{page_urls[i % len(page_urls)]}?bench={time.time_ns()}"), total
+        )
+        results['image_cached'] = load.run(lambda i: image(image_urls[i % len(image_urls)]), total)
+        results['image_uncached'] = load.run(
+            lambda i: image(f"{image_urls[i % len(image_urls)]}?bench={time.time_ns()}"), total
+        )
+    finally:
+        server.shutdown()
+    return results
+
+
+# Prometheus文本格式的样本行：指标名{标签} 数值
+_SAMPLE_RE = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]*(\{[^{}]*\})? (-?[0-9.e+-]+|[+-]Inf|NaN)$')
+
+
+def check_metrics(app):
+    """/metrics 的每一行都必须是合法的注释或样本行，否则Prometheus拒绝整次抓取"""
+    text = app.test_client().get('/metrics').get_data(as_text=True)
+    for line in text.splitlines():
+        if line.startswith('#'):
+            continue
+        match = _SAMPLE_RE.match(line)
+        if match is None:
+            raise SystemExit(f"/metrics 输出了不合法的样本行: {line}")
+        float(match.group(2))
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def _flatten(data: Dict, prefix: str = '') -> Dict[str, float]:
+    flat = {}
+    for key, value in data.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(_flatten(value, path))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool) and key != 'count':
+            flat[path] = value
+    return flat
+
+
+def compare(baseline: Dict, current: Dict, threshold: float = 0.1):
+    """逐项对比两次结果，变差超过threshold的指标标记为回归"""
+    old = _flatten({k: v for k, v in baseline.items() if k != 'meta'})
+    new = _flatten({k: v for k, v in current.items() if k != 'meta'})
+    print(f"\n对比基线 {baseline['meta'].get('commit', '')} -> {current['meta'].get('commit', '')}")
+    regressions = 0
+    for path in sorted(old.keys() & new.keys()):
+        before, after = old[path], new[path]
+        if not before:
+            continue
+        change = (after - before) / before
+        worse = -change if path.rsplit('.', 1)[-1] in HIGHER_IS_BETTER else change
+        mark = '  ⚠️ 回归' if worse > threshold else ''
+        regressions += bool(mark)
+        print(f"{path:<55}{before:>12.2f}{after:>12.2f}{change:>+9.1%}{mark}")
+    print(f"回归指标 {regressions} 项（阈值 {threshold:.0%}）")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='离线基准测试套件')
+    parser.add_argument('--corpus', default=FIXTURES_DIR, help='语料目录')
+    parser.add_argument('--iterations', type=int, default=20, help='每个页面调用scrape_article的次数')
+    parser.add_argument('--concurrency', type=int, default=16, help='接口压测并发数')
+    parser.add_argument('--requests', type=int, default=400, help='每个接口场景的请求数')
+    parser.add_argument('--latency-ms', type=float, default=0, help='替身源站模拟的首字节延迟')
+    parser.add_argument('--bandwidth', type=float, default=0, help='替身源站模拟的带宽（MB/s），0为不限')
+    parser.add_argument('--output', default='', help='结果JSON路径，默认 benchmarks/results/<时间>-<提交>.json')
+    parser.add_argument('--compare', default='', help='与之对比的基线结果JSON')
+    args = parser.parse_args()
+
+    # 必须在导入 config 之前设置（corpus 间接导入了 config）：缓存写入临时目录
+    os.environ['IMAGE_CACHE_DIR'] = tempfile.mkdtemp(prefix='bench-images-')
+    os.environ.setdefault('ARTICLE_CACHE_BACKEND', 'memory')
+
+    from corpus import load_manifest
+    from origin import StandInOrigin
+
+    manifest = load_manifest(args.corpus)
+    origin = StandInOrigin(args.corpus, args.latency_ms, args.bandwidth).start()
+
+    # HTTP客户端在首次请求时读取代理设置：上游请求经替身源站代理
+    os.environ['HTTP_PROXY'] = os.environ['http_proxy'] = origin.proxy_url
+    os.environ.pop('NO_PROXY', None)
+    os.environ.pop('no_proxy', None)
+
+    import app as app_module
+    from config import Config
+    logging.disable(logging.WARNING)
+
+    commit = _git_commit()
+    print(f"语料: {len(manifest['pages'])} 个页面, {len(manifest['images'])} 张图片; 提交 {commit or '未知'}")
+
+    scrape = bench_scrape(app_module.scraper, manifest['pages'], args.iterations)
+    for label, stats in scrape['latency_ms'].items():
+        print(f"scrape {label:<45} p50 {stats['p50']:>8.1f}ms  p99 {stats['p99']:>8.1f}ms")
+    for name, stats in scrape['cpu_ms'].items():
+        print(f"cpu    {name:<45} mean {stats['mean']:>7.2f}ms  p99 {stats['p99']:>8.2f}ms")
+
+    endpoints = bench_endpoints(app_module.app, manifest['pages'], manifest['images'],
+                                args.concurrency, args.requests)
+    for name, stats in endpoints.items():
+        print(f"http   {name:<45} {stats['rps']:>8.1f} req/s  p50 {stats['p50']:>7.1f}ms  "
+              f"p99 {stats['p99']:>7.1f}ms  错误 {stats['errors']}")
+
+    check_metrics(app_module.app)
+
+    # Linux下ru_maxrss单位为KB，macOS为字节
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_rss_mb = max_rss / 1024 / 1024 if sys.platform == 'darwin' else max_rss / 1024
+    print(f"峰值RSS {peak_rss_mb:.1f}MB，替身源站请求 {origin.hits} 次")
+    origin.stop()
+
+    result = {
+        'meta': {
+            'commit': commit,
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'params': {
+                'iterations': args.iterations,
+                'concurrency': args.concurrency,
+                'requests': args.requests,
+                'latency_ms': args.latency_ms,
+                'bandwidth': args.bandwidth
+            },
+            'config': {
+                'PARSER_BACKEND': Config.PARSER_BACKEND,
+                'EXTRACTION_ENGINE': Config.EXTRACTION_ENGINE,
+                'STREAMING_EXTRACTION': Config.STREAMING_EXTRACTION
+            }
+        },
+        'scrape': scrape,
+        'endpoints': endpoints,
+        'peak_rss_mb': round(peak_rss_mb, 1)
+    }
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{commit or 'unknown'}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"结果已写入 {output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            compare(json.load(f), result)
+
+
+if __name__ == '__main__':
+    main()
@@ -4,6 +4,7 @@
 """
 
 import os
+import tempfile
 
 
 class Config:
@@ -21,9 +22,135 @@ class Config:
     )
     TIMEOUT = int(os.getenv('TIMEOUT', 30))
     
+    # 上游HTTP客户端配置
+    HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', 5))  # 建立连接超时
+    HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', 15))  # 两次读取之间的最长间隔
+    HTTP_TOTAL_TIMEOUT = float(os.getenv('HTTP_TOTAL_TIMEOUT', TIMEOUT))  # 排队+连接+读取的整体截止时间
+    HTTP_MAX_CONNECTIONS = int(os.getenv('HTTP_MAX_CONNECTIONS', 200))
+    HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv('HTTP_MAX_KEEPALIVE_CONNECTIONS', 50))
+    HTTP_KEEPALIVE_EXPIRY = 30  # 空闲连接保留30秒
+    HTTP_PER_HOST_CONNECTIONS = int(os.getenv('HTTP_PER_HOST_CONNECTIONS', 10))  # 单个域名同时进行的请求数
+    HTTP2_ENABLED = os.getenv('HTTP2_ENABLED', 'True').lower() == 'true'  # 需要安装h2
+    EXTRACTION_ENGINE = os.getenv('EXTRACTION_ENGINE', 'single_pass')  # single_pass / cascade（逐选择器扫描）
+    PARSER_BACKEND = os.getenv('PARSER_BACKEND', 'html.parser')  # html.parser / lxml / lxml_native
+    STREAMING_EXTRACTION = os.getenv('STREAMING_EXTRACTION', 'False').lower() == 'true'  # 流式下载+增量解析，正文容器闭合后停止
+    STREAMING_CHUNK_SIZE = 16 * 1024  # 流式提取每次读取16KB
+    PARSE_WORKERS = int(os.getenv('PARSE_WORKERS', 0))  # 解析进程池大小，0为在线程中解析（如不允许创建子进程的无服务器环境）
+    PARSE_POOL_MIN_BYTES = int(os.getenv('PARSE_POOL_MIN_BYTES', 32 * 1024))  # 小于此大小的页面仍在线程中解析
+    STRUCTURED_DATA_ENABLED = os.getenv('STRUCTURED_DATA_ENABLED', 'True').lower() == 'true'  # 先读取JSON-LD、OpenGraph、内嵌状态中的字段
+    
     # 图片缓存配置
     IMAGE_CACHE_DAYS = 7  # 图片缓存7天
     IMAGE_CACHE_MAX_AGE = 604800  # 7天 = 604800秒
+    IMAGE_CACHE_DIR = os.getenv('IMAGE_CACHE_DIR',
+        os.path.join(tempfile.gettempdir(), 'gpts-article-analyzer', 'images')
+    )
+    IMAGE_CACHE_MEMORY_BYTES = int(os.getenv('IMAGE_CACHE_MEMORY_BYTES', 64 * 1024 * 1024))  # 内存缓存64MB
+    IMAGE_CACHE_CLEANUP_INTERVAL = 3600  # 每小时清理一次过期磁盘缓存
+    IMAGE_PROXY_STREAMING = os.getenv('IMAGE_PROXY_STREAMING', 'True').lower() == 'true'  # 流式转发图片
+    IMAGE_STREAM_CHUNK_SIZE = 64 * 1024  # 流式转发块大小64KB
+    
+    # 图片变体配置（/image/<encoded_url>?w=1024&q=80&fmt=webp 缩放、转码）
+    IMAGE_VARIANT_WORKERS = int(os.getenv('IMAGE_VARIANT_WORKERS', 0))  # 进程池大小，0为在请求线程中处理（默认，适用于Vercel）
+    IMAGE_VARIANT_MAX_PENDING = int(os.getenv('IMAGE_VARIANT_MAX_PENDING', 16))  # 排队和处理中的上限，超过时返回原图
+    IMAGE_VARIANT_MAX_WIDTH = 4096  # w参数上限
+    IMAGE_VARIANT_DEFAULT_QUALITY = 80  # 未指定q时的编码质量
+    IMAGE_PROXY_DEFAULT_VARIANT = os.getenv('IMAGE_PROXY_DEFAULT_VARIANT', '')  # /extract 返回的proxy_url附带的变体参数，如 w=1024&fmt=webp
+    
+    # 图片探测配置（提取时只下载图片文件头，读取真实尺寸并过滤小图标）
+    IMAGE_PROBE_ENABLED = os.getenv('IMAGE_PROBE_ENABLED', 'False').lower() == 'true'
+    IMAGE_PROBE_MIN_DIMENSION = int(os.getenv('IMAGE_PROBE_MIN_DIMENSION', 100))  # 宽或高小于此值（像素）的图片被过滤
+    IMAGE_PROBE_MAX_BYTES = 64 * 1024  # 每张图片最多读取64KB（JPEG的EXIF段可能较大）
+    IMAGE_PROBE_CHUNK_SIZE = 4 * 1024  # 按4KB读取，解析出尺寸即断开
+    IMAGE_PROBE_CONCURRENCY = int(os.getenv('IMAGE_PROBE_CONCURRENCY', 8))  # 单篇文章并发探测数
+    IMAGE_PROBE_TIMEOUT = float(os.getenv('IMAGE_PROBE_TIMEOUT', 3))  # 单篇文章探测的截止时间（秒）
+    IMAGE_PROBE_CACHE_SIZE = 4096  # 探测结果缓存条数
+    IMAGE_PROBE_CACHE_TTL = 7 * 24 * 3600  # 探测结果缓存7天
+    IMAGE_PROBE_FAILURE_TTL = 300  # 探测失败的结果缓存5分钟
+    
+    # 图片预取配置（/extract 成功后在后台把文章图片下载进图片缓存）
+    IMAGE_PREFETCH_ENABLED = os.getenv('IMAGE_PREFETCH_ENABLED', 'False').lower() == 'true'
+    IMAGE_PREFETCH_WORKERS = int(os.getenv('IMAGE_PREFETCH_WORKERS', 4))  # 预取线程数
+    IMAGE_PREFETCH_PER_HOST = int(os.getenv('IMAGE_PREFETCH_PER_HOST', 2))  # 同一图片域名同时预取数
+    IMAGE_PREFETCH_MAX_PER_ARTICLE = int(os.getenv('IMAGE_PREFETCH_MAX_PER_ARTICLE', 30))  # 单篇文章最多预取前N张
+    IMAGE_PREFETCH_QUEUE_SIZE = int(os.getenv('IMAGE_PREFETCH_QUEUE_SIZE', 200))  # 排队上限，已满时丢弃新任务
+    IMAGE_PREFETCH_TRACK_SIZE = 4096  # 记录预取状态（用于统计命中率）的URL数
+    
+    # 文章打包配置（/extract/bundle 一次返回文字和图片）
+    BUNDLE_WORKERS = int(os.getenv('BUNDLE_WORKERS', 16))  # 获取图片的线程池大小（所有打包请求共用）
+    BUNDLE_MAX_BYTES = int(os.getenv('BUNDLE_MAX_BYTES', 20 * 1024 * 1024))  # 单个响应内联图片的总字节预算，超出的图片只返回代理链接
+    
+    # 正文分块配置（超长文章的正文按token预算分块返回）
+    CONTENT_CHUNK_TOKENS = int(os.getenv('CONTENT_CHUNK_TOKENS', 2000))  # 未指定chunk_tokens时每块的token预算
+    CONTENT_CHUNK_MIN_TOKENS = 100  # chunk_tokens 允许的范围
+    CONTENT_CHUNK_MAX_TOKENS = 32000
+    
+    # 文章提取结果缓存配置
+    ARTICLE_CACHE_BACKEND = os.getenv('ARTICLE_CACHE_BACKEND', 'memory')  # memory / sqlite / file
+    ARTICLE_CACHE_SQLITE_PATH = os.getenv('ARTICLE_CACHE_SQLITE_PATH',
+        os.path.join(tempfile.gettempdir(), 'gpts-article-analyzer', 'articles.db')
+    )
+    ARTICLE_CACHE_FILE_DIR = os.getenv('ARTICLE_CACHE_FILE_DIR',
+        os.path.join(tempfile.gettempdir(), 'gpts-article-analyzer', 'articles')
+    )
+    ARTICLE_CACHE_MAX_ENTRIES = int(os.getenv('ARTICLE_CACHE_MAX_ENTRIES', 512))
+    ARTICLE_CACHE_TTL = {  # 各平台结果缓存时间（秒）
+        'wechat': 24 * 3600,  # 微信文章发布后基本不变
+        'csdn': 6 * 3600,
+        'toutiao': 3600,
+        'xiaohongshu': 1800,
+        'weibo': 600,  # 微博内容变化快
+    }
+    ARTICLE_CACHE_DEFAULT_TTL = 1800
+    ARTICLE_CACHE_STALE_SECONDS = int(os.getenv('ARTICLE_CACHE_STALE_SECONDS', 3600))  # 过期后仍可返回旧结果并后台刷新的时长
+    ARTICLE_CACHE_REVALIDATE = os.getenv('ARTICLE_CACHE_REVALIDATE', 'True').lower() == 'true'  # 刷新时发送条件请求并比对页面哈希，未变化时跳过解析
+    ARTICLE_CACHE_REFRESH_WORKERS = 2
+    ARTICLE_CACHE_PURGE_INTERVAL = 3600
+    
+    # 异步任务配置（/extract?async=1 入队后立即返回任务id，GET /jobs/<id> 轮询结果）
+    JOB_QUEUE_PATH = os.getenv('JOB_QUEUE_PATH',
+        os.path.join(tempfile.gettempdir(), 'gpts-article-analyzer', 'jobs.db')
+    )
+    JOB_WORKERS = int(os.getenv('JOB_WORKERS', 2))  # Web服务进程内的工作线程数，单独运行 job_queue.py 时可设为0
+    JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', 3))  # 每个任务最多执行次数
+    JOB_RETRY_BACKOFF = float(os.getenv('JOB_RETRY_BACKOFF', 5))  # 第n次失败后等待 BACKOFF * 2^(n-1) 秒再重试
+    JOB_LEASE_SECONDS = TIMEOUT * 4  # 领取后超过该时长未结束视为工作进程已退出，任务可被重新领取
+    JOB_POLL_INTERVAL = 1.0  # 队列为空时的轮询间隔（秒）
+    JOB_RETENTION_SECONDS = 24 * 3600  # 已结束的任务保留1天
+    JOB_PURGE_INTERVAL = 3600
+    
+    # 文章库配置（持久保存每次提取结果并建立全文索引，/articles/search 检索、/articles/<id> 读取）
+    ARTICLE_STORE_ENABLED = os.getenv('ARTICLE_STORE_ENABLED', 'True').lower() == 'true'
+    ARTICLE_STORE_PATH = os.getenv('ARTICLE_STORE_PATH',
+        os.path.join(tempfile.gettempdir(), 'gpts-article-analyzer', 'library.db')
+    )
+    ARTICLE_SEARCH_DEFAULT_LIMIT = 10  # 未指定limit时返回的条数
+    ARTICLE_SEARCH_MAX_LIMIT = 50
+    ARTICLE_SEARCH_SNIPPET_CHARS = 120  # 检索结果中正文片段的长度
+    
+    # 近似重复检测配置（同一篇文章的不同转载链接返回 duplicate_of 指向最先提取的原文）
+    DUPLICATE_DETECTION_ENABLED = os.getenv('DUPLICATE_DETECTION_ENABLED', 'True').lower() == 'true'
+    DUPLICATE_INDEX_PATH = os.getenv('DUPLICATE_INDEX_PATH',
+        os.path.join(tempfile.gettempdir(), 'gpts-article-analyzer', 'fingerprints.db')
+    )  # 为空时指纹只保存在内存中
+    DUPLICATE_MAX_DISTANCE = int(os.getenv('DUPLICATE_MAX_DISTANCE', 6))  # 正文指纹（64位SimHash）汉明距离不超过该值视为近似重复（无关文章通常在20以上）
+    DUPLICATE_MIN_CHARS = 200  # 去除空白和标点后短于该长度的正文不计算指纹
+    DUPLICATE_RETENTION_DAYS = 30  # 指纹保留天数
+    DUPLICATE_PURGE_INTERVAL = 3600  # 清理过期指纹（数据库和内存索引）的间隔
+    
+    # 请求合并配置（同一链接的并发请求只抓取一次）
+    SINGLE_FLIGHT_LOCK_DIR = os.getenv('SINGLE_FLIGHT_LOCK_DIR', '')  # 设置后同一台机器上的多个worker通过该目录下的锁文件合并请求
+    SINGLE_FLIGHT_LOCK_SLOTS = 4096  # 锁文件数，键按哈希分槽
+    
+    # 批量提取配置
+    BATCH_MAX_URLS = int(os.getenv('BATCH_MAX_URLS', 500))  # 单次批量请求最多链接数
+    BATCH_MAX_WORKERS = int(os.getenv('BATCH_MAX_WORKERS', 16))  # 批量抓取线程池大小
+    BATCH_PER_HOST_LIMIT = int(os.getenv('BATCH_PER_HOST_LIMIT', 4))  # 同一域名默认并发数
+    BATCH_HOST_LIMITS = {  # 易限流平台的单独并发上限
+        'mp.weixin.qq.com': 2,
+        'xiaohongshu.com': 2,
+        'weibo.com': 2,
+    }
     
     # 代理URL配置
     PROXY_BASE_URL = os.getenv('PROXY_BASE_URL', 'https://gpts-article-analyzer.vercel.app')
@@ -31,6 +158,7 @@ class Config:
     # 性能配置
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB
     MAX_IMAGE_SIZE = 10 * 1024 * 1024  # 10MB
+    JSON_ENCODER = os.getenv('JSON_ENCODER', 'auto')  # 响应的JSON编码器：auto（已安装orjson时使用）/ orjson / json
     
     # 安全配置
     SECRET_KEY = os.getenv('SECRET_KEY', 'super-secret-key-change-in-production')
@@ -47,6 +175,8 @@ class Config:
             'PORT': cls.PORT,
             'TIMEOUT': cls.TIMEOUT,
             'IMAGE_CACHE_DAYS': cls.IMAGE_CACHE_DAYS,
+            'IMAGE_CACHE_DIR': cls.IMAGE_CACHE_DIR,
+            'ARTICLE_CACHE_BACKEND': cls.ARTICLE_CACHE_BACKEND,
             'PROXY_BASE_URL': cls.PROXY_BASE_URL,
             'LOG_LEVEL': cls.LOG_LEVEL
         }
\ No newline at end of file
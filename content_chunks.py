@@ -0,0 +1,137 @@
+"""
+✂️ 正文分块
+超长文章的正文按token预算切分，/extract 只返回第一块和游标，后续块从文章缓存中按游标读取
+
+- 在句末标点处切分；单句超过预算时在空格处切分，没有空格时按字符切分
+- 各块依次拼接即为完整正文
+- token数按字符估算：非ASCII字符（中文等）每个约1个token，ASCII字符约4个1个token
+"""
+
+import base64
+import binascii
+import hashlib
+import json
+import re
+from functools import lru_cache
+from typing import Dict, Tuple
+
+from config import Config
+
+# 句末位置：中文句末标点（及其后的空白），或英文句末标点后跟空白
+_SENTENCE_END_RE = re.compile(r'[。！？；…]+[”’"）)]*\s*|[.!?;]+[\'")]*\s+')
+
+
+class InvalidCursor(ValueError):
+    """游标无法解析"""
+
+
+def estimate_tokens(text: str) -> int:
+    """估算文本的token数"""
+    ascii_count = len(text.encode('ascii', 'ignore'))
+    return len(text) - ascii_count + (ascii_count + 3) // 4
+
+
+@lru_cache(maxsize=64)
+def split_content(content: str, budget: int = Config.CONTENT_CHUNK_TOKENS) -> Tuple[str, ...]:
+    """
+    把正文切分为每块不超过budget个token的若干块
+
+    同一篇文章的后续块请求会重复切分，结果按 (正文, 预算) 缓存
+
+    Returns:
+        各块正文（至少一块，正文为空时为一个空字符串）
+    """
+    chunks = []
+    current, current_tokens = [], 0
+    start = 0
+    ends = [match.end() for match in _SENTENCE_END_RE.finditer(content)]
+    if not ends or ends[-1] < len(content):
+        ends.append(len(content))
+
+    for end in ends:
+        sentence = content[start:end]
+        start = end
+        tokens = estimate_tokens(sentence)
+        if current and current_tokens + tokens > budget:
+            chunks.append(''.join(current))
+            current, current_tokens = [], 0
+        if tokens > budget:
+            pieces = _split_long(sentence, budget)
+            chunks.extend(pieces[:-1])
+            sentence = pieces[-1]
+            tokens = estimate_tokens(sentence)
+        current.append(sentence)
+        current_tokens += tokens
+
+    if current or not chunks:
+        chunks.append(''.join(current))
+    return tuple(chunks)
+
+
+def _split_long(text: str, budget: int) -> list:
+    """切分超过预算的单句：取不超过预算的最长前缀，尽量在空格处断开"""
+    pieces = []
+    while estimate_tokens(text) > budget:
+        # token数随前缀长度单调不减，二分查找最长的不超预算前缀
+        low, high = 1, len(text)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if estimate_tokens(text[:middle]) <= budget:
+                low = middle
+            else:
+                high = middle - 1
+        cut = text.rfind(' ', 0, low) + 1 or low
+        pieces.append(text[:cut])
+        text = text[cut:]
+    pieces.append(text)
+    return pieces
+
+
+def content_digest(content: str) -> str:
+    """正文摘要，用于发现游标生成后文章内容已更新"""
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()[:16]
+
+
+def encode_cursor(url: str, index: int, budget: int, digest: str) -> str:
+    """生成指向第index块的游标"""
+    payload = json.dumps({'u': url, 'i': index, 't': budget, 'd': digest}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Dict:
+    """
+    解析游标
+
+    Returns:
+        {'url', 'index', 'budget', 'digest'}
+
+    Raises:
+        InvalidCursor: 游标格式不正确
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode('utf-8'))
+        result = {
+            'url': payload['u'],
+            'index': payload['i'],
+            'budget': payload['t'],
+            'digest': payload['d']
+        }
+    except (binascii.Error, UnicodeDecodeError, ValueError, KeyError, TypeError):
+        raise InvalidCursor("游标无效")
+    if not (isinstance(result['url'], str) and isinstance(result['index'], int) and result['index'] >= 0
+            and isinstance(result['budget'], int) and isinstance(result['digest'], str)):
+        raise InvalidCursor("游标无效")
+    return result
+
+
+def chunk_info(chunks: Tuple[str, ...], index: int, url: str, budget: int, digest: str) -> Dict:
+    """第index块的分块信息（附在响应的 chunk 字段中）"""
+    has_next = index + 1 < len(chunks)
+    return {
+        'index': index,
+        'total': len(chunks),
+        'tokens': estimate_tokens(chunks[index]),
+        'content_length': sum(len(chunk) for chunk in chunks),
+        'next_cursor': encode_cursor(url, index + 1, budget, digest) if has_next else None
+    }
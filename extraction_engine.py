@@ -0,0 +1,667 @@
+"""
+⚡ 单遍提取引擎
+一次遍历文档，同时收集所有字段的候选元素
+
+原有的提取方式对每个字段的每个候选选择器各调用一次 select_one/find_all，
+每篇文章约40次全文档扫描。本模块将 platform_selectors 和通用选择器预编译，
+按 标签/id/class 建立索引，遍历文档时每个元素只检查可能匹配的选择器。
+
+提取器通过统一的文档接口（select_one/select/get_text/...）查询，
+因此各字段的选择器优先级与原实现完全一致：
+- CascadeSoupDocument: 原有方式，每次查询扫描一遍文档（作为对照）
+- SinglePassSoupDocument: 单遍扫描BeautifulSoup文档后按索引回答查询
+- LxmlDocument: 直接使用lxml.html解析和单遍扫描，不构建BeautifulSoup对象
+"""
+
+import codecs
+import re
+import threading
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import lxml.html
+from bs4 import BeautifulSoup, Tag
+from bs4.dammit import EncodingDetector
+from lxml import etree
+
+from config import Config
+
+# 正文提取前移除的元素
+REMOVED_TAGS = ('script', 'style', 'nav', 'header', 'footer', 'aside', 'advertisement', 'ad')
+
+# BeautifulSoup 的 get_text() 不包含这些元素内部的文本（除非直接对其调用）
+NON_TEXT_TAGS = frozenset(('script', 'style', 'template', 'rt', 'rp'))
+
+# 选择器语法：复合选择器之间仅支持后代组合符（空格）
+_COMPOUND_RE = re.compile(
+    r'(?P<tag>[a-zA-Z][\w-]*|\*)?'
+    r'(?P<rest>(?:#[\w-]+|\.[\w-]+|\[[^\]]+\])*)$'
+)
+_PART_RE = re.compile(r'#(?P<id>[\w-]+)|\.(?P<cls>[\w-]+)|\[(?P<attr>[^\]]+)\]')
+_ATTR_RE = re.compile(
+    r'^\s*(?P<name>[\w-]+)\s*(?:(?P<op>[*^$~]?=)\s*(?P<quote>["\']?)(?P<value>.*?)(?P=quote))?\s*$'
+)
+
+
+class CompiledCompound:
+    """一个复合选择器，如 h1.title-article-title、meta[name="author"]"""
+
+    __slots__ = ('tag', 'id', 'classes', 'attrs')
+
+    def __init__(self, tag: Optional[str], id_: Optional[str], classes: Tuple[str, ...],
+                 attrs: Tuple[Tuple[str, str, str], ...]):
+        self.tag = tag
+        self.id = id_
+        self.classes = classes
+        self.attrs = attrs
+
+    def matches(self, name: str, attrs: Dict) -> bool:
+        if self.tag is not None and name != self.tag:
+            return False
+        if self.id is not None and attrs.get('id') != self.id:
+            return False
+        if self.classes:
+            element_classes = attrs.get('class')
+            if not element_classes:
+                return False
+            if isinstance(element_classes, str):
+                element_classes = element_classes.split()
+            for cls in self.classes:
+                if cls not in element_classes:
+                    return False
+        for attr_name, op, expected in self.attrs:
+            value = attrs.get(attr_name)
+            if value is None:
+                return False
+            if not isinstance(value, str):
+                # 多值属性（如class）按空格拼接后比较
+                value = ' '.join(value)
+            elif attr_name == 'class':
+                # lxml中class为原始字符串，与BeautifulSoup的拼接结果保持一致
+                value = ' '.join(value.split())
+            if op == '' or op is None:
+                continue
+            if op == '=' and value != expected:
+                return False
+            if op == '*=' and (not expected or expected not in value):
+                return False
+            if op == '^=' and (not expected or not value.startswith(expected)):
+                return False
+            if op == '$=' and (not expected or not value.endswith(expected)):
+                return False
+            if op == '~=' and expected not in value.split():
+                return False
+        return True
+
+
+class CompiledSelector:
+    """由后代组合符连接的一组复合选择器"""
+
+    __slots__ = ('text', 'steps', 'last')
+
+    def __init__(self, text: str, steps: List[CompiledCompound]):
+        self.text = text
+        self.steps = steps
+        self.last = steps[-1]
+
+    def matches_ancestors(self, ancestors: List[Tuple[str, Dict]]) -> bool:
+        """检查除最后一步外的各步是否依次匹配某个祖先元素"""
+        step = len(self.steps) - 2
+        for name, attrs in reversed(ancestors):
+            if step < 0:
+                break
+            if self.steps[step].matches(name, attrs):
+                step -= 1
+        return step < 0
+
+
+def compile_selector(text: str) -> CompiledSelector:
+    """
+    编译CSS选择器
+
+    支持：标签、#id、.class、[attr]、[attr=v]、[attr*=v]、[attr^=v]、[attr$=v]、[attr~=v]
+    以及后代组合符。不支持的语法抛出ValueError
+    """
+    steps = []
+    for part in text.split():
+        match = _COMPOUND_RE.match(part)
+        if not match:
+            raise ValueError(f"不支持的选择器: {text}")
+
+        tag = match.group('tag')
+        id_ = None
+        classes = []
+        attrs = []
+        for piece in _PART_RE.finditer(match.group('rest')):
+            if piece.group('id'):
+                id_ = piece.group('id')
+            elif piece.group('cls'):
+                classes.append(piece.group('cls'))
+            else:
+                attr = _ATTR_RE.match(piece.group('attr'))
+                if not attr:
+                    raise ValueError(f"不支持的属性选择器: {text}")
+                attrs.append((attr.group('name').lower(), attr.group('op') or '', attr.group('value') or ''))
+
+        steps.append(CompiledCompound(
+            None if tag in (None, '*') else tag.lower(), id_, tuple(classes), tuple(attrs)
+        ))
+
+    if not steps:
+        raise ValueError(f"空选择器: {text!r}")
+    return CompiledSelector(text, steps)
+
+
+class SelectorIndex:
+    """
+    预编译的选择器集合
+
+    按选择器最后一步的 id / 第一个class / 标签 分桶，
+    只有属性条件的选择器（如 [class*="title"]）放入通配桶，对每个元素都检查
+    """
+
+    def __init__(self, selectors: Iterable[str]):
+        self.selectors: List[CompiledSelector] = []
+        self.positions: Dict[str, int] = {}
+        self.unsupported = set()
+        self.by_id: Dict[str, List[int]] = {}
+        self.by_class: Dict[str, List[int]] = {}
+        self.by_tag: Dict[str, List[int]] = {}
+        self.wildcard: List[int] = []
+
+        for text in selectors:
+            if text in self.positions or text in self.unsupported:
+                continue
+            try:
+                compiled = compile_selector(text)
+            except ValueError:
+                self.unsupported.add(text)
+                continue
+
+            position = len(self.selectors)
+            self.selectors.append(compiled)
+            self.positions[text] = position
+
+            last = compiled.last
+            if last.id is not None:
+                self.by_id.setdefault(last.id, []).append(position)
+            elif last.classes:
+                self.by_class.setdefault(last.classes[0], []).append(position)
+            elif last.tag is not None:
+                self.by_tag.setdefault(last.tag, []).append(position)
+            else:
+                self.wildcard.append(position)
+
+
+class _MatchRecorder:
+    """单遍扫描中记录每个预编译选择器的匹配元素，供各文档实现共用"""
+
+    def __init__(self, index: SelectorIndex):
+        self.index = index
+        self.matches_all: List[list] = [[] for _ in index.selectors]
+        self.matches_kept: List[list] = [[] for _ in index.selectors]
+
+    def record(self, node, name: str, attrs, ancestors: List[Tuple[str, Dict]], removed: bool):
+        index = self.index
+
+        # 收集可能匹配的选择器
+        candidates = list(index.wildcard)
+        if name in index.by_tag:
+            candidates.extend(index.by_tag[name])
+        element_id = attrs.get('id')
+        if element_id and element_id in index.by_id:
+            candidates.extend(index.by_id[element_id])
+        classes = attrs.get('class')
+        if classes:
+            for cls in (classes.split() if isinstance(classes, str) else classes):
+                if cls in index.by_class:
+                    candidates.extend(index.by_class[cls])
+
+        for position in candidates:
+            selector = index.selectors[position]
+            if not selector.last.matches(name, attrs):
+                continue
+            if len(selector.steps) > 1 and not selector.matches_ancestors(ancestors):
+                continue
+            self.matches_all[position].append(node)
+            if not removed:
+                self.matches_kept[position].append(node)
+
+    def lookup(self, selector: str, removed_applied: bool) -> Optional[list]:
+        """返回选择器的匹配列表；选择器未预编译时返回None"""
+        position = self.index.positions.get(selector)
+        if position is None:
+            return None
+        return self.matches_kept[position] if removed_applied else self.matches_all[position]
+
+
+class CascadeSoupDocument:
+    """原有查询方式：每次查询都对BeautifulSoup文档做一次完整扫描"""
+
+    def __init__(self, soup: BeautifulSoup):
+        self.soup = soup
+
+    def select_one(self, selector: str) -> Optional[Tag]:
+        return self.soup.select_one(selector)
+
+    def select(self, selector: str) -> List[Tag]:
+        return self.soup.select(selector)
+
+    def remove_boilerplate(self):
+        """移除脚本、导航、页眉页脚等不需要的元素"""
+        for element in self.soup(list(REMOVED_TAGS)):
+            element.decompose()
+
+    def body(self) -> Optional[Tag]:
+        return self.soup.find('body')
+
+    def image_candidates(self) -> List[Tag]:
+        """可能包含图片的元素，顺序与原 _extract_images 一致"""
+        # 1. 查找所有img标签
+        img_tags = self.soup.find_all('img')
+        # 2. 查找微信文章特有的图片元素
+        wechat_imgs = self.soup.find_all(['img', 'div'], attrs={'data-src': True})
+        # 3. 查找CSDN特有的图片元素
+        csdn_imgs = self.soup.find_all(['img'], attrs={'data-src': True})
+        # 4. 查找背景图片
+        bg_imgs = self.soup.find_all(attrs={'style': re.compile(r'background-image')})
+        return list(img_tags) + list(wechat_imgs) + list(csdn_imgs) + list(bg_imgs)
+
+    @staticmethod
+    def tag_name(node: Tag) -> str:
+        return node.name
+
+    @staticmethod
+    def get_attr(node: Tag, name: str) -> str:
+        return node.get(name, '')
+
+    @staticmethod
+    def get_text(node: Tag, strip: bool = False) -> str:
+        return node.get_text(strip=strip)
+
+
+class _SinglePassMixin:
+    """单遍扫描文档的公共部分：扫描时分类收集图片候选、待移除元素和body"""
+
+    def _init_scan_state(self, index: SelectorIndex):
+        self.index = index
+        self._recorder = _MatchRecorder(index)
+        self._removed_applied = False
+        self._removed = []
+        self._images = []
+        self._data_src_divs = []
+        self._background_images = []
+        self._body = None
+
+    def _visit(self, node, name: str, attrs, ancestors, removed: bool, node_removed: bool):
+        self._recorder.record(node, name, attrs, ancestors, node_removed)
+
+        if node_removed:
+            # 只记录被移除子树的根
+            if not removed:
+                self._removed.append(node)
+            return
+
+        if name == 'img':
+            self._images.append(node)
+        elif name == 'div' and 'data-src' in attrs:
+            self._data_src_divs.append(node)
+        elif 'background-image' in (attrs.get('style') or ''):
+            self._background_images.append(node)
+        if name == 'body' and self._body is None:
+            self._body = node
+
+    def body(self):
+        return self._body
+
+    def image_candidates(self) -> list:
+        """
+        与原实现等价的候选图片元素
+
+        原实现会把带data-src的img、带背景图的img/div重复加入列表，
+        重复元素解析出的URL相同，去重后结果不变，这里只保留首次出现的元素
+        """
+        return self._images + self._data_src_divs + self._background_images
+
+
+class SinglePassSoupDocument(_SinglePassMixin, CascadeSoupDocument):
+    """
+    单遍扫描：构造时遍历一次文档，记录每个预编译选择器的全部匹配元素
+
+    remove_boilerplate() 之前的查询包含所有元素（与原实现中标题在移除前提取一致），
+    之后的查询只返回不在被移除子树内的元素
+    """
+
+    def __init__(self, soup: BeautifulSoup, index: SelectorIndex):
+        super().__init__(soup)
+        self._init_scan_state(index)
+        self._scan()
+
+    def _scan(self):
+        # 祖先路径，仅在后代选择器的最后一步匹配时使用
+        ancestors: List[Tuple[str, Dict]] = []
+        stack = [(iter(self.soup.contents), False)]
+
+        while stack:
+            children, removed = stack[-1]
+            node = next(children, None)
+            if node is None:
+                stack.pop()
+                if ancestors and len(stack) <= len(ancestors):
+                    ancestors.pop()
+                continue
+            if not isinstance(node, Tag):
+                continue
+
+            name = node.name
+            attrs = node.attrs
+            node_removed = removed or name in REMOVED_TAGS
+            self._visit(node, name, attrs, ancestors, removed, node_removed)
+
+            if node.contents:
+                ancestors.append((name, attrs))
+                stack.append((iter(node.contents), node_removed))
+
+    def select_one(self, selector: str) -> Optional[Tag]:
+        matches = self._recorder.lookup(selector, self._removed_applied)
+        if matches is None:
+            return super().select_one(selector)
+        return matches[0] if matches else None
+
+    def select(self, selector: str) -> List[Tag]:
+        matches = self._recorder.lookup(selector, self._removed_applied)
+        if matches is None:
+            return super().select(selector)
+        return list(matches)
+
+    def remove_boilerplate(self):
+        """移除扫描时已记录的元素，无需再次扫描"""
+        if self._removed_applied:
+            return
+        for element in self._removed:
+            element.decompose()
+        self._removed_applied = True
+
+
+def _xpath_literal(value: str) -> str:
+    if '"' not in value:
+        return f'"{value}"'
+    if "'" not in value:
+        return f"'{value}'"
+    return 'concat(' + ', \'"\', '.join(f'"{part}"' for part in value.split('"')) + ')'
+
+
+def _compound_to_xpath(compound: CompiledCompound) -> str:
+    conditions = []
+    if compound.id is not None:
+        conditions.append(f'@id={_xpath_literal(compound.id)}')
+    for cls in compound.classes:
+        conditions.append(f'contains(concat(" ", normalize-space(@class), " "), {_xpath_literal(" " + cls + " ")})')
+    for name, op, value in compound.attrs:
+        attr = f'@{name}'
+        literal = _xpath_literal(value)
+        if name == 'class':
+            attr = 'normalize-space(@class)'
+        if op == '':
+            conditions.append(f'@{name}')
+        elif op == '=':
+            conditions.append(f'{attr}={literal}')
+        elif op == '*=':
+            conditions.append(f'contains({attr}, {literal})' if value else 'false()')
+        elif op == '^=':
+            conditions.append(f'starts-with({attr}, {literal})' if value else 'false()')
+        elif op == '$=':
+            conditions.append(
+                f'substring({attr}, string-length({attr}) - string-length({literal}) + 1) = {literal}'
+                if value else 'false()'
+            )
+        elif op == '~=':
+            conditions.append(f'contains(concat(" ", normalize-space(@{name}), " "), {_xpath_literal(" " + value + " ")})')
+    return (compound.tag or '*') + ''.join(f'[{condition}]' for condition in conditions)
+
+
+@lru_cache(maxsize=256)
+def compile_xpath(selector: str) -> etree.XPath:
+    """将选择器预编译为XPath（不依赖cssselect），用于未建索引的选择器"""
+    compiled = compile_selector(selector)
+    return etree.XPath('//' + '//'.join(_compound_to_xpath(step) for step in compiled.steps))
+
+
+_parsers = threading.local()
+
+
+def _lxml_parser(encoding: Optional[str]) -> lxml.html.HTMLParser:
+    """按编码缓存lxml解析器（解析器不跨线程共享）"""
+    cache = getattr(_parsers, 'cache', None)
+    if cache is None:
+        cache = _parsers.cache = {}
+    parser = cache.get(encoding)
+    if parser is None:
+        parser = cache[encoding] = lxml.html.HTMLParser(encoding=encoding)
+    return parser
+
+
+def detect_encoding(content: bytes, partial: bool = False) -> str:
+    """
+    检测页面编码：BOM > 页面声明 > UTF-8 > 其他候选
+
+    与BeautifulSoup的EncodingDetector顺序一致，但在调用字符集猜测之前先尝试UTF-8。
+    partial为True表示content只是页面开头的一部分，末尾可能截断了多字节字符
+    """
+    content, bom_encoding = EncodingDetector.strip_byte_order_mark(content)
+    if bom_encoding:
+        return bom_encoding
+
+    declared = EncodingDetector.find_declared_encoding(content, is_html=True)
+    if declared:
+        return declared
+
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(content, final=not partial)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+
+    for encoding in EncodingDetector(content, is_html=True).encodings:
+        return encoding
+    return 'utf-8'
+
+
+def parse_lxml(content: bytes):
+    """用lxml.html解析页面，空文档返回空的html元素"""
+    if not content or not content.strip():
+        return lxml.html.Element('html')
+    try:
+        return lxml.html.document_fromstring(content, parser=_lxml_parser(detect_encoding(content)))
+    except (etree.ParserError, LookupError):
+        return lxml.html.document_fromstring(content)
+
+
+class LxmlDocument(_SinglePassMixin):
+    """
+    lxml原生文档：单遍扫描lxml树，不构建BeautifulSoup对象
+
+    树可以来自 parse_lxml（完整页面）或 StreamingHTMLBuilder（提前结束的增量解析），
+    get_text/get_attr 的结果与BeautifulSoup（lxml解析器）一致
+    """
+
+    def __init__(self, root, index: SelectorIndex):
+        self.root = root
+        self._init_scan_state(index)
+        self._scan()
+
+    def _scan(self):
+        ancestors: List[Tuple[str, Dict]] = []
+        removed_root = None
+
+        for event, node in etree.iterwalk(self.root, events=('start', 'end')):
+            name = node.tag
+            if not isinstance(name, str):
+                continue
+
+            if event == 'end':
+                ancestors.pop()
+                if node is removed_root:
+                    removed_root = None
+                continue
+
+            attrs = node.attrib
+            removed = removed_root is not None
+            node_removed = removed or name in REMOVED_TAGS
+            self._visit(node, name, attrs, ancestors, removed, node_removed)
+            if node_removed and not removed:
+                removed_root = node
+            ancestors.append((name, attrs))
+
+    def select_one(self, selector: str):
+        matches = self._recorder.lookup(selector, self._removed_applied)
+        if matches is None:
+            matches = compile_xpath(selector)(self.root)
+        return matches[0] if matches else None
+
+    def select(self, selector: str) -> list:
+        matches = self._recorder.lookup(selector, self._removed_applied)
+        if matches is None:
+            return compile_xpath(selector)(self.root)
+        return list(matches)
+
+    def remove_boilerplate(self):
+        """移除扫描时已记录的元素，保留其后的文本（与decompose一致）"""
+        if self._removed_applied:
+            return
+        for element in self._removed:
+            if element.getparent() is not None:
+                element.drop_tree()
+        self._removed_applied = True
+
+    @staticmethod
+    def tag_name(node) -> str:
+        return node.tag
+
+    @staticmethod
+    def get_attr(node, name: str) -> str:
+        return node.get(name, '')
+
+    @staticmethod
+    def get_text(node, strip: bool = False) -> str:
+        if node.tag not in NON_TEXT_TAGS and next(node.iterancestors(*NON_TEXT_TAGS), None) is not None:
+            # 位于template、rt等元素内部：BeautifulSoup把其中的文本记为TemplateString等类型，get_text不返回
+            return ''
+        if node.tag in NON_TEXT_TAGS or next(node.iter(*NON_TEXT_TAGS), None) is None:
+            strings = node.itertext()
+        else:
+            strings = _iter_visible_text(node)
+
+        if strip:
+            return ''.join(text.strip() for text in strings if text.strip())
+        return ''.join(strings)
+
+
+def _iter_visible_text(node, skipped=NON_TEXT_TAGS):
+    """与BeautifulSoup的get_text一致：跳过script/style等元素内部的文本，保留其后的文本"""
+    if node.text:
+        yield node.text
+    for child in node:
+        if isinstance(child.tag, str) and child.tag not in skipped:
+            yield from _iter_visible_text(child, skipped)
+        if child.tail:
+            yield child.tail
+
+
+def content_text(node) -> str:
+    """元素在 remove_boilerplate() 之后的文本，用于在不修改树的情况下预判正文长度"""
+    return ''.join(_iter_visible_text(node, NON_TEXT_TAGS.union(REMOVED_TAGS)))
+
+
+class StreamingHTMLBuilder:
+    """
+    增量解析：逐块喂入HTML，边下载边建树
+
+    指定了正文容器的id时，容器闭合且 accept(容器) 为真后 feed() 返回True，
+    调用方即可停止下载；close() 返回已解析部分的树（未闭合的元素自动闭合）
+    """
+
+    # 检测编码前至少缓冲的字节数（页面声明的charset一般在开头）
+    ENCODING_PREFIX = 16 * 1024
+
+    def __init__(self, stop_id: Optional[str] = None, accept: Optional[Callable] = None):
+        self.stop_id = stop_id
+        self.accept = accept
+        self.done = False
+        self._container = None
+        self._parser = None
+        self._prefix = b''
+
+    def feed(self, chunk: bytes) -> bool:
+        """喂入一块数据，返回是否可以停止下载"""
+        if self.done:
+            return True
+
+        if self._parser is None:
+            self._prefix += chunk
+            if len(self._prefix) < self.ENCODING_PREFIX:
+                return False
+            chunk, self._prefix = self._prefix, b''
+            self._start(chunk, partial=True)
+
+        self._parser.feed(chunk)
+        return self._check_events()
+
+    def close(self):
+        """结束解析并返回树的根元素"""
+        if self._parser is None:
+            if not self._prefix.strip():
+                return lxml.html.Element('html')
+            self._start(self._prefix, partial=False)
+            self._parser.feed(self._prefix)
+        try:
+            root = self._parser.close()
+        except etree.XMLSyntaxError:
+            root = None
+        return root if root is not None else lxml.html.Element('html')
+
+    def _start(self, prefix: bytes, partial: bool):
+        self._parser = etree.HTMLPullParser(events=('start', 'end'), encoding=detect_encoding(prefix, partial))
+        self._parser.set_element_class_lookup(lxml.html.HtmlElementClassLookup())
+
+    def _check_events(self) -> bool:
+        for event, element in self._parser.read_events():
+            if self.stop_id is None:
+                continue
+            if event == 'start':
+                if self._container is None and element.get('id') == self.stop_id:
+                    self._container = element
+            elif element is self._container:
+                if self.accept is None or self.accept(element):
+                    self.done = True
+                    return True
+                # 容器内容不满足要求（如正文过短），继续下载完整页面
+                self.stop_id = None
+        return False
+
+
+def create_document(soup: BeautifulSoup, index: SelectorIndex, engine: str = 'single_pass'):
+    """按引擎名称创建文档查询对象"""
+    if engine == 'cascade':
+        return CascadeSoupDocument(soup)
+    return SinglePassSoupDocument(soup, index)
+
+
+def parse_document(content: bytes, index: SelectorIndex, parser: str = None, engine: str = None):
+    """
+    解析页面并创建文档查询对象
+
+    Args:
+        content: 页面HTML
+        index: 预编译的选择器
+        parser: html.parser / lxml（BeautifulSoup + lxml） / lxml_native（不经过BeautifulSoup）
+        engine: single_pass / cascade，仅对BeautifulSoup后端有效
+    """
+    parser = parser or Config.PARSER_BACKEND
+    engine = engine or Config.EXTRACTION_ENGINE
+
+    if parser == 'lxml_native':
+        return LxmlDocument(parse_lxml(content), index)
+
+    soup = BeautifulSoup(content, 'lxml' if parser == 'lxml' else 'html.parser')
+    return create_document(soup, index, engine)
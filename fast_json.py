@@ -0,0 +1,84 @@
+"""
+⚡ JSON序列化
+接口响应、NDJSON流和multipart中的JSON统一由此编码：
+
+- 已安装 orjson 时使用 orjson（Config.JSON_ENCODER=auto），否则使用标准库
+- 不转义中文（UTF-8直接输出），不排序键；正文以中文为主时响应体积约为转义输出的一半
+- 带 to_json() 方法的对象（如 article_payload.ImageRef）在编码时才转换为字典，
+  其余类型（日期、dataclass等）与Flask默认的处理方式一致
+- orjson不支持的值（如超过64位的整数、孤立的代理字符）自动改用标准库编码
+"""
+
+import json
+import logging
+
+from flask.json.provider import DefaultJSONProvider
+
+from config import Config
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+if Config.JSON_ENCODER == 'orjson' and not ORJSON_AVAILABLE:
+    logger.warning("未安装orjson，使用标准库编码JSON（pip install orjson）")
+USE_ORJSON = ORJSON_AVAILABLE and Config.JSON_ENCODER != 'json'
+
+if ORJSON_AVAILABLE:
+    # 日期交给default处理，与Flask默认的HTTP日期格式一致
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+
+def default(obj):
+    """编码器不能直接处理的对象"""
+    to_json = getattr(obj, 'to_json', None)
+    if to_json is not None:
+        return to_json()
+    return DefaultJSONProvider.default(obj)
+
+
+def dumps(obj, newline: bool = False) -> bytes:
+    """
+    编码为紧凑的UTF-8 JSON
+
+    Args:
+        newline: 末尾加换行符（HTTP响应、NDJSON的一行），由编码器直接写入，不再复制一次结果
+    """
+    if USE_ORJSON:
+        try:
+            return orjson.dumps(obj, default=default,
+                                option=_ORJSON_OPTIONS | orjson.OPT_APPEND_NEWLINE if newline else _ORJSON_OPTIONS)
+        except TypeError:
+            pass
+    text = json.dumps(obj, ensure_ascii=False, separators=(',', ':'), default=default)
+    try:
+        data = text.encode('utf-8')
+    except UnicodeEncodeError:
+        # 孤立的代理字符不能以UTF-8输出，整体转义为 \uXXXX
+        data = json.dumps(obj, separators=(',', ':'), default=default).encode('ascii')
+    return data + b'\n' if newline else data
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask的JSON提供者（jsonify 等），编码方式同 dumps()"""
+
+    default = staticmethod(default)
+    ensure_ascii = False
+    sort_keys = False
+
+    def dumps(self, obj, **kwargs) -> str:
+        if not kwargs:
+            return dumps(obj).decode('utf-8')
+        return super().dumps(obj, **kwargs)
+
+    def response(self, *args, **kwargs):
+        # 调试模式下按Flask默认方式缩进输出
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj, newline=True), mimetype=self.mimetype)
@@ -0,0 +1,413 @@
+"""
+🌐 异步HTTP客户端
+文章抓取和图片代理共用的上游请求层，基于 httpx.AsyncClient
+
+- 后台线程运行独立的事件循环，所有上游请求都在该循环中并发执行，
+  等待上游响应不再占用Flask工作线程以外的资源
+- 连接池：keep-alive复用连接，安装了h2时启用HTTP/2，按域名限制并发请求
+- 超时：连接、读取分别设置，另有覆盖排队+连接+读取的整体截止时间
+- 异步接口供协程直接调用，同步接口（run/get_sync/open_stream）供现有Flask路由使用
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Callable, Dict, Iterator, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from config import Config
+from metrics import StageTimings
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+
+class FetchError(Exception):
+    """上游请求失败"""
+
+
+class FetchTimeout(FetchError):
+    """上游请求超时（连接、读取或整体截止时间）"""
+
+
+class UpstreamStatusError(FetchError):
+    """上游返回4xx/5xx"""
+
+    def __init__(self, status_code: int, url: str):
+        super().__init__(f"上游返回 {status_code}: {url}")
+        self.status_code = status_code
+
+
+class ContentTooLarge(FetchError):
+    """响应体超过允许的大小"""
+
+
+class UpstreamStream:
+    """
+    流式上游响应，在同步代码中逐块读取
+
+    接口与 requests 的流式响应一致（status_code/headers/iter_content/close），
+    读取时把每一块的读取操作提交到客户端的事件循环执行
+    """
+
+    def __init__(self, client: 'AsyncHttpClient', response: httpx.Response, slot: '_HostSlot'):
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.url = str(response.url)
+        self._client = client
+        self._response = response
+        self._slot = slot
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def iter_content(self, chunk_size: int = Config.IMAGE_STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+        chunks = self._response.aiter_bytes(chunk_size)
+        while True:
+            chunk = self._client.run(_translate_errors(_next_chunk(chunks), self.url))
+            if chunk is None:
+                return
+            yield chunk
+
+    def close(self):
+        """关闭响应并归还域名并发槽位，可重复调用"""
+        if self._mark_closed():
+            try:
+                self._client.run(self._response.aclose())
+            except Exception as e:
+                logger.debug("关闭上游响应失败: %s, 错误: %s", self.url, e)
+            finally:
+                self._client.release_slot(self._slot)
+
+    async def aread_prefix(self, limit: int, on_chunk: Optional[Callable[[bytes], bool]] = None) -> bytes:
+        """
+        读取响应体开头最多limit字节，on_chunk(块)返回True时提前停止（只能在客户端的事件循环中await）
+        """
+        data = bytearray()
+        chunk_size = min(limit, Config.IMAGE_PROBE_CHUNK_SIZE)
+        async for chunk in self._response.aiter_bytes(chunk_size):
+            chunk = chunk[:limit - len(data)]
+            data += chunk
+            if (on_chunk is not None and on_chunk(chunk)) or len(data) >= limit:
+                break
+        return bytes(data)
+
+    async def aclose(self):
+        """close() 的异步版本（只能在客户端的事件循环中await）"""
+        if self._mark_closed():
+            try:
+                await self._response.aclose()
+            finally:
+                self._client.release_slot(self._slot)
+
+    def _mark_closed(self) -> bool:
+        """标记为已关闭，首次调用返回True"""
+        with self._lock:
+            if self._closed:
+                return False
+            self._closed = True
+            return True
+
+
+async def _next_chunk(chunks) -> Optional[bytes]:
+    """读取下一块，读完时返回None"""
+    try:
+        return await chunks.__anext__()
+    except StopAsyncIteration:
+        return None
+
+
+async def _translate_errors(awaitable, url: str):
+    """把httpx和截止时间的异常统一转换为FetchError"""
+    try:
+        return await awaitable
+    except (httpx.TimeoutException, asyncio.TimeoutError) as e:
+        raise FetchTimeout(f"请求超时: {url}") from e
+    except httpx.HTTPError as e:
+        raise FetchError(f"{type(e).__name__}: {str(e) or url}") from e
+
+
+class _HostSlot:
+    """一个域名的并发槽位，users为持有者与排队者之和（仅在事件循环线程中访问）"""
+
+    __slots__ = ('host', 'semaphore', 'users')
+
+    def __init__(self, host: str, limit: int):
+        self.host = host
+        self.semaphore = asyncio.Semaphore(limit)
+        self.users = 0
+
+
+class AsyncHttpClient:
+    """带连接池、按域名限流和整体截止时间的异步HTTP客户端"""
+
+    def __init__(self, per_host_limit: int = Config.HTTP_PER_HOST_CONNECTIONS,
+                 total_timeout: float = Config.HTTP_TOTAL_TIMEOUT):
+        self.per_host_limit = per_host_limit
+        self.total_timeout = total_timeout
+        self.http2 = Config.HTTP2_ENABLED and HTTP2_AVAILABLE
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        # 仅在事件循环线程中访问
+        self._host_slots: Dict[str, _HostSlot] = {}
+        self._stats = {
+            'requests': 0,
+            'errors': 0,
+            'timeouts': 0,
+            'in_flight': 0
+        }
+
+    # ---- 异步接口 ----
+
+    async def get(self, url: str, headers: Optional[Dict[str, str]] = None,
+                  timings: Optional[StageTimings] = None) -> httpx.Response:
+        """
+        请求url并读取完整响应体
+
+        可在任意事件循环中await；请求实际在客户端自己的事件循环中执行。
+        传入timings时记录排队、连接、等待响应头和下载响应体的耗时及下载字节数
+
+        Raises:
+            FetchTimeout: 超过连接/读取超时或整体截止时间
+            UpstreamStatusError: 上游返回4xx/5xx
+            FetchError: 其他网络错误
+        """
+        return await self._on_loop(self._open_stream(url, headers, read_body=True, timings=timings))
+
+    async def stream(self, url: str, headers: Optional[Dict[str, str]] = None) -> UpstreamStream:
+        """请求url，收到响应头后返回，响应体由调用方逐块读取（304视为正常响应）"""
+        return await self._on_loop(self._open_stream(url, headers))
+
+    async def get_prefix(self, url: str, headers: Optional[Dict[str, str]] = None, limit: int = 64 * 1024,
+                         on_chunk: Optional[Callable[[bytes], bool]] = None):
+        """
+        请求url并只读取响应体开头最多limit字节，on_chunk(块)返回True时提前断开
+
+        Returns:
+            (UpstreamStream, 已读取的数据)，响应已关闭，只可读取status_code/headers
+
+        Raises:
+            与 get() 相同
+        """
+        return await self._on_loop(self._read_prefix(url, headers, limit, on_chunk))
+
+    # ---- 同步接口 ----
+
+    def run(self, coro, timeout: Optional[float] = None):
+        """在客户端的事件循环中执行协程并等待结果，供同步代码调用"""
+        loop = self._ensure_loop()
+        if _running_loop() is loop:
+            coro.close()
+            raise RuntimeError("不能在HTTP客户端的事件循环线程中调用同步接口")
+
+        future = asyncio.run_coroutine_threadsafe(coro, loop)
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise FetchTimeout(f"等待结果超时 ({timeout}s)")
+
+    def get_sync(self, url: str, headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+        """get() 的同步版本"""
+        return self.run(self._open_stream(url, headers, read_body=True))
+
+    def open_stream(self, url: str, headers: Optional[Dict[str, str]] = None,
+                    timings: Optional[StageTimings] = None) -> UpstreamStream:
+        """stream() 的同步版本，传入timings时记录排队、连接和等待响应头的耗时"""
+        return self.run(self._open_stream(url, headers, timings=timings))
+
+    def release_slot(self, slot: _HostSlot):
+        """归还域名并发槽位（可从任意线程调用）"""
+        loop = self._ensure_loop()
+        if _running_loop() is loop:
+            self._release(slot)
+        else:
+            loop.call_soon_threadsafe(self._release, slot)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats['http2'] = self.http2
+        stats['hosts'] = len(self._host_slots)
+        return stats
+
+    # ---- 事件循环内部 ----
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name='http-client-loop', daemon=True)
+                thread.start()
+                self._loop = loop
+            return self._loop
+
+    async def _on_loop(self, coro):
+        loop = self._ensure_loop()
+        if _running_loop() is loop:
+            return await coro
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                http2=self.http2,
+                follow_redirects=True,
+                limits=httpx.Limits(
+                    max_connections=Config.HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=Config.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=Config.HTTP_KEEPALIVE_EXPIRY
+                ),
+                timeout=httpx.Timeout(
+                    connect=Config.HTTP_CONNECT_TIMEOUT,
+                    read=Config.HTTP_READ_TIMEOUT,
+                    write=Config.HTTP_READ_TIMEOUT,
+                    pool=self.total_timeout
+                )
+            )
+        return self._client
+
+    def _slot_for(self, url: str) -> _HostSlot:
+        """取得域名槽位并登记一个使用者，用完后必须调用 _leave()（或 _release()）"""
+        host = (urlsplit(url).hostname or '').lower()
+        slot = self._host_slots.get(host)
+        if slot is None:
+            slot = self._host_slots[host] = _HostSlot(host, self.per_host_limit)
+        slot.users += 1
+        return slot
+
+    def _leave(self, slot: _HostSlot):
+        """注销一个使用者；没有持有者和排队者时删除该域名的槽位，避免抓取过的域名越积越多"""
+        slot.users -= 1
+        if slot.users == 0 and self._host_slots.get(slot.host) is slot:
+            del self._host_slots[slot.host]
+
+    def _release(self, slot: _HostSlot):
+        slot.semaphore.release()
+        self._count('in_flight', -1)
+        self._leave(slot)
+
+    async def _open_stream(self, url: str, headers: Optional[Dict[str, str]],
+                           read_body: bool = False, timings: Optional[StageTimings] = None):
+        """
+        排队获取域名槽位并发送请求；read_body为True时读完响应体并返回httpx.Response，
+        否则返回UpstreamStream（槽位在其close时归还）
+
+        整体截止时间覆盖排队、连接、等待响应头以及（read_body时）读取响应体
+        """
+        self._count('requests')
+        slot = self._slot_for(url)
+        acquired = False
+        response = None
+
+        async def send():
+            nonlocal acquired, response
+            queued = time.perf_counter()
+            await slot.semaphore.acquire()
+            acquired = True
+            self._count('in_flight')
+            extensions = None
+            if timings is not None:
+                timings.add('queue', time.perf_counter() - queued)
+                extensions = {'trace': _tracer(timings)}
+            client = self._get_client()
+            request = client.build_request('GET', url, headers=headers, extensions=extensions)
+            response = await client.send(request, stream=True)
+            if read_body:
+                started = time.perf_counter()
+                await response.aread()
+                if timings is not None:
+                    timings.add('download', time.perf_counter() - started)
+                    timings.bytes += len(response.content)
+
+        try:
+            await _translate_errors(asyncio.wait_for(send(), self.total_timeout), url)
+            if response.status_code >= 400:
+                raise UpstreamStatusError(response.status_code, url)
+        except BaseException as e:
+            if isinstance(e, FetchError):
+                self._count('timeouts' if isinstance(e, FetchTimeout) else 'errors')
+            if response is not None:
+                await response.aclose()
+            if acquired:
+                self._release(slot)
+            else:
+                self._leave(slot)
+            raise
+
+        if read_body:
+            await response.aclose()
+            self._release(slot)
+            return response
+        return UpstreamStream(self, response, slot)
+
+    async def _read_prefix(self, url: str, headers: Optional[Dict[str, str]], limit: int,
+                           on_chunk: Optional[Callable[[bytes], bool]]):
+        stream = await self._open_stream(url, headers)
+        try:
+            data = await _translate_errors(
+                asyncio.wait_for(stream.aread_prefix(limit, on_chunk), self.total_timeout), url
+            )
+        finally:
+            await stream.aclose()
+        return stream, data
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._stats[name] += amount
+
+
+# httpcore追踪事件 -> 阶段（DNS解析包含在connect_tcp中）
+_TRACE_STAGES = {
+    'connect_tcp': 'connect',
+    'start_tls': 'connect',
+    'receive_response_headers': 'wait'
+}
+
+
+def _tracer(timings: StageTimings):
+    """httpcore的trace回调：把建立连接和等待响应头的耗时计入timings"""
+    started = {}
+
+    async def trace(event: str, info: Dict):
+        _, _, event = event.partition('.')  # 去掉 connection./http11./http2. 前缀
+        name, _, phase = event.rpartition('.')
+        stage = _TRACE_STAGES.get(name)
+        if stage is None:
+            return
+        if phase == 'started':
+            started[name] = time.perf_counter()
+        elif name in started:
+            timings.add(stage, time.perf_counter() - started.pop(name))
+
+    return trace
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+_default_client: Optional[AsyncHttpClient] = None
+_default_lock = threading.Lock()
+
+
+def get_http_client() -> AsyncHttpClient:
+    """进程内共享的HTTP客户端（文章抓取和图片代理共用同一个连接池）"""
+    global _default_client
+    with _default_lock:
+        if _default_client is None:
+            _default_client = AsyncHttpClient()
+        return _default_client
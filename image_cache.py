@@ -0,0 +1,574 @@
+"""
+🗄️ 图片缓存
+图片代理的两级本地缓存
+
+- 第一级：内存LRU，按字节预算淘汰
+- 第二级：内容寻址的磁盘存储（图片按内容SHA-256存放，索引按规范化URL存放）
+- 7天TTL，过期后使用ETag/Last-Modified条件请求重新验证
+- 单飞（single-flight）：同一URL的并发未命中只触发一次上游请求（可跨worker，见 single_flight）
+- 流式填充：边向客户端转发上游数据边写入磁盘，内存占用与图片大小无关
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+from config import Config
+from http_client import UpstreamStream, get_http_client
+from single_flight import Flight, SingleFlight
+from url_utils import normalize_url, url_key
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+# 清理磁盘缓存时不删除最近修改过的对象文件（可能刚写入，索引尚未写入或扫描索引时尚未写入）
+_PURGE_GRACE_SECONDS = 300
+
+
+def image_request_headers(image_url: str) -> Dict[str, str]:
+    """构造请求上游图片的请求头，模拟浏览器访问"""
+    headers = {
+        'User-Agent': Config.USER_AGENT,
+        'Accept': 'image/webp,image/apng,image/*,*/*;q=0.8',
+        'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
+    }
+
+    # 根据图片来源设置合适的Referer
+    if 'csdn.net' in image_url:
+        headers['Referer'] = 'https://blog.csdn.net/'
+    elif 'weixin.qq.com' in image_url:
+        headers['Referer'] = 'https://mp.weixin.qq.com/'
+    else:
+        headers['Referer'] = 'https://www.google.com/'
+
+    return headers
+
+
+class ImageTooLarge(Exception):
+    """图片超过 Config.MAX_IMAGE_SIZE"""
+
+
+def fetch_upstream_image(image_url: str, etag: str = '', last_modified: str = '',
+                         extra_headers: Optional[Dict[str, str]] = None) -> UpstreamStream:
+    """
+    以流式方式请求上游图片，可携带条件请求头
+
+    Args:
+        image_url: 图片链接
+        etag: 上次响应的ETag
+        last_modified: 上次响应的Last-Modified
+        extra_headers: 额外请求头（如客户端的Range）
+
+    Returns:
+        尚未读取响应体的上游响应（状态码为2xx或304），用完后需调用close()
+
+    Raises:
+        FetchError: 网络错误、超时或上游返回4xx/5xx
+    """
+    headers = image_request_headers(image_url)
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+    if extra_headers:
+        headers.update(extra_headers)
+
+    response = get_http_client().open_stream(image_url, headers=headers)
+
+    declared = response.headers.get('content-length')
+    if declared and declared.isdigit() and int(declared) > Config.MAX_IMAGE_SIZE:
+        response.close()
+        raise ImageTooLarge(f"图片大小 {declared} 字节超过限制")
+    return response
+
+
+def iter_limited(response: UpstreamStream, limit: int = Config.MAX_IMAGE_SIZE) -> Iterator[bytes]:
+    """逐块读取上游响应体，累计超过limit时抛出ImageTooLarge"""
+    received = 0
+    for chunk in response.iter_content(chunk_size=Config.IMAGE_STREAM_CHUNK_SIZE):
+        received += len(chunk)
+        if received > limit:
+            response.close()
+            raise ImageTooLarge(f"图片大小超过限制 {limit} 字节")
+        yield chunk
+
+
+class CachedImage:
+    """缓存中的一张图片"""
+
+    __slots__ = ('url', '_data', 'path', 'size', 'digest', 'content_type', 'etag',
+                 'last_modified', 'fetched_at')
+
+    def __init__(self, url: str, data: Optional[bytes] = None, content_type: str = 'image/jpeg',
+                 etag: str = '', last_modified: str = '', fetched_at: Optional[float] = None,
+                 digest: str = '', path: str = '', size: int = 0):
+        self.url = url
+        self._data = data
+        self.path = path
+        self.size = len(data) if data is not None else size
+        self.digest = digest or hashlib.sha256(data).hexdigest()
+        self.content_type = content_type
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at if fetched_at is not None else time.time()
+
+    @property
+    def loaded(self) -> bool:
+        """图片内容是否已在内存中"""
+        return self._data is not None
+
+    @property
+    def data(self) -> bytes:
+        """图片内容；仅有磁盘副本时按需读取"""
+        if self._data is None:
+            with open(self.path, 'rb') as f:
+                self._data = f.read()
+        return self._data
+
+    @property
+    def strong_etag(self) -> str:
+        """对外的ETag：优先使用上游ETag，否则使用内容哈希"""
+        return self.etag or f'"{self.digest}"'
+
+    def is_fresh(self, ttl: float) -> bool:
+        """是否仍在TTL内"""
+        return time.time() - self.fetched_at < ttl
+
+    def to_meta(self) -> Dict:
+        """磁盘索引中保存的元数据（不含图片内容）"""
+        return {
+            'url': self.url,
+            'digest': self.digest,
+            'size': self.size,
+            'content_type': self.content_type,
+            'etag': self.etag,
+            'last_modified': self.last_modified,
+            'fetched_at': self.fetched_at
+        }
+
+
+class ImageWriter:
+    """
+    流式写入缓存：边转发边写入临时文件，完成后按内容哈希提交
+
+    持有该URL的单飞槽位，期间同一URL的get()调用会等待提交结果
+    """
+
+    def __init__(self, cache: 'ImageCache', key: str, url: str, flight: Flight):
+        self._cache = cache
+        self._key = key
+        self._flight = flight
+        self._hasher = hashlib.sha256()
+        self._file = None
+        self._size = 0
+        self._done = False
+        self._failed = False
+        self.url = url
+        self.content_type = 'image/jpeg'
+        self.etag = ''
+        self.last_modified = ''
+
+    def set_headers(self, headers):
+        """记录上游响应头"""
+        self.content_type = headers.get('content-type', 'image/jpeg')
+        self.etag = headers.get('etag', '')
+        self.last_modified = headers.get('last-modified', '')
+
+    def write(self, chunk: bytes):
+        """写入一块数据；磁盘出错时放弃缓存但不影响转发"""
+        if self._failed:
+            return
+        try:
+            if self._file is None:
+                tmp_dir = os.path.join(self._cache.cache_dir, 'tmp')
+                os.makedirs(tmp_dir, exist_ok=True)
+                self._file = tempfile.NamedTemporaryFile(dir=tmp_dir, delete=False)
+            self._file.write(chunk)
+        except OSError as e:
+            logger.warning("写入图片流式缓存失败: %s, 错误: %s", self.url, e)
+            self._failed = True
+            self._discard()
+            return
+        self._hasher.update(chunk)
+        self._size += len(chunk)
+
+    def commit(self) -> Optional[CachedImage]:
+        """写入完成，按内容哈希移入对象目录并更新索引"""
+        if self._done:
+            return None
+        if self._failed:
+            self.abort()
+            return None
+        self._done = True
+
+        entry = None
+        try:
+            digest = self._hasher.hexdigest()
+            object_path = self._cache._object_path(digest)
+            if self._file is not None:
+                self._file.close()
+                os.makedirs(os.path.dirname(object_path), exist_ok=True)
+                os.replace(self._file.name, object_path)
+            else:
+                self._cache._atomic_write(object_path, b'')
+
+            entry = CachedImage(
+                url=normalize_url(self.url),
+                path=object_path,
+                size=self._size,
+                digest=digest,
+                content_type=self.content_type,
+                etag=self.etag,
+                last_modified=self.last_modified
+            )
+            self._cache._store(self._key, entry, write_object=False)
+            self._cache._count('misses')
+            self._flight.result = (entry, 'miss')
+        except OSError as e:
+            logger.warning("提交图片流式缓存失败: %s, 错误: %s", self.url, e)
+            self._discard()
+        finally:
+            self._cache._flights.finish(self._key, self._flight)
+        return entry
+
+    def revalidated(self, stale: CachedImage) -> CachedImage:
+        """上游返回304：刷新过期副本的时间戳"""
+        self._done = True
+        try:
+            stale.fetched_at = time.time()
+            self._cache._store(self._key, stale, write_object=False)
+            self._cache._count('revalidated')
+            self._flight.result = (stale, 'revalidated')
+        finally:
+            self._cache._flights.finish(self._key, self._flight)
+        return stale
+
+    def abort(self):
+        """放弃写入（客户端断开、超过大小限制等），等待者将自行重试"""
+        if self._done:
+            return
+        self._done = True
+        self._discard()
+        self._cache._flights.finish(self._key, self._flight)
+
+    def _discard(self):
+        if self._file is not None:
+            try:
+                self._file.close()
+                os.remove(self._file.name)
+            except OSError:
+                pass
+
+
+class ImageCache:
+    """图片两级缓存：内存LRU + 内容寻址磁盘存储"""
+
+    def __init__(self, cache_dir: str = Config.IMAGE_CACHE_DIR,
+                 memory_bytes: int = Config.IMAGE_CACHE_MEMORY_BYTES,
+                 ttl: int = Config.IMAGE_CACHE_MAX_AGE):
+        self.cache_dir = cache_dir
+        self.memory_bytes = memory_bytes
+        self.ttl = ttl
+
+        self._lock = threading.Lock()
+        self._memory: 'OrderedDict[str, CachedImage]' = OrderedDict()
+        self._memory_used = 0
+        self._flights = SingleFlight('images')
+        self._last_cleanup = time.time()
+        self._stats = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'revalidated': 0,
+            'variant_hits': 0,
+            'variants': 0,
+            'evictions': 0,
+            'disk_evictions': 0
+        }
+
+        try:
+            os.makedirs(os.path.join(cache_dir, 'index'), exist_ok=True)
+            os.makedirs(os.path.join(cache_dir, 'objects'), exist_ok=True)
+        except OSError as e:
+            logger.warning("图片缓存目录不可用，仅使用内存缓存: %s, 错误: %s", cache_dir, e)
+
+    def get(self, url: str) -> Tuple[CachedImage, str]:
+        """
+        获取图片，未命中或过期时请求上游
+
+        Args:
+            url: 图片链接
+
+        Returns:
+            (图片, 命中情况)，命中情况为 memory / disk / revalidated / miss
+        """
+        entry, status = self.lookup(url)
+        if status in ('memory', 'disk'):
+            return entry, status
+
+        key = url_key(url)
+        result, _ = self._flights.do(key, lambda: self._refresh(key, url, entry), lambda: self._fresh_on_disk(key))
+        return result
+
+    def lookup(self, url: str) -> Tuple[Optional[CachedImage], str]:
+        """
+        只查缓存，不请求上游
+
+        Returns:
+            (图片, 命中情况)：新鲜命中为 memory / disk；
+            否则为 (过期副本, 'stale') 或 (None, 'miss')
+        """
+        key = url_key(url)
+
+        entry = self._memory_get(key)
+        if entry and entry.is_fresh(self.ttl):
+            self._count('memory_hits')
+            return entry, 'memory'
+
+        if entry is None:
+            entry = self._disk_get(key)
+            if entry and entry.is_fresh(self.ttl):
+                self._count('disk_hits')
+                return entry, 'disk'
+
+        return entry, 'stale' if entry else 'miss'
+
+    def get_variant(self, url: str, variant: str,
+                    render: Callable[[bytes], Optional[Tuple[bytes, str]]]) -> Tuple[CachedImage, str]:
+        """
+        获取图片的缩放/转码变体，每个变体按 (URL, variant) 单独缓存
+
+        未命中时取得原图（经由 get()，可能请求上游）并调用render(原图数据)生成变体；
+        render返回None（无需转换）时该变体直接引用原图的内容对象
+
+        Args:
+            url: 图片链接
+            variant: 变体标识（如 w1024-q0-webp）
+            render: 生成变体，返回 (图片数据, Content-Type) 或None
+
+        Returns:
+            (图片, 命中情况)，命中情况为 memory / disk / miss
+        """
+        key = f"{url_key(url)}-{variant}"
+
+        entry = self._memory_get(key) or self._disk_get(key)
+        if entry and entry.is_fresh(self.ttl):
+            self._count('variant_hits')
+            return entry, 'memory' if entry.loaded else 'disk'
+
+        def produce():
+            original, _ = self.get(url)
+            rendered = render(original.data)
+            if rendered is None:
+                self._store(key, original, write_object=False)
+                return original, 'miss'
+            data, content_type = rendered
+            variant_entry = CachedImage(url=normalize_url(url), data=data, content_type=content_type,
+                                        last_modified=original.last_modified)
+            self._store(key, variant_entry)
+            self._count('variants')
+            return variant_entry, 'miss'
+
+        result, _ = self._flights.do(key, produce, lambda: self._fresh_on_disk(key))
+        return result
+
+    def open_writer(self, url: str) -> Optional[ImageWriter]:
+        """
+        为流式填充占用该URL的单飞槽位
+
+        Returns:
+            ImageWriter；若已有其他请求（或其他worker）正在填充则返回None
+        """
+        key = url_key(url)
+        flight = self._flights.try_acquire(key)
+        if flight is None:
+            return None
+        filled = self._disk_get(key)
+        if filled is not None and filled.is_fresh(self.ttl):
+            # 查缓存之后、占用槽位之前，其他请求刚好完成了填充
+            self._flights.finish(key, flight)
+            return None
+        return ImageWriter(self, key, url, flight)
+
+    def stats(self) -> Dict:
+        """缓存命中、未命中、淘汰等计数"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['memory_items'] = len(self._memory)
+            stats['memory_bytes'] = self._memory_used
+            stats['memory_budget'] = self.memory_bytes
+        stats.update(self._flights.stats())
+        stats['hits'] = stats['memory_hits'] + stats['disk_hits'] + stats['revalidated']
+        return stats
+
+    def purge_expired(self) -> int:
+        """
+        清理磁盘中过期的索引和不再被引用的图片文件
+
+        过期条目会再保留一个TTL周期，以便使用条件请求重新验证。
+        对象写入（或被重新引用）后才写索引，扫描索引之后写入的条目不在引用集合中；
+        因此不删除开始扫描前 _PURGE_GRACE_SECONDS 内修改过的对象
+
+        Returns:
+            清理的索引条目数量
+        """
+        index_dir = os.path.join(self.cache_dir, 'index')
+        objects_dir = os.path.join(self.cache_dir, 'objects')
+        now = time.time()
+        removed = 0
+        referenced = set()
+        recent = now - _PURGE_GRACE_SECONDS
+
+        for root, _, files in os.walk(index_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        meta = json.load(f)
+                    if now - meta['fetched_at'] >= self.ttl * 2:
+                        os.remove(path)
+                        removed += 1
+                    else:
+                        referenced.add(meta['digest'])
+                except (OSError, ValueError, KeyError):
+                    continue
+
+        for root, _, files in os.walk(objects_dir):
+            for name in files:
+                if name not in referenced:
+                    path = os.path.join(root, name)
+                    try:
+                        if os.stat(path).st_mtime < recent:
+                            os.remove(path)
+                    except OSError:
+                        pass
+
+        if removed:
+            self._count('disk_evictions', removed)
+            logger.info("清理过期图片缓存: %d 条", removed)
+        return removed
+
+    def _refresh(self, key: str, url: str, stale: Optional[CachedImage]) -> Tuple[CachedImage, str]:
+        """请求上游；已有过期副本时发送条件请求"""
+        etag = stale.etag if stale else ''
+        last_modified = stale.last_modified if stale else ''
+        response = fetch_upstream_image(url, etag, last_modified)
+
+        if response.status_code == 304 and stale is not None:
+            response.close()
+            stale.fetched_at = time.time()
+            self._store(key, stale, write_object=False)
+            self._count('revalidated')
+            return stale, 'revalidated'
+
+        try:
+            data = b''.join(iter_limited(response))
+        finally:
+            response.close()
+
+        entry = CachedImage(
+            url=normalize_url(url),
+            data=data,
+            content_type=response.headers.get('content-type', 'image/jpeg'),
+            etag=response.headers.get('etag', ''),
+            last_modified=response.headers.get('last-modified', '')
+        )
+        self._store(key, entry)
+        self._count('misses')
+        return entry, 'miss'
+
+    def _fresh_on_disk(self, key: str) -> Optional[Tuple[CachedImage, str]]:
+        """其他worker完成下载后，从共享的磁盘缓存读取结果"""
+        entry = self._disk_get(key)
+        if entry is None or not entry.is_fresh(self.ttl):
+            return None
+        self._count('disk_hits')
+        return entry, 'disk'
+
+    def _store(self, key: str, entry: CachedImage, write_object: bool = True):
+        """写入内存和磁盘"""
+        self._memory_put(key, entry)
+        try:
+            object_path = self._object_path(entry.digest)
+            if write_object and not os.path.exists(object_path):
+                self._atomic_write(object_path, entry.data)
+            else:
+                # 写索引前刷新对象的修改时间，清理中新被引用的对象不会被当作未引用删除（见 purge_expired）
+                os.utime(object_path)
+            index_path = self._index_path(key)
+            self._atomic_write(index_path, json.dumps(entry.to_meta()).encode('utf-8'))
+        except OSError as e:
+            logger.warning("写入图片磁盘缓存失败: %s, 错误: %s", entry.url, e)
+
+        if time.time() - self._last_cleanup > Config.IMAGE_CACHE_CLEANUP_INTERVAL:
+            self._last_cleanup = time.time()
+            threading.Thread(target=self.purge_expired, daemon=True).start()
+
+    def _memory_get(self, key: str) -> Optional[CachedImage]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+            return entry
+
+    def _memory_put(self, key: str, entry: CachedImage):
+        # 未加载到内存或超过整个预算的图片只保存在磁盘
+        if not entry.loaded or entry.size > self.memory_bytes:
+            return
+
+        with self._lock:
+            old = self._memory.pop(key, None)
+            if old is not None:
+                self._memory_used -= old.size
+            self._memory[key] = entry
+            self._memory_used += entry.size
+
+            while self._memory_used > self.memory_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_used -= evicted.size
+                self._stats['evictions'] += 1
+
+    def _disk_get(self, key: str) -> Optional[CachedImage]:
+        try:
+            with open(self._index_path(key), 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            object_path = self._object_path(meta['digest'])
+            if not os.path.exists(object_path):
+                return None
+        except (OSError, ValueError, KeyError):
+            return None
+
+        return CachedImage(
+            url=meta['url'],
+            path=object_path,
+            size=meta.get('size', 0),
+            digest=meta['digest'],
+            content_type=meta.get('content_type', 'image/jpeg'),
+            etag=meta.get('etag', ''),
+            last_modified=meta.get('last_modified', ''),
+            fetched_at=meta['fetched_at']
+        )
+
+    def _index_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, 'index', key[:2], f"{key}.json")
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, 'objects', digest[:2], digest)
+
+    @staticmethod
+    def _atomic_write(path: str, data: bytes):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._stats[name] += amount
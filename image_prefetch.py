@@ -0,0 +1,163 @@
+"""
+🚚 图片预取
+/extract 返回后在后台预先下载文章图片写入图片缓存，客户端随后请求 proxy_url 时直接命中本地缓存
+
+- 固定数量的后台线程，按域名限制并发；某个域名已达上限时先处理其他域名的图片
+- 有界队列：队列已满时丢弃新任务，单篇文章最多预取前N张，大量图片的文章不会挤占其他请求
+- 记录每个预取URL的状态，图片代理收到请求时统计命中（预取已完成）或迟到（仍在排队/下载）
+"""
+
+import logging
+import threading
+from collections import OrderedDict, deque
+from typing import Callable, Dict, Iterable
+from urllib.parse import urlparse
+
+from config import Config
+from metrics import PREFETCH_RESULTS
+from url_utils import url_key
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+
+class ImagePrefetcher:
+    """后台图片预取调度器"""
+
+    def __init__(self, fetch: Callable[[str], object],
+                 workers: int = Config.IMAGE_PREFETCH_WORKERS,
+                 per_host: int = Config.IMAGE_PREFETCH_PER_HOST,
+                 queue_size: int = Config.IMAGE_PREFETCH_QUEUE_SIZE):
+        """
+        Args:
+            fetch: 下载并写入缓存的函数，返回 (图片, 命中情况)，与 ImageCache.get 一致
+        """
+        self.fetch = fetch
+        self.workers = workers
+        self.per_host = per_host
+        self.queue_size = queue_size
+        self._cond = threading.Condition()
+        self._queue = deque()  # (键, URL, 域名)
+        self._in_flight_per_host: Dict[str, int] = {}
+        # 键 -> queued / running / done / failed，代理请求时取出
+        self._states: 'OrderedDict[str, str]' = OrderedDict()
+        self._threads = []
+        self._stats = {
+            'scheduled': 0,
+            'dropped': 0,
+            'fetched': 0,
+            'cached': 0,
+            'failed': 0,
+            'hit': 0,
+            'late': 0
+        }
+
+    def schedule(self, urls: Iterable[str], limit: int = Config.IMAGE_PREFETCH_MAX_PER_ARTICLE) -> int:
+        """
+        把一篇文章的图片加入预取队列（不阻塞）
+
+        只取前limit张；已在队列中的URL跳过；队列已满时丢弃其余图片
+
+        Returns:
+            实际加入队列的数量
+        """
+        self._ensure_workers()
+        added = dropped = 0
+        with self._cond:
+            for url in list(urls)[:limit]:
+                key = url_key(url)
+                if self._states.get(key) in ('queued', 'running'):
+                    continue
+                if len(self._queue) >= self.queue_size:
+                    dropped += 1
+                    continue
+                self._queue.append((key, url, urlparse(url).netloc.lower()))
+                self._set_state(key, 'queued')
+                added += 1
+            self._stats['scheduled'] += added
+            self._stats['dropped'] += dropped
+            if added:
+                self._cond.notify(added)
+
+        PREFETCH_RESULTS.inc('scheduled', amount=added)
+        if dropped:
+            PREFETCH_RESULTS.inc('dropped', amount=dropped)
+            logger.info("图片预取队列已满，丢弃 %d 张", dropped)
+        return added
+
+    def observe_request(self, url: str):
+        """图片代理收到请求时调用：统计该URL的预取是否已及时完成"""
+        key = url_key(url)
+        with self._cond:
+            state = self._states.get(key)
+            if state == 'done':
+                result = 'hit'
+                del self._states[key]
+            elif state in ('queued', 'running'):
+                # 保留状态：下载完成后仍写入缓存，也避免重复调度
+                result = 'late'
+            else:
+                # 未预取或预取失败
+                return
+            self._stats[result] += 1
+        PREFETCH_RESULTS.inc(result)
+
+    def stats(self) -> Dict:
+        with self._cond:
+            stats = dict(self._stats)
+            stats['queued'] = len(self._queue)
+            stats['running'] = sum(self._in_flight_per_host.values())
+        requested = stats['hit'] + stats['late']
+        stats['hit_rate'] = round(stats['hit'] / requested, 3) if requested else 0.0
+        return stats
+
+    def _ensure_workers(self):
+        with self._cond:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f'image-prefetch-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _next_task(self):
+        """取出第一个所在域名未达并发上限的任务；没有时等待（调用时持有锁）"""
+        while True:
+            for task in self._queue:
+                host = task[2]
+                if self._in_flight_per_host.get(host, 0) < self.per_host:
+                    self._queue.remove(task)
+                    self._in_flight_per_host[host] = self._in_flight_per_host.get(host, 0) + 1
+                    return task
+            self._cond.wait()
+
+    def _work(self):
+        while True:
+            with self._cond:
+                key, url, host = self._next_task()
+                self._set_state(key, 'running')
+
+            state = 'failed'
+            try:
+                _, cache_status = self.fetch(url)
+                result = 'cached' if cache_status in ('memory', 'disk') else 'fetched'
+                state = 'done'
+            except Exception as e:
+                result = 'failed'
+                logger.debug("图片预取失败: %s, 错误: %s", url, e)
+
+            with self._cond:
+                self._in_flight_per_host[host] -= 1
+                if not self._in_flight_per_host[host]:
+                    del self._in_flight_per_host[host]
+                self._set_state(key, state)
+                self._stats[result] += 1
+                self._cond.notify_all()
+            PREFETCH_RESULTS.inc(result)
+
+    def _set_state(self, key: str, state: str):
+        """记录预取状态，超过上限时淘汰最早的记录（调用时持有锁）"""
+        self._states[key] = state
+        self._states.move_to_end(key)
+        while len(self._states) > Config.IMAGE_PREFETCH_TRACK_SIZE:
+            self._states.popitem(last=False)
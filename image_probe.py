@@ -0,0 +1,221 @@
+"""
+📐 图片探测
+提取文章时只下载每张候选图片的开头几KB，读取真实尺寸、格式和文件大小，
+过滤掉HTML中没有标注尺寸的小图标、1×1跟踪像素等装饰性图片
+
+- Range请求只取文件头，Pillow解析出尺寸后立即断开连接
+- 同一篇文章的候选图片并发探测，整体有截止时间；探测失败或超时的图片保留
+- 探测结果按规范化URL缓存（内存LRU + TTL），失败结果短时间缓存
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from PIL import ImageFile
+
+from config import Config
+from http_client import AsyncHttpClient, get_http_client
+from image_cache import image_request_headers
+from url_utils import normalize_url
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+
+class ImageInfo:
+    """探测得到的图片信息"""
+
+    __slots__ = ('width', 'height', 'format', 'bytes')
+
+    def __init__(self, width: int, height: int, format: str, bytes: Optional[int] = None):
+        self.width = width
+        self.height = height
+        self.format = format
+        self.bytes = bytes
+
+    def to_dict(self) -> Dict:
+        return {'width': self.width, 'height': self.height, 'format': self.format, 'bytes': self.bytes}
+
+
+class _HeaderParser:
+    """增量解析图片文件头，解析出尺寸后停止读取"""
+
+    def __init__(self):
+        self._parser = ImageFile.Parser()
+        self.size: Optional[Tuple[int, int]] = None
+        self.format = ''
+        self.failed = False
+
+    def feed(self, chunk: bytes) -> bool:
+        """喂入一块数据，已得出结果（成功或无法识别）时返回True"""
+        try:
+            self._parser.feed(chunk)
+        except Exception:
+            # 无法识别的格式、像素数超过Pillow的解压炸弹限制等
+            self.failed = True
+            return True
+        image = self._parser.image
+        if image is not None:
+            self.size = image.size
+            self.format = (image.format or '').lower()
+            return True
+        return False
+
+
+def _total_size(headers, status_code: int) -> Optional[int]:
+    """从Content-Range（206）或Content-Length（200）取得文件总大小"""
+    content_range = headers.get('content-range', '')
+    if '/' in content_range:
+        total = content_range.rsplit('/', 1)[1].strip()
+        return int(total) if total.isdigit() else None
+    declared = headers.get('content-length', '')
+    if status_code == 200 and declared.isdigit() and 'content-encoding' not in headers:
+        return int(declared)
+    return None
+
+
+class ImageProber:
+    """带结果缓存的图片探测器"""
+
+    def __init__(self, client: Optional[AsyncHttpClient] = None,
+                 max_entries: int = Config.IMAGE_PROBE_CACHE_SIZE,
+                 ttl: float = Config.IMAGE_PROBE_CACHE_TTL):
+        self.client = client or get_http_client()
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # 规范化URL -> (过期时间, 图片信息；探测失败时为None)
+        self._cache: 'OrderedDict[str, Tuple[float, Optional[ImageInfo]]]' = OrderedDict()
+        self._stats = {
+            'probes': 0,
+            'cache_hits': 0,
+            'failures': 0,
+            'timeouts': 0,
+            'filtered': 0
+        }
+
+    async def filter_images(self, images: List[Dict],
+                            min_dimension: int = Config.IMAGE_PROBE_MIN_DIMENSION) -> List[Dict]:
+        """
+        探测图片并过滤宽或高小于min_dimension的图片
+
+        探测成功的图片加上 'probe' 字段（width/height/format/bytes）；
+        探测失败或超时的图片原样保留
+
+        Args:
+            images: _extract_images 返回的图片列表
+
+        Returns:
+            过滤后的图片列表（保持原顺序）
+        """
+        results = await self.probe_many(img['absolute_url'] for img in images)
+
+        kept = []
+        for img in images:
+            info = results.get(img['absolute_url'])
+            if info is not None:
+                if info.width < min_dimension or info.height < min_dimension:
+                    self._count('filtered')
+                    continue
+                img = dict(img, probe=info.to_dict())
+            kept.append(img)
+
+        if len(kept) < len(images):
+            logger.info("图片探测过滤 %d 张小图", len(images) - len(kept))
+        return kept
+
+    async def probe_many(self, urls: Iterable[str],
+                         timeout: float = Config.IMAGE_PROBE_TIMEOUT) -> Dict[str, Optional[ImageInfo]]:
+        """
+        并发探测多张图片，整体超过timeout时未完成的探测视为失败（不缓存）
+
+        Returns:
+            URL -> 图片信息（失败为None）
+        """
+        results: Dict[str, Optional[ImageInfo]] = {}
+        pending = {}
+        now = time.time()
+        for url in urls:
+            if url in results or url in pending:
+                continue
+            hit, info = self._cache_get(normalize_url(url), now)
+            if hit:
+                results[url] = info
+            else:
+                pending[url] = None
+
+        if not pending:
+            return results
+
+        semaphore = asyncio.Semaphore(Config.IMAGE_PROBE_CONCURRENCY)
+
+        async def bounded(url):
+            async with semaphore:
+                return await self.probe(url)
+
+        tasks = {asyncio.ensure_future(bounded(url)): url for url in pending}
+        done, not_done = await asyncio.wait(tasks, timeout=timeout)
+        for task in not_done:
+            task.cancel()
+            self._count('timeouts')
+            results[tasks[task]] = None
+        for task in done:
+            results[tasks[task]] = task.result()
+        return results
+
+    async def probe(self, url: str) -> Optional[ImageInfo]:
+        """探测单张图片（不查缓存，结果写入缓存），失败时返回None"""
+        self._count('probes')
+        header = _HeaderParser()
+        headers = image_request_headers(url)
+        headers['Range'] = f"bytes=0-{Config.IMAGE_PROBE_MAX_BYTES - 1}"
+        # 压缩后的数据无法按字节范围截取文件头
+        headers['Accept-Encoding'] = 'identity'
+
+        info = None
+        try:
+            response, _ = await self.client.get_prefix(
+                url, headers, limit=Config.IMAGE_PROBE_MAX_BYTES, on_chunk=header.feed
+            )
+            if header.size:
+                width, height = header.size
+                info = ImageInfo(width, height, header.format, _total_size(response.headers, response.status_code))
+        except Exception as e:
+            # 探测失败不影响文章提取
+            logger.debug("图片探测失败: %s, 错误: %s", url, e)
+
+        if info is None:
+            self._count('failures')
+        self._cache_put(normalize_url(url), info)
+        return info
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._cache)
+        return stats
+
+    def _cache_get(self, key: str, now: float) -> Tuple[bool, Optional[ImageInfo]]:
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None or entry[0] <= now:
+                return False, None
+            self._cache.move_to_end(key)
+            self._stats['cache_hits'] += 1
+            return True, entry[1]
+
+    def _cache_put(self, key: str, info: Optional[ImageInfo]):
+        ttl = self.ttl if info is not None else Config.IMAGE_PROBE_FAILURE_TTL
+        with self._lock:
+            self._cache[key] = (time.time() + ttl, info)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._stats[name] += amount
@@ -0,0 +1,244 @@
+"""
+🪄 图片变体
+图片代理按查询参数缩放、转码：/image/<encoded_url>?w=1024&q=80&fmt=webp
+
+- w：最大宽度（像素，等比缩放，不放大）；q：编码质量；fmt：输出格式 jpeg / webp / png
+- 设置 Config.IMAGE_VARIANT_WORKERS 后缩放和编码在有界进程池中执行，不占用请求线程的CPU和GIL；排队已满时返回原图
+- 每个变体单独缓存（见 ImageCache.get_variant）
+"""
+
+import io
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Mapping, Optional, Tuple
+
+from PIL import Image, ImageOps, features
+
+from config import Config
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+# 输出格式 -> (Pillow格式名, Content-Type)
+FORMATS = {
+    'jpeg': ('JPEG', 'image/jpeg'),
+    'webp': ('WEBP', 'image/webp'),
+    'png': ('PNG', 'image/png'),
+}
+FORMAT_ALIASES = {'jpg': 'jpeg'}
+
+# 需要交换宽高的EXIF方向
+_TRANSPOSED_ORIENTATIONS = (5, 6, 7, 8)
+
+
+class InvalidVariant(ValueError):
+    """变体参数不合法"""
+
+
+class VariantUnavailable(Exception):
+    """变体暂时无法生成（进程池已满、超时或图片无法解码），调用方应返回原图"""
+
+
+class VariantSpec:
+    """一个图片变体：最大宽度、质量、输出格式（未指定的项为0或空）"""
+
+    __slots__ = ('width', 'quality', 'format')
+
+    def __init__(self, width: int = 0, quality: int = 0, format: str = ''):
+        self.width = width
+        self.quality = quality
+        self.format = format
+
+    @property
+    def key(self) -> str:
+        """缓存键中的变体部分"""
+        return f"w{self.width}-q{self.quality}-{self.format or 'auto'}"
+
+
+def parse_variant(args: Mapping[str, str]) -> Optional[VariantSpec]:
+    """
+    从查询参数解析变体
+
+    Returns:
+        VariantSpec；没有变体参数时返回None
+
+    Raises:
+        InvalidVariant: 参数不合法
+    """
+    width_arg, quality_arg, format_arg = args.get('w', ''), args.get('q', ''), args.get('fmt', '')
+    if not (width_arg or quality_arg or format_arg):
+        return None
+
+    width = _int_arg('w', width_arg, 16, Config.IMAGE_VARIANT_MAX_WIDTH)
+    quality = _int_arg('q', quality_arg, 1, 95)
+    fmt = FORMAT_ALIASES.get(format_arg.lower(), format_arg.lower())
+    if fmt and fmt not in FORMATS:
+        raise InvalidVariant(f"不支持的图片格式: {format_arg}（可选 {'/'.join(FORMATS)}）")
+    if fmt == 'webp' and not features.check('webp'):
+        raise InvalidVariant("当前环境的Pillow不支持WebP")
+    return VariantSpec(width, quality, fmt)
+
+
+def _int_arg(name: str, value: str, low: int, high: int) -> int:
+    if not value:
+        return 0
+    if not value.isdigit() or not low <= int(value) <= high:
+        raise InvalidVariant(f"参数 {name} 应为 {low}~{high} 的整数")
+    return int(value)
+
+
+def render_variant(data: bytes, width: int, quality: int, fmt: str) -> Optional[Tuple[bytes, str]]:
+    """
+    生成图片变体（在进程池中执行）
+
+    Returns:
+        (图片数据, Content-Type)；动图、或转换后不会更小时返回None（使用原图）
+    """
+    with Image.open(io.BytesIO(data)) as image:
+        if getattr(image, 'is_animated', False):
+            return None
+
+        source_format = (image.format or '').lower()
+        target = fmt or (source_format if source_format in FORMATS else 'jpeg')
+
+        # 按显示方向（EXIF旋转后）计算目标尺寸
+        transposed = image.getexif().get(0x0112, 1) in _TRANSPOSED_ORIENTATIONS
+        shown_width, shown_height = (image.height, image.width) if transposed else image.size
+        resize = bool(width) and shown_width > width
+        if not resize and target == source_format and not quality:
+            return None
+
+        if resize:
+            size = (width, max(1, round(shown_height * width / shown_width)))
+            if source_format == 'jpeg':
+                # JPEG按DCT系数缩小解码，大图缩放时省去大部分解码开销
+                image.draft('RGB', size[::-1] if transposed else size)
+        image = ImageOps.exif_transpose(image)
+        if resize and image.width > size[0]:
+            image = image.resize(size, Image.LANCZOS, reducing_gap=3.0)
+
+        image = _convert_mode(image, target)
+        output = io.BytesIO()
+        pillow_format, content_type = FORMATS[target]
+        if target == 'png':
+            image.save(output, pillow_format, optimize=False)
+        else:
+            image.save(output, pillow_format, quality=quality or Config.IMAGE_VARIANT_DEFAULT_QUALITY)
+
+    encoded = output.getvalue()
+    if not resize and target == source_format and len(encoded) >= len(data):
+        return None
+    return encoded, content_type
+
+
+def _convert_mode(image: Image.Image, target: str) -> Image.Image:
+    """转换为目标格式支持的色彩模式；JPEG不支持透明，透明部分填充白色"""
+    if target == 'jpeg':
+        if image.mode in ('RGB', 'L'):
+            return image
+        if image.mode in ('RGBA', 'LA', 'P', 'PA') or 'transparency' in image.info:
+            rgba = image.convert('RGBA')
+            background = Image.new('RGB', rgba.size, (255, 255, 255))
+            background.paste(rgba, mask=rgba.getchannel('A'))
+            return background
+        return image.convert('RGB')
+    if image.mode in ('RGB', 'RGBA', 'L', 'LA') or (target == 'png' and image.mode == 'P'):
+        return image
+    return image.convert('RGBA' if image.mode in ('P', 'PA') or 'transparency' in image.info else 'RGB')
+
+
+class VariantRenderer:
+    """
+    在有界进程池中生成图片变体
+
+    进程池用spawn方式启动，避免在已有后台线程（HTTP客户端事件循环）的进程中fork；
+    workers为0时在调用线程中直接处理（如不允许创建子进程的无服务器环境）
+    """
+
+    def __init__(self, workers: int = Config.IMAGE_VARIANT_WORKERS,
+                 max_pending: int = Config.IMAGE_VARIANT_MAX_PENDING):
+        self.workers = workers
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._stats = {
+            'rendered': 0,
+            'unchanged': 0,
+            'busy': 0,
+            'errors': 0
+        }
+
+    def render(self, data: bytes, spec: VariantSpec) -> Optional[Tuple[bytes, str]]:
+        """
+        生成变体
+
+        Returns:
+            (图片数据, Content-Type)；无需转换时返回None
+
+        Raises:
+            VariantUnavailable: 排队已满、超时或图片无法解码
+        """
+        if not self._slots.acquire(blocking=False):
+            self._count('busy')
+            raise VariantUnavailable("图片处理队列已满")
+        pool = future = None
+        try:
+            if self.workers > 0:
+                pool = self._get_pool()
+                future = pool.submit(render_variant, data, spec.width, spec.quality, spec.format)
+                # 槽位在任务结束时才释放：超时返回后任务可能仍在排队或执行，排队上限同时约束进程池中积压的任务
+                future.add_done_callback(self._release_slot)
+                result = future.result(timeout=Config.TIMEOUT)
+            else:
+                result = render_variant(data, spec.width, spec.quality, spec.format)
+        except FutureTimeoutError:
+            # 仍在排队的任务直接取消，已开始执行的任务完成后释放槽位
+            future.cancel()
+            self._count('errors')
+            raise VariantUnavailable("图片处理超时")
+        except BrokenProcessPool as e:
+            # 子进程异常退出（如内存不足被杀），关闭该进程池，下次调用时重建
+            self._count('errors')
+            self._discard(pool)
+            raise VariantUnavailable("图片处理进程异常退出") from e
+        except Exception as e:
+            self._count('errors')
+            raise VariantUnavailable(f"图片处理失败: {str(e)}") from e
+        finally:
+            if future is None:
+                self._slots.release()
+
+        self._count('rendered' if result is not None else 'unchanged')
+        return result
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats['workers'] = self.workers
+        return stats
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._pool
+
+    def _discard(self, pool: ProcessPoolExecutor):
+        with self._lock:
+            if self._pool is not pool:
+                return
+            self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _release_slot(self, future: Future):
+        self._slots.release()
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
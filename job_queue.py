@@ -0,0 +1,351 @@
+"""
+🗂️ 异步提取任务
+/extract?async=1 把链接写入本地持久化队列（SQLite）后立即返回任务id，
+由后台工作线程/进程抓取，客户端通过 GET /jobs/<id> 轮询状态和结果
+
+- 队列保存在 Config.JOB_QUEUE_PATH，Web服务或工作进程重启后未完成的任务继续执行
+- 领取任务时设置租约，工作进程中途退出时，租约到期的任务会被其他工作进程重新领取；
+  租约到期后才返回的旧执行者不会覆盖新执行者的结果
+- 抓取失败按指数退避重试，超过 Config.JOB_MAX_ATTEMPTS 次后标记为失败
+- 工作者可以是Web服务内的线程（Config.JOB_WORKERS），也可以单独启动多个进程，与Web服务分别扩容：
+  python job_queue.py --processes 4
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from typing import Callable, Dict, Optional
+
+from config import Config
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+JOB_STATUSES = ('queued', 'running', 'done', 'failed')
+
+
+class JobQueue:
+    """SQLite任务队列，可被同一台机器上的多个进程共享"""
+
+    def __init__(self, path: str = Config.JOB_QUEUE_PATH):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._lock = threading.Lock()
+        # 多个进程同时写入时等待锁，而不是立即报 database is locked
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._lock:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS jobs ('
+                ' id TEXT PRIMARY KEY,'
+                ' url TEXT NOT NULL,'
+                ' options TEXT NOT NULL,'
+                ' status TEXT NOT NULL,'
+                ' attempts INTEGER NOT NULL DEFAULT 0,'
+                ' run_at REAL NOT NULL,'
+                ' lease_until REAL,'
+                ' result TEXT,'
+                ' error TEXT,'
+                ' created_at REAL NOT NULL,'
+                ' updated_at REAL NOT NULL)'
+            )
+            self._conn.execute('CREATE INDEX IF NOT EXISTS jobs_status_run_at ON jobs (status, run_at)')
+            self._conn.commit()
+
+    def enqueue(self, url: str, options: Optional[Dict] = None) -> Dict:
+        """
+        新建任务
+
+        Args:
+            url: 文章链接
+            options: 读取结果时使用的选项（如 chunk_tokens）
+        """
+        now = time.time()
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute(
+                'INSERT INTO jobs (id, url, options, status, run_at, created_at, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (job_id, url, json.dumps(options or {}), 'queued', now, now, now)
+            )
+            self._conn.commit()
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """
+        查询任务
+
+        Returns:
+            {'id', 'url', 'options', 'status', 'attempts', 'result', 'error', 'created_at', 'updated_at'}，
+            result为抓取结果（文章信息字典），未完成时为None；任务不存在时返回None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT id, url, options, status, attempts, result, error, created_at, updated_at '
+                'FROM jobs WHERE id = ?', (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            'id': row[0],
+            'url': row[1],
+            'options': json.loads(row[2]),
+            'status': row[3],
+            'attempts': row[4],
+            'result': json.loads(row[5]) if row[5] else None,
+            'error': row[6] or '',
+            'created_at': row[7],
+            'updated_at': row[8]
+        }
+
+    def claim(self, lease: float = Config.JOB_LEASE_SECONDS) -> Optional[Dict]:
+        """
+        领取一个到期的任务：排队中且已到重试时间，或租约已过期的执行中任务
+
+        Returns:
+            {'id', 'url', 'attempts', 'lease_until'}（attempts已包含本次），没有可领取的任务时返回None；
+            lease_until作为本次领取的凭证，提交结果时原样传回
+        """
+        now = time.time()
+        with self._lock:
+            # 在写事务中查询并更新，多个进程不会领取到同一个任务
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = self._conn.execute(
+                    "SELECT id, url, attempts FROM jobs "
+                    "WHERE (status = 'queued' AND run_at <= ?) OR (status = 'running' AND lease_until < ?) "
+                    "ORDER BY run_at LIMIT 1", (now, now)
+                ).fetchone()
+                if row is not None:
+                    lease_until = now + lease
+                    self._conn.execute(
+                        "UPDATE jobs SET status = 'running', attempts = attempts + 1, lease_until = ?, "
+                        "updated_at = ? WHERE id = ?", (lease_until, now, row[0])
+                    )
+                self._conn.commit()
+            except sqlite3.Error:
+                self._conn.rollback()
+                raise
+        if row is None:
+            return None
+        return {'id': row[0], 'url': row[1], 'attempts': row[2] + 1, 'lease_until': lease_until}
+
+    def complete(self, job: Dict, result: Dict) -> bool:
+        """任务成功，保存抓取结果；job为 claim() 的返回值，租约已被他人接手时不做修改并返回False"""
+        return self._finish(job, "status = 'done', result = ?, error = NULL",
+                            (json.dumps(result, ensure_ascii=False),))
+
+    def retry(self, job: Dict, error: str, delay: float) -> bool:
+        """任务失败，delay秒后重新排队（租约检查同 complete()）"""
+        return self._finish(job, "status = 'queued', error = ?, run_at = ?", (error, time.time() + delay))
+
+    def fail(self, job: Dict, error: str) -> bool:
+        """任务最终失败（租约检查同 complete()）"""
+        return self._finish(job, "status = 'failed', error = ?", (error,))
+
+    def _finish(self, job: Dict, assignments: str, params: tuple) -> bool:
+        """结束本次领取：只有任务仍在执行且租约仍是本次领取时的租约才更新"""
+        with self._lock:
+            cursor = self._conn.execute(
+                f"UPDATE jobs SET {assignments}, lease_until = NULL, updated_at = ? "
+                "WHERE id = ? AND status = 'running' AND lease_until = ?",
+                params + (time.time(), job['id'], job['lease_until'])
+            )
+            self._conn.commit()
+        return cursor.rowcount == 1
+
+    def counts(self) -> Dict[str, int]:
+        """各状态的任务数"""
+        with self._lock:
+            rows = self._conn.execute('SELECT status, COUNT(*) FROM jobs GROUP BY status').fetchall()
+        counts = dict.fromkeys(JOB_STATUSES, 0)
+        counts.update(rows)
+        return counts
+
+    def purge(self, before: float) -> int:
+        """删除在before之前就已结束（完成或失败）的任务"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM jobs WHERE status IN ('done', 'failed') AND updated_at < ?", (before,)
+            )
+            self._conn.commit()
+        return cursor.rowcount
+
+
+def open_job_queue(path: str = Config.JOB_QUEUE_PATH) -> Optional[JobQueue]:
+    """打开任务队列，不可用时返回None（异步模式不可用，同步提取不受影响）"""
+    try:
+        return JobQueue(path)
+    except (OSError, sqlite3.Error) as e:
+        logger.warning("异步任务队列不可用: %s, 错误: %s", path, e)
+        return None
+
+
+class JobWorker:
+    """从任务队列领取任务并执行抓取的后台线程"""
+
+    def __init__(self, queue: JobQueue, fetch: Callable[[str], Dict], threads: int = Config.JOB_WORKERS):
+        """
+        Args:
+            queue: 任务队列
+            fetch: 抓取函数，返回文章信息字典（失败时含error字段），通常经由文章缓存
+            threads: 线程数
+        """
+        self.queue = queue
+        self.fetch = fetch
+        self.threads = threads
+        self._wakeup = threading.Event()
+        self._start_lock = threading.Lock()
+        self._threads = []
+        self._last_purge = 0.0
+        self._lock = threading.Lock()
+        self._stats = {
+            'completed': 0,
+            'retries': 0,
+            'failures': 0,
+            'stale': 0
+        }
+
+    def start(self):
+        """启动工作线程（重复调用无影响）"""
+        with self._start_lock:
+            if self._threads:
+                return
+            for index in range(self.threads):
+                thread = threading.Thread(target=self.run_forever, name=f'job-worker-{index}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def join(self):
+        """等待工作线程（线程不会自行退出，用于单独的工作进程保持运行）"""
+        for thread in self._threads:
+            thread.join()
+
+    def notify(self):
+        """有新任务入队，唤醒空闲的工作线程"""
+        self._wakeup.set()
+
+    def run_forever(self):
+        while True:
+            try:
+                worked = self.run_once()
+            except Exception as e:
+                logger.error("任务队列处理失败: %s", e)
+                worked = False
+            if not worked:
+                self._wakeup.wait(Config.JOB_POLL_INTERVAL)
+                self._wakeup.clear()
+
+    def run_once(self) -> bool:
+        """
+        领取并执行一个任务
+
+        Returns:
+            是否领取到了任务
+        """
+        self._purge_finished()
+        job = self.queue.claim()
+        if job is None:
+            return False
+
+        logger.info("开始执行异步任务: %s (%s, 第%d次)", job['id'], job['url'], job['attempts'])
+        try:
+            article = self.fetch(job['url'])
+            error = article.get('error', '')
+        except Exception as e:
+            article, error = None, str(e)
+
+        if not error:
+            if self._accepted(self.queue.complete(job, article), job):
+                self._count('completed')
+        elif job['attempts'] < Config.JOB_MAX_ATTEMPTS:
+            delay = Config.JOB_RETRY_BACKOFF * 2 ** (job['attempts'] - 1)
+            if self._accepted(self.queue.retry(job, error, delay), job):
+                self._count('retries')
+                logger.warning("异步任务失败，%.0f秒后重试: %s, 错误: %s", delay, job['id'], error)
+        elif self._accepted(self.queue.fail(job, error), job):
+            self._count('failures')
+            logger.error("异步任务最终失败: %s, 错误: %s", job['id'], error)
+        return True
+
+    def stats(self) -> Dict:
+        """本进程的执行计数和队列中各状态的任务数"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['threads'] = len(self._threads)
+        stats.update(self.queue.counts())
+        return stats
+
+    def _accepted(self, updated: bool, job: Dict) -> bool:
+        """记录结果未被采用的执行（执行超过租约，任务已被其他工作者重新领取）"""
+        if not updated:
+            self._count('stale')
+            logger.warning("异步任务租约已过期，丢弃本次结果: %s", job['id'])
+        return updated
+
+    def _purge_finished(self):
+        now = time.time()
+        if now - self._last_purge < Config.JOB_PURGE_INTERVAL:
+            return
+        self._last_purge = now
+        removed = self.queue.purge(now - Config.JOB_RETENTION_SECONDS)
+        if removed:
+            logger.info("清理已结束的异步任务: %d 个", removed)
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._stats[name] += amount
+
+
+def _worker_process(threads: int):
+    """单独的工作进程：创建自己的抓取器和文章缓存，持续处理队列"""
+    from article_cache import ArticleCache
+    from article_store import open_article_store
+    from near_duplicates import open_duplicate_index
+    from web_scraper import WebScraper
+
+    scraper = WebScraper()
+    scraper.parse_pool.start()
+    article_cache = ArticleCache(store=open_article_store(), duplicates=open_duplicate_index())
+    worker = JobWorker(JobQueue(), lambda url: article_cache.get_or_fetch(url, scraper.scrape_article)[0], threads)
+    logger.info("任务工作进程已启动: pid=%d, 线程数=%d", os.getpid(), threads)
+    worker.start()
+    worker.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='异步提取任务的工作进程')
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1, help='工作进程数')
+    parser.add_argument('--threads', type=int, default=4, help='每个进程的工作线程数')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    processes = [
+        multiprocessing.Process(target=_worker_process, args=(args.threads,), name=f'job-process-{index}')
+        for index in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+
+    # 收到SIGTERM（如容器停止）时与Ctrl+C一样结束全部工作进程；执行中的任务在租约到期后被重新领取
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,217 @@
+"""
+📈 运行指标
+提取各阶段耗时、下载字节数、图片数量和缓存命中情况的直方图/计数器，
+以Prometheus文本格式在 /metrics 导出
+
+- StageTimings 记录单次提取的分阶段耗时（排队、连接、等待响应、下载、解析、各字段提取）
+- 直方图按固定分桶累计，记录一次观测只需一次加锁和一次二分查找
+"""
+
+import math
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# 耗时分桶（秒）
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+# 下载大小分桶（字节）
+BYTES_BUCKETS = tuple(1024 * 2 ** i for i in range(0, 15, 2))  # 1KB ~ 16MB
+# 数量分桶
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """按标签累计的计数器"""
+
+    type_name = 'counter'
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        for label_values, value in values:
+            yield f"{self.name}{_format_labels(self.labels, label_values)} {_format_value(value)}"
+
+
+class Histogram:
+    """按标签分组的固定分桶直方图"""
+
+    type_name = 'histogram'
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = SECONDS_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # 标签值 -> [各分桶计数..., 总和, 观测次数]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *label_values: str):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            snapshot = sorted((key, list(series)) for key, series in self._series.items())
+        for label_values, series in snapshot:
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = _format_labels(self.labels, label_values, f'le="{_format_value(bound)}"')
+                yield f"{self.name}_bucket{le} {cumulative}"
+            le = _format_labels(self.labels, label_values, 'le="+Inf"')
+            yield f"{self.name}_bucket{le} {series[-1]}"
+            labels = _format_labels(self.labels, label_values)
+            yield f"{self.name}_sum{labels} {_format_value(series[-2])}"
+            yield f"{self.name}_count{labels} {series[-1]}"
+
+
+class MetricsRegistry:
+    """指标注册表，另可注册在导出时读取的采集函数（如各缓存的 stats()）"""
+
+    def __init__(self, prefix: str = 'article_analyzer'):
+        self.prefix = prefix
+        self._metrics: List = []
+        self._collectors: List[Tuple[str, str, Callable[[], Dict]]] = []
+
+    def counter(self, name: str, help_text: str, labels: Tuple[str, ...] = ()) -> Counter:
+        metric = Counter(f"{self.prefix}_{name}", help_text, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help_text: str, labels: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = SECONDS_BUCKETS) -> Histogram:
+        metric = Histogram(f"{self.prefix}_{name}", help_text, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, name: str, help_text: str, collect: Callable[[], Dict]):
+        """导出时调用collect()，其中的数值字段（布尔值为0/1）作为 <name>{key="..."} 的当前值导出"""
+        self._collectors.append((f"{self.prefix}_{name}", help_text, collect))
+
+    def render(self) -> str:
+        """Prometheus文本格式"""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(metric.samples())
+        for name, help_text, collect in self._collectors:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            for key, value in sorted(collect().items()):
+                # 布尔值（如 http2）导出为0/1；bool是int的子类，str(True)不是合法的样本值
+                if isinstance(value, bool):
+                    value = int(value)
+                if isinstance(value, (int, float)):
+                    lines.append(f'{name}{{key="{_escape(key)}"}} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+# 进程内共享的注册表和指标
+registry = MetricsRegistry()
+
+STAGE_SECONDS = registry.histogram(
+    'extract_stage_seconds', '文章提取各阶段耗时（秒）', ('platform', 'stage'))
+EXTRACT_SECONDS = registry.histogram(
+    'extract_seconds', '单次文章提取总耗时（秒）', ('platform', 'outcome'))
+DOWNLOAD_BYTES = registry.histogram(
+    'download_bytes', '每次提取下载的页面字节数', ('platform',), BYTES_BUCKETS)
+IMAGE_COUNT = registry.histogram(
+    'article_images', '每篇文章提取到的图片数量', ('platform',), COUNT_BUCKETS)
+FIELD_SOURCES = registry.counter(
+    'field_source_total', '文章各字段的提取来源（platform/json_ld/initial_state/opengraph/dom）', ('field', 'source'))
+CACHE_RESULTS = registry.counter(
+    'cache_results_total', '缓存查询结果（article/image 缓存，hit/miss等）', ('cache', 'status'))
+IMAGE_VARIANT_SECONDS = registry.histogram(
+    'image_variant_seconds', '图片变体生成耗时（秒，含进程池排队）', ('format',))
+PREFETCH_RESULTS = registry.counter(
+    'image_prefetch_total', '图片预取结果（scheduled/dropped/fetched/cached/failed，代理请求时的hit/late）', ('result',))
+REQUEST_SECONDS = registry.histogram(
+    'http_request_seconds', '接口处理耗时（秒，流式响应为响应头就绪的耗时）', ('endpoint', 'method', 'status'))
+
+
+class StageTimings:
+    """
+    单次提取的分阶段耗时
+
+    同一阶段可多次累加（如重定向时的多次连接）；网络阶段在HTTP客户端的事件循环中记录，
+    解析和提取阶段在工作线程中记录，同一时刻只有一方在写入
+    """
+
+    __slots__ = ('stages', 'bytes', 'started')
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        self.bytes = 0
+        self.started = time.perf_counter()
+
+    def add(self, stage: str, seconds: float):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def call(self, stage: str, fn: Callable, *args):
+        """执行fn(*args)并把耗时计入stage"""
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self.add(stage, time.perf_counter() - start)
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def as_dict(self) -> Dict:
+        """供 ?debug_timing=1 返回的分阶段耗时（毫秒）"""
+        return {
+            'stages_ms': {stage: round(seconds * 1000, 3) for stage, seconds in self.stages.items()},
+            'bytes': self.bytes,
+            'total_ms': round(self.elapsed() * 1000, 3)
+        }
+
+
+def record_extraction(timings: StageTimings, platform: str, outcome: str, image_count: Optional[int] = None):
+    """把一次提取的分阶段耗时计入直方图"""
+    for stage, seconds in timings.stages.items():
+        STAGE_SECONDS.observe(seconds, platform, stage)
+    EXTRACT_SECONDS.observe(timings.elapsed(), platform, outcome)
+    if timings.bytes:
+        DOWNLOAD_BYTES.observe(timings.bytes, platform)
+    if image_count is not None:
+        IMAGE_COUNT.observe(image_count, platform)
@@ -0,0 +1,247 @@
+"""
+👯 近似重复文章检测
+同一篇文章常被多个公众号转载，链接各不相同（mp.weixin.qq.com/s/...），
+按链接缓存无法识别，每份转载都会被完整分析一遍
+
+- 正文指纹：清理后正文的64位SimHash（去除空白和标点后按4字切分），转载时增删的开头、结尾
+  和排版差异只改变少量位
+- 分段LSH索引：指纹平均分为 DUPLICATE_MAX_DISTANCE + 1 段，汉明距离不超过该值的两个指纹
+  至少有一段完全相同，只需比较同段的候选
+- 每组近似重复文章以最先出现的一篇为原文，之后的转载返回 duplicate_of 指向原文
+- 索引可持久化到SQLite（Config.DUPLICATE_INDEX_PATH），同一台机器上的多个worker共享；
+  每次查询前读取其他worker新写入的指纹
+- 超过 Config.DUPLICATE_RETENTION_DAYS 的指纹定期（Config.DUPLICATE_PURGE_INTERVAL）从数据库和
+  内存索引中清理，长时间运行的worker内存占用不随时间增长
+"""
+
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Set, Tuple
+
+from config import Config
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+FINGERPRINT_BITS = 64
+
+# 切分正文的片段长度（字）
+_SHINGLE_CHARS = 4
+
+_NON_WORD_RE = re.compile(r'[\W_]+')
+
+
+def simhash(text: str) -> Optional[int]:
+    """
+    计算正文的SimHash指纹
+
+    Returns:
+        64位整数；去除空白和标点后短于 Config.DUPLICATE_MIN_CHARS 时返回None（短文本的指纹不可靠）
+    """
+    text = _NON_WORD_RE.sub('', text.lower())
+    if len(text) < Config.DUPLICATE_MIN_CHARS:
+        return None
+
+    shingles = {text[i:i + _SHINGLE_CHARS] for i in range(len(text) - _SHINGLE_CHARS + 1)}
+    blake2b = hashlib.blake2b
+    digests = b''.join([blake2b(shingle.encode('utf-8'), digest_size=8).digest() for shingle in shingles])
+
+    # 按字节位置切片统计各字节值出现的次数，再换算为每一位为1的片段数，避免逐片段逐位循环
+    fingerprint = 0
+    for position in range(8):
+        counts = Counter(digests[position::8])
+        for bit in range(8):
+            ones = sum(count for value, count in counts.items() if value >> bit & 1)
+            if ones * 2 > len(shingles):
+                fingerprint |= 1 << ((7 - position) * 8 + bit)
+    return fingerprint
+
+
+class DuplicateIndex:
+    """指纹的分段LSH索引"""
+
+    def __init__(self, path: str = Config.DUPLICATE_INDEX_PATH, max_distance: int = Config.DUPLICATE_MAX_DISTANCE):
+        """
+        Args:
+            path: 持久化的SQLite数据库路径，为空时只保存在内存中
+            max_distance: 视为近似重复的最大汉明距离
+        """
+        self.max_distance = max_distance
+        self.bands = max_distance + 1
+        self._band_bits = FINGERPRINT_BITS // self.bands
+        self._lock = threading.Lock()
+        # 文章键 -> (指纹, 链接, 原文的文章键, 登记时间)
+        self._entries: Dict[str, Tuple[int, str, str, float]] = {}
+        self._buckets: List[Dict[int, Set[str]]] = [{} for _ in range(self.bands)]
+        self._last_seq = 0
+        self._last_purge = 0.0
+        self._conn = None
+        self._stats = {
+            'checked': 0,
+            'duplicates': 0,
+            'expired': 0
+        }
+
+        if path:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+            with self._lock:
+                self._conn.execute('PRAGMA journal_mode=WAL')
+                self._conn.execute(
+                    'CREATE TABLE IF NOT EXISTS fingerprints ('
+                    ' seq INTEGER PRIMARY KEY,'
+                    ' key TEXT NOT NULL UNIQUE,'
+                    ' url TEXT NOT NULL,'
+                    ' fingerprint TEXT NOT NULL,'
+                    ' canonical TEXT NOT NULL,'
+                    ' updated_at REAL NOT NULL)'
+                )
+                self._conn.commit()
+                self._purge_expired(time.time())
+                self._sync()
+
+    def check(self, key: str, url: str, fingerprint: int) -> Optional[Dict]:
+        """
+        登记文章指纹并查找其原文
+
+        Args:
+            key: 文章键（规范化链接的哈希，与文章缓存、文章库一致）
+            url: 规范化后的文章链接
+            fingerprint: simhash() 的结果
+
+        Returns:
+            近似重复时为原文 {'url', 'article_id', 'distance'}，否则为None
+        """
+        with self._lock:
+            now = time.time()
+            if now - self._last_purge > Config.DUPLICATE_PURGE_INTERVAL:
+                self._purge_expired(now)
+            self._sync()
+            existing = self._entries.get(key)
+            if existing is not None and existing[0] == fingerprint:
+                canonical = existing[2]
+            else:
+                match = self._nearest(key, fingerprint)
+                canonical = key
+                if match is not None:
+                    canonical = self._entries[match][2]
+                    if canonical not in self._entries:
+                        # 原文的指纹已过期清理，以找到的转载为原文
+                        canonical = match
+                self._put(key, fingerprint, url, canonical, now)
+                self._persist(key, fingerprint, url, canonical, now)
+
+            self._stats['checked'] += 1
+            if canonical == key or canonical not in self._entries:
+                return None
+            self._stats['duplicates'] += 1
+            original = self._entries[canonical]
+            return {
+                'url': original[1],
+                'article_id': canonical,
+                'distance': bin(original[0] ^ fingerprint).count('1')
+            }
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['fingerprints'] = len(self._entries)
+        return stats
+
+    def _nearest(self, key: str, fingerprint: int) -> Optional[str]:
+        """同段候选中汉明距离最小且不超过max_distance的文章键"""
+        candidates = set()
+        for band, value in enumerate(self._band_values(fingerprint)):
+            candidates |= self._buckets[band].get(value, set())
+        candidates.discard(key)
+
+        best, best_distance = None, self.max_distance + 1
+        for candidate in sorted(candidates):
+            distance = bin(self._entries[candidate][0] ^ fingerprint).count('1')
+            if distance < best_distance:
+                best, best_distance = candidate, distance
+        return best
+
+    def _band_values(self, fingerprint: int):
+        mask = (1 << self._band_bits) - 1
+        return [(fingerprint >> (band * self._band_bits)) & mask for band in range(self.bands)]
+
+    def _put(self, key: str, fingerprint: int, url: str, canonical: str, updated_at: float):
+        self._remove(key)
+        self._entries[key] = (fingerprint, url, canonical, updated_at)
+        for band, value in enumerate(self._band_values(fingerprint)):
+            self._buckets[band].setdefault(value, set()).add(key)
+
+    def _remove(self, key: str):
+        existing = self._entries.pop(key, None)
+        if existing is None:
+            return
+        for band, value in enumerate(self._band_values(existing[0])):
+            bucket = self._buckets[band].get(value)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band][value]
+
+    def _purge_expired(self, now: float):
+        """清理过期指纹：数据库中的行，以及内存索引中的条目（包括其他worker已从数据库删除的）"""
+        self._last_purge = now
+        before = now - Config.DUPLICATE_RETENTION_DAYS * 86400
+        if self._conn is not None:
+            try:
+                self._conn.execute('DELETE FROM fingerprints WHERE updated_at < ?', (before,))
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.warning("清理过期的正文指纹失败: %s", e)
+        expired = [key for key, entry in self._entries.items() if entry[3] < before]
+        for key in expired:
+            self._remove(key)
+        if expired:
+            self._stats['expired'] += len(expired)
+            logger.info("清理过期的正文指纹: %d 条", len(expired))
+
+    def _persist(self, key: str, fingerprint: int, url: str, canonical: str, updated_at: float):
+        if self._conn is None:
+            return
+        try:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO fingerprints (key, url, fingerprint, canonical, updated_at) '
+                'VALUES (?, ?, ?, ?, ?)', (key, url, format(fingerprint, '016x'), canonical, updated_at)
+            )
+            self._conn.commit()
+        except sqlite3.Error as e:
+            logger.warning("保存正文指纹失败: %s, 错误: %s", url, e)
+
+    def _sync(self):
+        """读取上次同步之后（包括其他worker）写入的指纹"""
+        if self._conn is None:
+            return
+        try:
+            rows = self._conn.execute(
+                'SELECT seq, key, url, fingerprint, canonical, updated_at FROM fingerprints '
+                'WHERE seq > ? ORDER BY seq',
+                (self._last_seq,)
+            ).fetchall()
+        except sqlite3.Error as e:
+            logger.warning("读取正文指纹失败: %s", e)
+            return
+        for seq, key, url, fingerprint, canonical, updated_at in rows:
+            self._put(key, int(fingerprint, 16), url, canonical, updated_at)
+            self._last_seq = seq
+
+
+def open_duplicate_index(path: str = Config.DUPLICATE_INDEX_PATH) -> Optional[DuplicateIndex]:
+    """打开指纹索引，未开启时返回None；持久化不可用时只在内存中检测"""
+    if not Config.DUPLICATE_DETECTION_ENABLED:
+        return None
+    try:
+        return DuplicateIndex(path)
+    except (OSError, sqlite3.Error) as e:
+        logger.warning("正文指纹持久化不可用，仅在内存中检测近似重复: %s, 错误: %s", path, e)
+        return DuplicateIndex('')
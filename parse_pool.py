@@ -0,0 +1,167 @@
+"""
+🧮 解析进程池
+HTML解析和字段提取是纯CPU计算，在线程中执行时受GIL限制，多个大页面的并发提取会相互排队。
+开启后（Config.PARSE_WORKERS > 0）非流式提取的解析阶段在进程池中执行，吞吐量随CPU核数增长
+
+- 解析阶段的输入为页面字节和URL，输出为文章信息字典，与 WebScraper._parse_article 一致
+- 进程池用spawn方式启动（避免在已有后台线程的进程中fork），每个子进程在初始化时导入解析依赖、
+  预编译选择器；应用启动时（事件循环之外）调用 start() 创建进程池并启动全部子进程，
+  第一次提取不必等待子进程启动
+- 进程池尚未就绪（未调用start()、或异常退出后正在重建）时 submit() 不等待，在后台线程中启动
+  进程池，本次提取改在线程中解析；事件循环线程从不阻塞在子进程启动上
+- 页面字节直接交给进程池（不先解码为字符串），小于 Config.PARSE_POOL_MIN_BYTES 的页面
+  在线程中解析，省去进程间传输
+- 子进程异常退出时关闭并丢弃该进程池并在后台重建，重建完成前的提取改在线程中解析
+"""
+
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional, Tuple
+
+from config import Config
+from metrics import StageTimings
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+# 子进程中的抓取器（只使用其解析和提取部分，不发起网络请求）
+_worker_scraper = None
+
+
+def _init_worker():
+    """子进程初始化：导入解析依赖并预编译选择器"""
+    global _worker_scraper
+    from web_scraper import WebScraper
+    _worker_scraper = WebScraper()
+
+
+def _warm_up() -> bool:
+    return _worker_scraper is not None
+
+
+def parse_page(content: bytes, url: str) -> Tuple[Dict, Dict[str, float]]:
+    """
+    在子进程中解析页面并提取文章信息
+
+    Returns:
+        (文章信息, 各阶段耗时)
+    """
+    timings = StageTimings()
+    article_info = _worker_scraper._parse_article(content, url, timings)
+    return article_info, timings.stages
+
+
+class ParsePool:
+    """解析阶段的进程池"""
+
+    def __init__(self, workers: int = Config.PARSE_WORKERS, min_bytes: int = Config.PARSE_POOL_MIN_BYTES):
+        self.workers = workers
+        self.min_bytes = min_bytes
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._starting = False
+        self._stats = {
+            'pooled': 0,
+            'inline': 0,
+            'broken': 0
+        }
+
+    def accepts(self, content: bytes) -> bool:
+        """该页面是否交给进程池解析"""
+        return self.workers > 0 and len(content) >= self.min_bytes
+
+    def start(self):
+        """
+        创建进程池并等待全部子进程就绪（子进程导入解析依赖约需1秒）
+
+        在应用启动时调用；不要在事件循环线程中调用
+        """
+        if self.workers <= 0:
+            return
+        with self._lock:
+            if self._pool is not None or self._starting:
+                return
+            self._starting = True
+        try:
+            pool = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker
+            )
+            # 空闲子进程不足时才会启动新的子进程，同时提交workers个任务即可全部启动
+            wait([pool.submit(_warm_up) for _ in range(self.workers)])
+        except Exception as e:
+            logger.error("解析进程池启动失败: %s", e)
+            with self._lock:
+                self._starting = False
+            return
+        with self._lock:
+            self._pool = pool
+            self._starting = False
+        logger.info("解析进程池已启动: %d 个子进程", self.workers)
+
+    def submit(self, content: bytes, url: str) -> Optional[Future]:
+        """
+        提交解析任务（不阻塞，可在事件循环中调用）
+
+        Returns:
+            结果为 (文章信息, 各阶段耗时) 的Future；进程池尚未就绪时返回None（已在后台启动），
+            由调用方在线程中解析
+        """
+        with self._lock:
+            pool = self._pool
+        if pool is None:
+            self._start_in_background()
+            return None
+        try:
+            future = pool.submit(parse_page, content, url)
+        except BrokenProcessPool:
+            self._discard(pool)
+            return None
+        self._count('pooled')
+        future.add_done_callback(lambda done: self._check_broken(pool, done))
+        return future
+
+    def shutdown(self):
+        """关闭进程池，等待子进程退出"""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown()
+
+    def count_inline(self):
+        self._count('inline')
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats['workers'] = self.workers
+        return stats
+
+    def _check_broken(self, pool: ProcessPoolExecutor, future: Future):
+        if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+            self._discard(pool)
+
+    def _discard(self, pool: ProcessPoolExecutor):
+        """子进程异常退出（如内存不足被杀）：关闭该进程池（结束其管理线程），在后台重建"""
+        with self._lock:
+            # 同一进程池上的多个任务都会失败，只处理一次，不影响已经重建的进程池
+            if self._pool is not pool:
+                return
+            self._pool = None
+            self._stats['broken'] += 1
+        pool.shutdown(wait=False, cancel_futures=True)
+        self._start_in_background()
+
+    def _start_in_background(self):
+        with self._lock:
+            if self._pool is not None or self._starting:
+                return
+        threading.Thread(target=self.start, name='parse-pool-start', daemon=True).start()
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
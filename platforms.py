@@ -0,0 +1,167 @@
+"""
+🧭 平台注册表
+按域名后缀识别文章平台，每个平台声明自己的选择器、流式提取的正文容器，
+以及可选的快速提取函数（直接从页面源码读取字段，不查询DOM）
+
+- 识别平台：从完整域名开始逐级去掉最左侧的标签，在后缀字典中查找，耗时与域名层级数成正比
+- 新平台通过 platform_registry.register(PlatformExtractor(...)) 接入
+- 平台选择器在 WebScraper 初始化时与通用选择器一起预编译进 SelectorIndex
+"""
+
+import html
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+# 快速提取函数：页面源码 -> 已取得的字段（title/author/publish_time/summary 的子集）
+FastExtract = Callable[[bytes], Dict[str, str]]
+
+# 微信文章发布时间按北京时间显示
+_BEIJING = timezone(timedelta(hours=8))
+
+
+class PlatformExtractor:
+    """一个平台的提取配置"""
+
+    __slots__ = ('name', 'domains', 'selectors', 'streaming_container', 'fast_extract')
+
+    def __init__(self, name: str, domains: Iterable[str], selectors: Dict[str, List[str]],
+                 streaming_container: str = '', fast_extract: Optional[FastExtract] = None):
+        """
+        Args:
+            name: 平台名（用于缓存TTL、指标标签等）
+            domains: 域名后缀，如 'csdn.net' 同时匹配 blog.csdn.net
+            selectors: 各字段（title/content/author/time）的选择器，按优先级排列
+            streaming_container: 流式提取时正文容器的id，容器闭合后停止下载
+            fast_extract: 从页面源码直接读取字段的函数，未取得的字段仍按选择器提取
+        """
+        self.name = name
+        self.domains = tuple(domain.lower() for domain in domains)
+        self.selectors = selectors
+        self.streaming_container = streaming_container
+        self.fast_extract = fast_extract
+
+
+# 未匹配任何平台时使用，只按通用选择器提取
+OTHER = PlatformExtractor('other', (), {})
+
+
+class PlatformRegistry:
+    """平台注册表：域名后缀 -> 平台"""
+
+    def __init__(self):
+        self._platforms: Dict[str, PlatformExtractor] = {}
+        self._by_suffix: Dict[str, PlatformExtractor] = {}
+
+    def register(self, platform: PlatformExtractor):
+        """注册平台；域名后缀与已有平台相同时覆盖"""
+        self._platforms[platform.name] = platform
+        for domain in platform.domains:
+            self._by_suffix[domain] = platform
+
+    def identify(self, url: str) -> PlatformExtractor:
+        """按域名识别平台，最长后缀优先；未匹配时返回 OTHER"""
+        host = urlparse(url).hostname or ''
+        while host:
+            platform = self._by_suffix.get(host)
+            if platform is not None:
+                return platform
+            _, _, host = host.partition('.')
+        return OTHER
+
+    def get(self, name: str) -> PlatformExtractor:
+        return self._platforms.get(name, OTHER)
+
+    def __iter__(self):
+        return iter(self._platforms.values())
+
+
+# 微信页面内联脚本中的变量，如 var msg_title = '标题'.html(false); var ct = "1700000000";
+_WECHAT_VAR_RE = re.compile(
+    rb'var\s+(msg_title|msg_desc|nickname|ct)\s*=\s*(?:htmlDecode\()?\s*(["\'])(.*?)(?<!\\)\2'
+)
+_JS_ESCAPE_RE = re.compile(r'\\(x[0-9a-fA-F]{2}|u[0-9a-fA-F]{4}|.)')
+
+
+def _js_unescape(value: str) -> str:
+    def replace(match):
+        escape = match.group(1)
+        if escape[0] in 'xu' and len(escape) > 1:
+            return chr(int(escape[1:], 16))
+        return {'n': '\n', 't': '\t', 'r': ''}.get(escape, escape)
+    return html.unescape(_JS_ESCAPE_RE.sub(replace, value)).strip()
+
+
+def wechat_fast_extract(page: bytes) -> Dict[str, str]:
+    """从微信文章页面的内联脚本变量读取标题、公众号名、摘要和发布时间"""
+    values = {}
+    for match in _WECHAT_VAR_RE.finditer(page):
+        name = match.group(1).decode()
+        if name not in values:
+            values[name] = _js_unescape(match.group(3).decode('utf-8', 'replace'))
+
+    fields = {}
+    if values.get('msg_title'):
+        fields['title'] = values['msg_title']
+    if values.get('nickname'):
+        fields['author'] = values['nickname']
+    if values.get('msg_desc'):
+        fields['summary'] = values['msg_desc']
+    if values.get('ct', '').isdigit():
+        published = datetime.fromtimestamp(int(values['ct']), _BEIJING)
+        fields['publish_time'] = published.strftime('%Y-%m-%d %H:%M')
+    return fields
+
+
+# 内置平台
+platform_registry = PlatformRegistry()
+
+platform_registry.register(PlatformExtractor(
+    'wechat', ['mp.weixin.qq.com'],
+    {
+        'title': ['h1', '.rich_media_title', '#activity-name'],
+        'content': ['#js_content', '.rich_media_content'],
+        'author': ['.rich_media_meta_text', '.profile_nickname'],
+        'time': ['.rich_media_meta_text', '#publish_time']
+    },
+    streaming_container='js_content',
+    fast_extract=wechat_fast_extract
+))
+platform_registry.register(PlatformExtractor(
+    'csdn', ['csdn.net'],
+    {
+        'title': ['h1.title-article-title', '.title-article-title', 'h1', '.article-title'],
+        'content': ['#article_content', '.markdown_views', '.article_content', '.blog-content-box'],
+        'author': ['.follow-nickName', '.user-name', '.author-name'],
+        'time': ['.time', '.publish-time', '.article-info .time']
+    },
+    streaming_container='article_content'
+))
+platform_registry.register(PlatformExtractor(
+    'weibo', ['weibo.com', 'weibo.cn'],
+    {
+        'title': ['h1', '.WB_text'],
+        'content': ['.WB_text', '.WB_detail'],
+        'author': ['.WB_info', '.WB_name'],
+        'time': ['.WB_from', '.WB_time']
+    }
+))
+platform_registry.register(PlatformExtractor(
+    'xiaohongshu', ['xiaohongshu.com'],
+    {
+        'title': ['.title', '.note-title'],
+        'content': ['.content', '.note-content'],
+        'author': ['.author', '.user-name'],
+        'time': ['.time', '.publish-time']
+    }
+))
+platform_registry.register(PlatformExtractor(
+    'toutiao', ['toutiao.com'],
+    {
+        'title': ['.article-content h1', 'h1'],
+        'content': ['article.syl-article-base', '.article-content article', '.article-content'],
+        'author': ['.article-meta .name', '.author-info .name'],
+        'time': ['.article-meta .time', 'time']
+    }
+))
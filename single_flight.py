@@ -0,0 +1,215 @@
+"""
+🛫 请求合并（single-flight）
+同一键的并发调用只执行一次，其余调用等待并共享结果
+
+- 进程内：第一个调用（领头）执行，其余线程等待其完成后取得同一结果
+- 跨进程（可选，见 Config.SINGLE_FLIGHT_LOCK_DIR）：同一台机器上的多个worker通过本地锁文件（fcntl.flock）互斥，
+  等到锁后先调用recheck()读取共享存储（图片磁盘缓存、文章缓存的SQLite/文件后端），
+  其他worker已写入时直接返回，不再请求上游
+- 锁文件按键的哈希分槽，文件数固定；不同键落入同一槽时只会短暂串行
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from config import Config
+
+try:
+    import fcntl
+except ImportError:  # Windows没有flock，只做进程内合并
+    fcntl = None
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+# 等待锁文件时的轮询间隔（秒）
+_LOCK_POLL_INTERVAL = 0.05
+
+
+class Flight:
+    """一次进行中的调用，供并发等待者共享结果"""
+
+    __slots__ = ('event', 'result', 'error', 'lock_fd')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.lock_fd = None
+
+
+class SingleFlight:
+    """按键合并并发调用"""
+
+    def __init__(self, name: str, lock_dir: str = Config.SINGLE_FLIGHT_LOCK_DIR,
+                 timeout: float = Config.TIMEOUT * 2, lock_slots: int = Config.SINGLE_FLIGHT_LOCK_SLOTS):
+        """
+        Args:
+            name: 名称，跨进程锁文件放在 lock_dir/name 下
+            lock_dir: 锁文件目录，为空时只做进程内合并
+            timeout: 等待领头调用的最长时间，超时后自行执行
+            lock_slots: 锁文件数
+        """
+        self.timeout = timeout
+        self.lock_slots = lock_slots
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Flight] = {}
+        self._lock_dir = None
+        self._stats = {
+            'coalesced': 0,
+            'coalesced_workers': 0,
+            'flight_timeouts': 0
+        }
+
+        if lock_dir and fcntl is None:
+            logger.warning("当前平台不支持flock，仅在进程内合并请求: %s", name)
+        elif lock_dir:
+            path = os.path.join(lock_dir, name)
+            try:
+                os.makedirs(path, exist_ok=True)
+                self._lock_dir = path
+            except OSError as e:
+                logger.warning("锁文件目录不可用，仅在进程内合并请求: %s, 错误: %s", path, e)
+
+    def do(self, key: str, fn: Callable[[], object],
+           recheck: Optional[Callable[[], object]] = None) -> Tuple[object, bool]:
+        """
+        执行fn，同一键已有进行中的调用时等待其结果
+
+        Args:
+            key: 合并键（通常为规范化URL的哈希）
+            fn: 实际执行的调用，返回值不能为None
+            recheck: 等到其他worker释放锁文件后调用，返回共享存储中的结果，没有时返回None
+
+        Returns:
+            (结果, 是否共享了其他调用的结果)
+        """
+        while True:
+            with self._lock:
+                flight = self._inflight.get(key)
+                leader = flight is None
+                if leader:
+                    flight = Flight()
+                    self._inflight[key] = flight
+                else:
+                    self._stats['coalesced'] += 1
+
+            if leader:
+                break
+
+            if not flight.event.wait(self.timeout):
+                # 领头调用迟迟未完成（如流式客户端读取过慢），自行执行
+                self._count('flight_timeouts')
+                logger.warning("等待进行中的请求超时，独立执行: %s", key)
+                return fn(), False
+            if flight.error is not None:
+                raise flight.error
+            if flight.result is not None:
+                return flight.result, True
+            # 领头调用被放弃（如流式传输中客户端断开），重新竞争
+
+        try:
+            result, shared = self._run_leader(key, fn, recheck)
+            flight.result = result
+            return result, shared
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            self.finish(key, flight)
+
+    def try_acquire(self, key: str) -> Optional[Flight]:
+        """
+        不等待地占用键（供流式填充等需要自行控制完成时机的调用方），完成后调用finish()
+
+        Returns:
+            Flight；该键已被本进程或其他worker占用时返回None
+        """
+        with self._lock:
+            if key in self._inflight:
+                return None
+            flight = Flight()
+            self._inflight[key] = flight
+
+        if self._lock_dir is not None:
+            flight.lock_fd, busy = self._open_lock(key, wait=False)
+            if busy:
+                self.finish(key, flight)
+                return None
+        return flight
+
+    def finish(self, key: str, flight: Flight):
+        """释放键并唤醒等待者；flight.result 为None且没有error时等待者重新竞争"""
+        if flight.lock_fd is not None:
+            os.close(flight.lock_fd)
+            flight.lock_fd = None
+        with self._lock:
+            if self._inflight.get(key) is flight:
+                del self._inflight[key]
+        flight.event.set()
+
+    def stats(self) -> Dict:
+        """合并次数：coalesced 为进程内，coalesced_workers 为从其他worker的结果中取得"""
+        with self._lock:
+            return dict(self._stats)
+
+    def _run_leader(self, key: str, fn: Callable[[], object],
+                    recheck: Optional[Callable[[], object]]) -> Tuple[object, bool]:
+        if self._lock_dir is None:
+            return fn(), False
+
+        fd, waited = self._open_lock(key, wait=True)
+        try:
+            if waited and recheck is not None:
+                result = recheck()
+                if result is not None:
+                    self._count('coalesced_workers')
+                    return result, True
+            return fn(), False
+        finally:
+            if fd is not None:
+                os.close(fd)
+
+    def _open_lock(self, key: str, wait: bool) -> Tuple[Optional[int], bool]:
+        """
+        对键所在的锁文件加排他锁（关闭文件描述符即释放）
+
+        Returns:
+            (文件描述符, 是否被其他持有者占用过)；等待超时、不等待且被占用或出错时文件描述符为None
+        """
+        slot = int(hashlib.sha256(key.encode('utf-8')).hexdigest()[:8], 16) % self.lock_slots
+        path = os.path.join(self._lock_dir, f"{slot}.lock")
+        try:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        except OSError as e:
+            logger.warning("打开锁文件失败: %s, 错误: %s", path, e)
+            return None, False
+
+        deadline = time.monotonic() + self.timeout
+        busy = False
+        while True:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return fd, busy
+            except BlockingIOError:
+                busy = True
+            except OSError as e:
+                logger.warning("锁文件加锁失败: %s, 错误: %s", path, e)
+                os.close(fd)
+                return None, busy
+
+            if not wait or time.monotonic() >= deadline:
+                if wait:
+                    self._count('flight_timeouts')
+                    logger.warning("等待其他worker的请求超时，独立执行: %s", key)
+                os.close(fd)
+                return None, busy
+            time.sleep(_LOCK_POLL_INTERVAL)
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._stats[name] += amount
@@ -0,0 +1,245 @@
+"""
+🏷️ 结构化数据提取
+在DOM启发式提取之前，直接从页面源码读取站点嵌入的结构化数据：
+
+- JSON-LD：<script type="application/ld+json"> 中的 Article / NewsArticle / BlogPosting 等对象
+- 内嵌状态：window.__INITIAL_STATE__（小红书笔记的标题、作者、发布时间、描述、图片）
+- OpenGraph 等 <meta>：og:title、og:description、article:published_time、og:image、author、description
+
+只用正则定位 <head> 中的 meta 标签和相关 script 块，再对其中的JSON做解析，不构建DOM。
+各来源取得的字段按优先级合并（见 merge_fields），未取得的字段仍由DOM选择器提取
+"""
+
+import html
+import json
+import logging
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+# 结构化数据可提供的字段
+FIELDS = ('title', 'author', 'publish_time', 'summary', 'images')
+
+# 视为文章的 JSON-LD 类型
+_ARTICLE_TYPES = frozenset((
+    'Article', 'NewsArticle', 'BlogPosting', 'TechArticle', 'Report', 'ScholarlyArticle',
+    'SocialMediaPosting', 'DiscussionForumPosting', 'AnalysisNewsArticle', 'OpinionNewsArticle'
+))
+
+# meta 的 property/name -> 字段，同一字段按列表顺序优先
+_META_FIELDS = {
+    'og:title': 'title',
+    'twitter:title': 'title',
+    'article:author': 'author',
+    'author': 'author',
+    'article:published_time': 'publish_time',
+    'og:release_date': 'publish_time',
+    'publishdate': 'publish_time',
+    'pubdate': 'publish_time',
+    'og:description': 'summary',
+    'twitter:description': 'summary',
+    'description': 'summary',
+    'og:image': 'images',
+    'twitter:image': 'images',
+}
+_META_PRIORITY = {key: index for index, key in enumerate(_META_FIELDS)}
+
+_HEAD_END_RE = re.compile(rb'</head\s*>', re.I)
+_META_RE = re.compile(rb'<meta\s[^>]*>', re.I)
+_ATTR_RE = re.compile(rb'([\w:-]+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s"\'>]+))')
+_JSON_LD_RE = re.compile(
+    rb'<script[^>]*type\s*=\s*["\']?application/ld\+json["\']?[^>]*>(.*?)</script\s*>', re.I | re.S
+)
+_INITIAL_STATE_RE = re.compile(rb'window\.__INITIAL_STATE__\s*=\s*(.*?)\s*;?\s*</script\s*>', re.S)
+_UNDEFINED_RE = re.compile(rb'(?<=[:\[,])\s*undefined\s*(?=[,\]}])')
+
+# 小红书笔记时间为毫秒时间戳，按北京时间显示
+_BEIJING = timezone(timedelta(hours=8))
+
+
+def extract_structured(page: bytes) -> List[Tuple[str, Dict]]:
+    """
+    从页面源码提取结构化数据
+
+    Returns:
+        [(来源, 字段)]，按优先级排列：json_ld、initial_state、opengraph；没有数据的来源不出现
+    """
+    results = []
+    for source, extract in (('json_ld', _from_json_ld), ('initial_state', _from_initial_state),
+                            ('opengraph', _from_meta)):
+        try:
+            fields = extract(page)
+        except Exception as e:
+            # 结构化数据格式不规范时忽略，由DOM提取兜底
+            logger.debug("结构化数据解析失败: %s, 错误: %s", source, e)
+            continue
+        fields = {name: value for name, value in fields.items() if value}
+        if fields:
+            results.append((source, fields))
+    return results
+
+
+def merge_fields(candidates: Iterable[Tuple[str, Dict]]) -> Tuple[Dict, Dict[str, str]]:
+    """
+    按来源优先级合并字段
+
+    Returns:
+        (字段值, 字段 -> 取得该字段的来源)
+    """
+    values, sources = {}, {}
+    for source, fields in candidates:
+        for name, value in fields.items():
+            if name not in values and value:
+                values[name] = value
+                sources[name] = source
+    return values, sources
+
+
+def _text(value) -> str:
+    """结构化数据中的文本：反转义HTML实体并合并空白"""
+    if not isinstance(value, str):
+        return ''
+    return ' '.join(html.unescape(value).split())
+
+
+def _decode(raw: bytes) -> str:
+    return raw.decode('utf-8', 'replace')
+
+
+def _from_meta(page: bytes) -> Dict:
+    """<head> 中的 OpenGraph / article / 通用 meta 标签"""
+    head_end = _HEAD_END_RE.search(page)
+    head = page[:head_end.start()] if head_end else page[:64 * 1024]
+
+    best: Dict[str, Tuple[int, object]] = {}
+    images = []
+    for tag in _META_RE.finditer(head):
+        attrs = {}
+        for match in _ATTR_RE.finditer(tag.group()):
+            value = match.group(2) if match.group(2) is not None else (
+                match.group(3) if match.group(3) is not None else match.group(4))
+            attrs[match.group(1).lower()] = value
+        key = _decode(attrs.get(b'property') or attrs.get(b'name') or b'').strip().lower()
+        field = _META_FIELDS.get(key)
+        content = _text(_decode(attrs.get(b'content', b'')))
+        if field is None or not content:
+            continue
+        if field == 'images':
+            if content not in images:
+                images.append(content)
+            continue
+        if field == 'author' and content.startswith(('http://', 'https://')):
+            # article:author 常为作者主页链接
+            continue
+        priority = _META_PRIORITY[key]
+        if field not in best or priority < best[field][0]:
+            best[field] = (priority, content)
+
+    fields = {field: value for field, (_, value) in best.items()}
+    fields['images'] = images
+    return fields
+
+
+def _from_json_ld(page: bytes) -> Dict:
+    """第一个文章类型的 JSON-LD 对象"""
+    for block in _JSON_LD_RE.finditer(page):
+        try:
+            data = json.loads(_decode(block.group(1)), strict=False)
+        except ValueError:
+            continue
+        article = _find_article(data)
+        if article is not None:
+            return {
+                'title': _text(article.get('headline') or article.get('name')),
+                'author': _ld_author(article.get('author')),
+                'publish_time': _text(article.get('datePublished') or article.get('dateCreated')),
+                'summary': _text(article.get('description')),
+                'images': _ld_images(article.get('image'))
+            }
+    return {}
+
+
+def _find_article(data) -> Optional[Dict]:
+    """在JSON-LD（可能是列表或含 @graph）中查找文章对象"""
+    stack = [data]
+    while stack:
+        item = stack.pop(0)
+        if isinstance(item, list):
+            stack.extend(item)
+        elif isinstance(item, dict):
+            types = item.get('@type')
+            types = types if isinstance(types, list) else [types]
+            if any(t in _ARTICLE_TYPES for t in types):
+                return item
+            if '@graph' in item:
+                stack.append(item['@graph'])
+    return None
+
+
+def _ld_author(author) -> str:
+    if isinstance(author, list):
+        names = [_ld_author(item) for item in author]
+        return ', '.join(name for name in names if name)
+    if isinstance(author, dict):
+        return _text(author.get('name'))
+    return _text(author)
+
+
+def _ld_images(image) -> List[str]:
+    if isinstance(image, list):
+        return [url for item in image for url in _ld_images(item)]
+    if isinstance(image, dict):
+        image = image.get('url') or image.get('contentUrl')
+    return [image] if isinstance(image, str) and image else []
+
+
+def _from_initial_state(page: bytes) -> Dict:
+    """window.__INITIAL_STATE__ 中的笔记对象（小红书）"""
+    match = _INITIAL_STATE_RE.search(page)
+    if match is None:
+        return {}
+    # 小红书的状态对象中含有JavaScript的 undefined
+    state = json.loads(_decode(_UNDEFINED_RE.sub(b'null', match.group(1))), strict=False)
+    note = _find_note(state)
+    if note is None:
+        return {}
+
+    user = note.get('user') if isinstance(note.get('user'), dict) else {}
+    published = note.get('time')
+    if isinstance(published, (int, float)) and published > 0:
+        published = datetime.fromtimestamp(published / 1000, _BEIJING).strftime('%Y-%m-%d %H:%M')
+    else:
+        published = ''
+
+    images = []
+    for image in note.get('imageList') or []:
+        if isinstance(image, dict):
+            url = image.get('urlDefault') or image.get('url')
+            if isinstance(url, str) and url:
+                images.append(url)
+    return {
+        'title': _text(note.get('title')),
+        'author': _text(user.get('nickname') or user.get('nickName')),
+        'publish_time': published,
+        'summary': _text(note.get('desc')),
+        'images': images
+    }
+
+
+def _find_note(state) -> Optional[Dict]:
+    """查找同时带有 title 和 desc/imageList 的对象（广度优先，限制深度）"""
+    level = [state]
+    for _ in range(8):
+        next_level = []
+        for item in level:
+            if isinstance(item, dict):
+                if 'title' in item and ('desc' in item or 'imageList' in item):
+                    return item
+                next_level.extend(value for value in item.values() if isinstance(value, (dict, list)))
+            elif isinstance(item, list):
+                next_level.extend(value for value in item if isinstance(value, (dict, list)))
+        level = next_level
+    return None
@@ -0,0 +1,32 @@
+"""
+🧹 文本工具
+正文文本规范化：合并空白字符、移除白名单以外的字符
+"""
+
+import re
+
+# 白名单：单词字符、空白、中文及常用中英文标点，其余字符移除
+_DISALLOWED_RE = re.compile(r'[^\w\s\u4e00-\u9fff.,!?;:()（）【】"，。！？；：]')
+
+# 白名单以外的ASCII字符，在UTF-8字节上用 bytes.translate 一次删除
+# （UTF-8多字节字符的每个字节都不小于0x80，不会被误删）
+_ASCII_DISALLOWED = bytes(code for code in range(128) if _DISALLOWED_RE.match(chr(code)))
+
+# 删除ASCII字符后，剩余需要用正则处理的只有白名单以外的非ASCII字符
+_NON_ASCII_DISALLOWED_RE = re.compile(r'[^\x00-\x7f\w\u4e00-\u9fff（）【】，。！？；：]')
+
+
+def clean_text(text: str) -> str:
+    """
+    清理文本内容
+
+    连续空白合并为一个空格，移除白名单以外的字符，去除首尾空白。
+    结果与依次执行 re.sub(r'\s+', ' ') 和 _DISALLOWED_RE 替换完全一致：
+    - str.split() 与正则 \s 的空白定义相同，首尾空白最终都会被strip
+    - ASCII字符用 bytes.translate 删除；正则只需匹配少量非ASCII字符，替换次数大幅减少
+    """
+    text = ' '.join(text.split())
+    data = text.encode('utf-8', 'surrogatepass').translate(None, _ASCII_DISALLOWED)
+    if text.isascii():
+        return data.decode('ascii').strip()
+    return _NON_ASCII_DISALLOWED_RE.sub('', data.decode('utf-8', 'surrogatepass')).strip()
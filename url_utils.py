@@ -0,0 +1,80 @@
+"""
+🔗 URL工具
+URL规范化等通用辅助函数，供各级缓存生成稳定的键
+"""
+
+import hashlib
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# 各协议的默认端口，规范化时去除
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+# 不影响文章内容的通用跟踪参数
+TRACKING_PARAMS = {'spm', 'fbclid', 'gclid', 'share_token', 'share_from'}
+TRACKING_PREFIXES = ('utm_', 'depth_1-utm_')
+
+# 各平台特有的分享/会话噪声参数，仅对对应域名生效
+PLATFORM_NOISE_PARAMS = {
+    'mp.weixin.qq.com': {
+        'chksm', 'scene', 'subscene', 'sessionid', 'clicktime', 'enterid', 'ascene',
+        'devicetype', 'version', 'nettype', 'abtest_cookie', 'lang', 'exportkey',
+        'pass_ticket', 'wx_header', 'key', 'uin', 'countrytag', 'fontscale',
+        'realreporttime', 'sharer_shareinfo', 'sharer_shareinfo_first', 'sharer_sharetime',
+        'sharer_shareid', 'click_id', 'poc_token', 'mpshare', 'srcid', 'from', 'isappinstalled',
+    },
+    'csdn.net': {'request_id', 'ops_request_misc', 'biz_id', 'source'},
+    'xiaohongshu.com': {
+        'xsec_token', 'xsec_source', 'share_id', 'apptime', 'app_platform', 'app_version',
+        'author_share', 'xhsshare', 'shareredid', 'share_from_user_hidden', 'type',
+    },
+    'weibo.com': {'from', 'wm', 'sourcetype', 'display'},
+}
+
+
+def normalize_url(url: str) -> str:
+    """
+    规范化URL：协议和域名转小写、去除默认端口和片段
+
+    Args:
+        url: 原始URL
+
+    Returns:
+        规范化后的URL
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+
+    netloc = host
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        netloc = f"{host}:{parts.port}"
+    if parts.username:
+        userinfo = parts.username + (f":{parts.password}" if parts.password else '')
+        netloc = f"{userinfo}@{netloc}"
+
+    return urlunsplit((scheme, netloc, parts.path or '/', parts.query, ''))
+
+
+def url_key(url: str) -> str:
+    """生成URL的缓存键（规范化URL的SHA-256）"""
+    return hashlib.sha256(normalize_url(url).encode('utf-8')).hexdigest()
+
+
+def normalize_article_url(url: str) -> str:
+    """
+    规范化文章URL：在normalize_url的基础上去除跟踪/分享参数，其余参数排序
+
+    微信文章保留 __biz/mid/idx/sn 等定位参数，去除 chksm/scene 等分享噪声
+    """
+    parts = urlsplit(normalize_url(url))
+    noise = set(TRACKING_PARAMS)
+    for domain, names in PLATFORM_NOISE_PARAMS.items():
+        if parts.hostname == domain or (parts.hostname or '').endswith('.' + domain):
+            noise |= names
+
+    params = [
+        (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if name.lower() not in noise and not name.lower().startswith(TRACKING_PREFIXES)
+    ]
+    params.sort()
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(params), ''))
@@ -6,227 +6,512 @@
 - 微信公众平台
 - 小红书
 - 微博
+- CSDN
 - 今日头条
-- 其他主流平台
+- 其他主流平台（新平台在 platforms 中注册）
 """
 
 import re
+import time
+import asyncio
+import hashlib
 import logging
-from typing import Dict, List, Optional
-from urllib.parse import urljoin, urlparse
-
-import requests
-from bs4 import BeautifulSoup
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin
 
 from config import Config
+from extraction_engine import LxmlDocument, SelectorIndex, StreamingHTMLBuilder, content_text, parse_document
+from http_client import ContentTooLarge, FetchError, get_http_client
+from image_probe import ImageProber
+from metrics import FIELD_SOURCES, StageTimings, record_extraction
+from parse_pool import ParsePool
+from platforms import platform_registry
+from near_duplicates import simhash
+from structured_data import FIELDS, extract_structured, merge_fields
+from text_utils import clean_text
 
 # 设置日志
 logger = logging.getLogger(__name__)
 
+# 可由结构化数据给出的元数据字段，全部取得时DOM只需提供正文、图片和标签
+METADATA_FIELDS = ('title', 'author', 'publish_time', 'summary')
+BODY_FIELDS = ('content', 'tags')
+
 
 class WebScraper:
     """网页内容抓取器，支持图文内容提取"""
     
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
+        # 共享的异步HTTP客户端（连接池、超时配置见 http_client）
+        self.client = get_http_client()
+        self.headers = {
             'User-Agent': Config.USER_AGENT,
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Connection': 'keep-alive',
             'Upgrade-Insecure-Requests': '1',
-        })
-        self.timeout = Config.TIMEOUT
-        
-        # 平台特定的选择器配置
-        self.platform_selectors = {
-            'wechat': {
-                'title': ['h1', '.rich_media_title', '#activity-name'],
-                'content': ['#js_content', '.rich_media_content'],
-                'author': ['.rich_media_meta_text', '.profile_nickname'],
-                'time': ['.rich_media_meta_text', '#publish_time']
-            },
-            'csdn': {
-                'title': ['h1.title-article-title', '.title-article-title', 'h1', '.article-title'],
-                'content': ['#article_content', '.markdown_views', '.article_content', '.blog-content-box'],
-                'author': ['.follow-nickName', '.user-name', '.author-name'],
-                'time': ['.time', '.publish-time', '.article-info .time']
-            },
-            'weibo': {
-                'title': ['h1', '.WB_text'],
-                'content': ['.WB_text', '.WB_detail'],
-                'author': ['.WB_info', '.WB_name'],
-                'time': ['.WB_from', '.WB_time']
-            },
-            'xiaohongshu': {
-                'title': ['.title', '.note-title'],
-                'content': ['.content', '.note-content'],
-                'author': ['.author', '.user-name'],
-                'time': ['.time', '.publish-time']
-            }
         }
+        
+        # 图片探测器（Config.IMAGE_PROBE_ENABLED 开启时读取图片真实尺寸并过滤小图）
+        self.image_prober = ImageProber(self.client)
+        
+        # 解析进程池（Config.PARSE_WORKERS > 0 时非流式提取的解析阶段在子进程中执行）
+        self.parse_pool = ParsePool()
+        
+        # 平台注册表：按域名后缀识别平台，各平台的选择器、正文容器和快速提取函数见 platforms
+        self.platforms = platform_registry
+        self.platform_selectors = {platform.name: platform.selectors for platform in self.platforms}
+        
+        # 通用选择器（平台选择器未命中时按顺序尝试）
+        self.generic_selectors = {
+            'title': [
+                'h1',
+                '.article-title',
+                '.post-title',
+                '.entry-title',
+                'title',
+                '[class*="title"]',
+                '[id*="title"]'
+            ],
+            'content': [
+                '.article-content',
+                '.post-content',
+                '.entry-content',
+                '.content',
+                'article',
+                '.article-body',
+                '.post-body',
+                '[class*="content"]',
+                '[id*="content"]'
+            ],
+            'author': [
+                '.author',
+                '.byline',
+                '.writer',
+                '[class*="author"]',
+                '[class*="byline"]',
+                'meta[name="author"]'
+            ],
+            'time': [
+                '.publish-time',
+                '.post-time',
+                '.date',
+                'time',
+                '[class*="time"]',
+                '[class*="date"]',
+                'meta[property="article:published_time"]',
+                'meta[name="publishdate"]'
+            ],
+            'summary': [
+                '.summary',
+                '.excerpt',
+                '.description',
+                'meta[name="description"]',
+                'meta[property="og:description"]'
+            ],
+            'tags': [
+                '.tags a',
+                '.tag',
+                '.category',
+                '.keywords',
+                'meta[name="keywords"]'
+            ]
+        }
+        
+        # 预编译所有选择器，供单遍提取引擎使用
+        self.selector_index = SelectorIndex(
+            selector
+            for selectors in list(self.platform_selectors.values()) + [self.generic_selectors]
+            for field_selectors in selectors.values()
+            for selector in field_selectors
+        )
+        # 结构化数据已给出全部元数据字段时只需正文和标签的选择器，单遍扫描不再检查标题、作者等选择器
+        self.body_selector_index = SelectorIndex(
+            selector
+            for selectors in list(self.platform_selectors.values()) + [self.generic_selectors]
+            for field, field_selectors in selectors.items() if field in BODY_FIELDS
+            for selector in field_selectors
+        )
     
-    def scrape_article(self, url: str) -> Dict:
+    def scrape_article(self, url: str, timings: Optional[StageTimings] = None,
+                       previous: Optional[Dict] = None) -> Dict:
         """
-        抓取文章内容，包括文字和图片
+        抓取文章内容，包括文字和图片（同步接口，供Flask路由调用）
+        
+        在HTTP客户端的事件循环中执行 async_scrape_article 并等待结果
         
         Args:
             url: 文章链接
+            timings: 传入时记录本次提取的分阶段耗时（见 metrics.StageTimings）
+            previous: 同一链接上次的提取结果，页面未变化时原样返回（见 async_scrape_article）
             
         Returns:
             包含文章信息的字典
         """
-        try:
-            logger.info(f"开始抓取文章: {url}")
+        return self.client.run(self.async_scrape_article(url, timings, previous))
+    
+    async def async_scrape_article(self, url: str, timings: Optional[StageTimings] = None,
+                                   previous: Optional[Dict] = None) -> Dict:
+        """
+        抓取文章内容，包括文字和图片（异步接口）
+        
+        等待上游响应时不占用线程；HTML解析在线程池中执行，不阻塞事件循环。
+        各阶段耗时、下载字节数和图片数量计入 metrics 中的直方图
+        
+        结果的 validators 字段记录上游的ETag、Last-Modified和页面的SHA-256。
+        传入previous时按其validators发送 If-None-Match / If-Modified-Since，
+        上游返回304、或忽略条件请求但页面内容与上次相同时，跳过解析直接返回previous
+        
+        Args:
+            url: 文章链接
+            timings: 传入时记录本次提取的分阶段耗时（见 metrics.StageTimings）
+            previous: 同一链接上次的提取结果（通常来自文章缓存中已过期的条目）
             
-            # 发送请求
-            response = self.session.get(url, timeout=self.timeout)
-            response.raise_for_status()
+        Returns:
+            包含文章信息的字典；页面未变化时为previous本身
+        """
+        if timings is None:
+            timings = StageTimings()
+        platform = self._identify_platform(url)
+        headers = self._conditional_headers(previous)
+        try:
+            logger.info("开始抓取文章: %s", url)
             
-            # 解析HTML
-            soup = BeautifulSoup(response.content, 'html.parser')
+            stop_id = self.platforms.get(platform).streaming_container
+            if Config.STREAMING_EXTRACTION and stop_id:
+                # 流式下载并增量解析，正文容器闭合后即停止
+                article_info = await asyncio.to_thread(
+                    self._stream_article, url, stop_id, timings, headers, previous
+                )
+            else:
+                # 发送请求
+                response = await self.client.get(url, headers=headers, timings=timings)
+                
+                # 页面未变化时沿用上次的结果，否则解析HTML并提取文章信息
+                validators = self._validators(response.headers, response.content)
+                if self._revalidate(previous, response.status_code, validators):
+                    article_info = previous
+                else:
+                    article_info = await self._parse_off_loop(response.content, url, timings)
+                    article_info['validators'] = validators
             
-            # 识别平台
-            platform = self._identify_platform(url)
+            if article_info is previous:
+                record_extraction(timings, platform, 'not_modified')
+                logger.info("文章未变化，沿用上次的提取结果: %s", url)
+                return previous
             
-            # 提取文章信息
-            article_info = {
-                'url': url,
-                'platform': platform,
-                'title': self._extract_title(soup, platform),
-                'content': self._extract_content(soup, platform),
-                'images': self._extract_images(soup, url),
-                'author': self._extract_author(soup, platform),
-                'publish_time': self._extract_publish_time(soup, platform),
-                'summary': self._extract_summary(soup),
-                'tags': self._extract_tags(soup),
-                'word_count': 0,  # 将在内容提取后计算
-                'image_count': 0  # 将在图片提取后计算
-            }
+            for field, source in article_info['field_sources'].items():
+                FIELD_SOURCES.inc(field, source)
             
-            # 计算统计信息
-            article_info['word_count'] = len(article_info['content'])
-            article_info['image_count'] = len(article_info['images'])
+            if Config.IMAGE_PROBE_ENABLED and article_info['images']:
+                await self._probe_images(article_info, timings)
             
-            logger.info(f"文章抓取完成: {article_info['title']} (字数: {article_info['word_count']}, 图片: {article_info['image_count']})")
+            record_extraction(timings, platform, 'success', article_info['image_count'])
+            logger.info("文章抓取完成: %s (字数: %d, 图片: %d)",
+                        article_info['title'], article_info['word_count'], article_info['image_count'])
             return article_info
             
-        except requests.exceptions.RequestException as e:
-            logger.error(f"网络请求失败: {url}, 错误: {str(e)}")
+        except FetchError as e:
+            record_extraction(timings, platform, 'fetch_error')
+            logger.error("网络请求失败: %s, 错误: %s", url, e)
             return self._create_error_response(url, f"网络请求失败: {str(e)}")
         except Exception as e:
-            logger.error(f"抓取文章失败: {url}, 错误: {str(e)}")
+            record_extraction(timings, platform, 'error')
+            logger.error("抓取文章失败: %s, 错误: %s", url, e)
             return self._create_error_response(url, str(e))
     
-    def _identify_platform(self, url: str) -> str:
-        """识别文章平台"""
-        domain = urlparse(url).netloc.lower()
-        
-        if 'mp.weixin.qq.com' in domain:
-            return 'wechat'
-        elif 'weibo.com' in domain:
-            return 'weibo'
-        elif 'xiaohongshu.com' in domain:
-            return 'xiaohongshu'
-        elif 'toutiao.com' in domain:
-            return 'toutiao'
+    async def _probe_images(self, article_info: Dict, timings: StageTimings):
+        """
+        并发探测图片的真实尺寸，过滤图标、跟踪像素等小图（网络阶段，在事件循环中执行）
+        
+        HTML中往往没有width/height属性，_is_valid_content_image 无法据此过滤
+        """
+        start = time.perf_counter()
+        article_info['images'] = await self.image_prober.filter_images(article_info['images'])
+        article_info['image_count'] = len(article_info['images'])
+        timings.add('probe_images', time.perf_counter() - start)
+    
+    async def _parse_off_loop(self, content: bytes, url: str, timings: StageTimings) -> Dict:
+        """
+        在解析进程池（见 parse_pool）或线程池中执行 _parse_article，不阻塞事件循环；
+        进程池尚未就绪时在线程中解析
+        
+        进程池返回子进程中记录的各阶段耗时，并入timings；提交到取得结果之间的其余耗时
+        （排队、页面和结果的进程间传输）计入 parse_pool_wait
+        """
+        future = self.parse_pool.submit(content, url) if self.parse_pool.accepts(content) else None
+        if future is not None:
+            start = time.perf_counter()
+            try:
+                article_info, stages = await asyncio.wrap_future(future)
+            except BrokenProcessPool:
+                logger.error("解析子进程异常退出，改在线程中解析: %s", url)
+            else:
+                for stage, seconds in stages.items():
+                    timings.add(stage, seconds)
+                timings.add('parse_pool_wait', time.perf_counter() - start - sum(stages.values()))
+                return article_info
+        
+        self.parse_pool.count_inline()
+        return await asyncio.to_thread(self._parse_article, content, url, timings)
+    
+    def _parse_article(self, content: bytes, url: str, timings: Optional[StageTimings] = None) -> Dict:
+        """
+        解析HTML并提取文章信息（不涉及网络请求）
+        
+        Args:
+            content: 页面HTML
+            url: 文章链接
+            timings: 传入时记录解析和各字段提取的耗时
+            
+        Returns:
+            包含文章信息的字典
+        """
+        timings = timings or StageTimings()
+        platform = self._identify_platform(url)
+        structured = self._read_structured(content, platform, timings)
+        # 元数据字段都已从源码取得时，单遍扫描只记录正文和标签的选择器
+        index = self.selector_index
+        if all(structured[0].get(field) for field in METADATA_FIELDS):
+            index = self.body_selector_index
+        # 解析HTML（解析后端见 Config.PARSER_BACKEND）
+        doc = timings.call('parse', parse_document, content, index)
+        return self._extract_article(doc, url, timings, structured=structured)
+    
+    def _stream_article(self, url: str, stop_id: str, timings: Optional[StageTimings] = None,
+                        headers: Optional[Dict[str, str]] = None, previous: Optional[Dict] = None) -> Dict:
+        """
+        流式下载页面，边下载边增量解析，然后提取文章信息
+        
+        id为stop_id的正文容器闭合、且其正文足够长时停止下载（否则读完整个页面），
+        下载过程中按 Config.MAX_CONTENT_LENGTH 限制页面大小。
+        lxml的解析器不能跨线程使用，因此喂入数据、建树和提取都在调用线程中完成，
+        下载本身仍在HTTP客户端的事件循环中进行
+        
+        Args:
+            url: 文章链接
+            stop_id: 正文容器的id
+            timings: 传入时记录下载、增量解析（parse）和各字段提取的耗时
+            headers: 请求头（含条件请求头），默认为 self.headers
+            previous: 上次的提取结果，已接收部分的哈希与上次相同时不再提取字段
+            
+        Returns:
+            包含文章信息的字典；页面未变化时为previous本身
+        """
+        # 与 _extract_content 的判断一致：正文超过100字才会被采用
+        builder = StreamingHTMLBuilder(
+            stop_id, accept=lambda element: len(self._clean_text(content_text(element))) > 100
+        )
+        timings = timings or StageTimings()
+        stream = self.client.open_stream(url, headers=headers or self.headers, timings=timings)
+        chunks = []
+        received = 0
+        download_start = time.perf_counter()
+        
+        try:
+            if stream.status_code == 304 and previous is not None:
+                self._revalidate(previous, 304, self._validators(stream.headers, b''))
+                return previous
+            
+            declared = stream.headers.get('content-length')
+            if declared and declared.isdigit() and int(declared) > Config.MAX_CONTENT_LENGTH:
+                raise ContentTooLarge(f"页面大小 {declared} 字节超过限制")
+            
+            for chunk in stream.iter_content(Config.STREAMING_CHUNK_SIZE):
+                chunks.append(chunk)
+                received += len(chunk)
+                if received > Config.MAX_CONTENT_LENGTH:
+                    raise ContentTooLarge(f"页面大小超过限制 {Config.MAX_CONTENT_LENGTH} 字节")
+                if timings.call('parse', builder.feed, chunk):
+                    logger.info("正文容器已闭合，提前结束下载: %s (已接收 %d 字节)", url, received)
+                    break
+        finally:
+            stream.close()
+            # 下载耗时不含增量解析
+            timings.add('download', time.perf_counter() - download_start - timings.stages.get('parse', 0.0))
+            timings.bytes += received
+        
+        # 提前结束下载时哈希的是已接收的部分，停止位置由正文容器决定，页面不变时哈希也不变
+        page = b''.join(chunks)
+        validators = self._validators(stream.headers, page)
+        if self._revalidate(previous, stream.status_code, validators):
+            return previous
+        
+        root = timings.call('parse', builder.close)
+        article_info = self._extract_article(LxmlDocument(root, self.selector_index), url, timings, page)
+        article_info['validators'] = validators
+        return article_info
+    
+    def _conditional_headers(self, previous: Optional[Dict]) -> Dict[str, str]:
+        """按上次结果的validators生成条件请求头"""
+        validators = (previous or {}).get('validators')
+        if not validators:
+            return self.headers
+        headers = dict(self.headers)
+        if validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
+        return headers
+    
+    @staticmethod
+    def _validators(response_headers, page: bytes) -> Dict[str, str]:
+        """上游响应的缓存校验信息和页面内容的哈希"""
+        return {
+            'etag': response_headers.get('etag', ''),
+            'last_modified': response_headers.get('last-modified', ''),
+            'body_sha256': hashlib.sha256(page).hexdigest()
+        }
+    
+    @staticmethod
+    def _revalidate(previous: Optional[Dict], status_code: int, validators: Dict[str, str]) -> bool:
+        """
+        判断页面相对previous是否未变化：上游返回304，或页面哈希与上次相同
+        
+        未变化时把新的ETag/Last-Modified记入previous，供下次条件请求使用
+        """
+        old = (previous or {}).get('validators')
+        if not old:
+            return False
+        if status_code != 304 and validators['body_sha256'] != old.get('body_sha256'):
+            return False
+        previous['validators'] = {
+            'etag': validators['etag'] or old.get('etag', ''),
+            'last_modified': validators['last_modified'] or old.get('last_modified', ''),
+            'body_sha256': old.get('body_sha256', '')
+        }
+        return True
+    
+    def _read_structured(self, page: bytes, platform: str, timings: StageTimings) -> Tuple[Dict, Dict[str, str]]:
+        """从页面源码读取字段：平台的快速提取函数，其次是JSON-LD、内嵌状态、OpenGraph等结构化数据"""
+        candidates = []
+        fast_extract = self.platforms.get(platform).fast_extract
+        if fast_extract:
+            candidates.append(('platform', timings.call('extract_fast', fast_extract, page)))
+        if Config.STRUCTURED_DATA_ENABLED:
+            candidates.extend(timings.call('extract_structured', extract_structured, page))
+        return merge_fields(candidates)
+    
+    def _extract_article(self, doc, url: str, timings: Optional[StageTimings] = None,
+                         page: Optional[bytes] = None,
+                         structured: Optional[Tuple[Dict, Dict[str, str]]] = None) -> Dict:
+        """
+        从已解析的文档中提取文章信息，各字段的提取耗时分别计入timings
+        
+        传入页面源码page（或已读取的structured）时先从源码读取字段（见 _read_structured）；
+        已取得的字段不再查询DOM，各字段的来源记录在 field_sources
+        """
+        timings = timings or StageTimings()
+        
+        # 识别平台
+        platform = self._identify_platform(url)
+        
+        if structured is None:
+            structured = self._read_structured(page, platform, timings) if page else ({}, {})
+        structured, sources = structured
+        
+        # 提取文章信息（_extract_content 会移除页面模板元素，需在图片等字段之前执行）
+        article_info = {
+            'url': url,
+            'platform': platform,
+            'title': structured.get('title') or timings.call('extract_title', self._extract_title, doc, platform),
+            'content': timings.call('extract_content', self._extract_content, doc, platform),
+            'images': timings.call('extract_images', self._extract_images, doc, url),
+            'author': structured.get('author') or timings.call(
+                'extract_author', self._extract_author, doc, platform),
+            'publish_time': structured.get('publish_time') or timings.call(
+                'extract_publish_time', self._extract_publish_time, doc, platform),
+            'summary': structured.get('summary') or timings.call('extract_summary', self._extract_summary, doc),
+            'tags': timings.call('extract_tags', self._extract_tags, doc),
+            'word_count': 0,  # 将在内容提取后计算
+            'image_count': 0  # 将在图片提取后计算
+        }
+        
+        # 页面中没有图片元素（如客户端渲染的小红书笔记）时使用结构化数据中的图片列表
+        if article_info['images'] or not structured.get('images'):
+            sources.pop('images', None)
         else:
-            return 'other'
+            article_info['images'] = self._structured_images(structured['images'], url)
+        
+        article_info['field_sources'] = {field: sources.get(field, 'dom') for field in FIELDS}
+        
+        # 正文指纹，供文章缓存识别不同链接的近似重复文章（见 near_duplicates）
+        fingerprint = None
+        if Config.DUPLICATE_DETECTION_ENABLED:
+            fingerprint = timings.call('fingerprint', simhash, article_info['content'])
+        article_info['fingerprint'] = format(fingerprint, '016x') if fingerprint is not None else ''
+        
+        # 计算统计信息
+        article_info['word_count'] = len(article_info['content'])
+        article_info['image_count'] = len(article_info['images'])
+        
+        return article_info
+    
+    def _identify_platform(self, url: str) -> str:
+        """识别文章平台（按域名后缀查找平台注册表）"""
+        return self.platforms.identify(url).name
     
-    def _extract_title(self, soup: BeautifulSoup, platform: str) -> str:
+    def _extract_title(self, doc, platform: str) -> str:
         """提取文章标题"""
         # 尝试平台特定选择器
         if platform in self.platform_selectors:
             for selector in self.platform_selectors[platform]['title']:
-                title_elem = soup.select_one(selector)
-                if title_elem and title_elem.get_text(strip=True):
-                    return title_elem.get_text(strip=True)
+                title_elem = doc.select_one(selector)
+                if title_elem is not None and doc.get_text(title_elem, strip=True):
+                    return doc.get_text(title_elem, strip=True)
         
         # 通用选择器
-        title_selectors = [
-            'h1',
-            '.article-title',
-            '.post-title',
-            '.entry-title',
-            'title',
-            '[class*="title"]',
-            '[id*="title"]'
-        ]
-        
-        for selector in title_selectors:
-            title_elem = soup.select_one(selector)
-            if title_elem and title_elem.get_text(strip=True):
-                title = title_elem.get_text(strip=True)
+        for selector in self.generic_selectors['title']:
+            title_elem = doc.select_one(selector)
+            if title_elem is not None and doc.get_text(title_elem, strip=True):
+                title = doc.get_text(title_elem, strip=True)
                 # 过滤掉网站名称
                 if ' - ' in title:
                     title = title.split(' - ')[0]
                 return title
         
-        return soup.title.get_text(strip=True) if soup.title else ""
+        title_elem = doc.select_one('title')
+        return doc.get_text(title_elem, strip=True) if title_elem is not None else ""
     
-    def _extract_content(self, soup: BeautifulSoup, platform: str) -> str:
+    def _extract_content(self, doc, platform: str) -> str:
         """提取文章正文内容"""
         # 移除不需要的元素
-        for element in soup(['script', 'style', 'nav', 'header', 'footer', 'aside', 'advertisement', 'ad']):
-            element.decompose()
+        doc.remove_boilerplate()
+        
+        # 平台选择器和通用选择器常命中同一容器（如 #js_content 与 .rich_media_content），
+        # 正文过短被跳过后不再重复清理
+        cleaned = {}
         
         # 尝试平台特定选择器
         if platform in self.platform_selectors:
             for selector in self.platform_selectors[platform]['content']:
-                content_elem = soup.select_one(selector)
-                if content_elem:
-                    content = self._clean_text(content_elem.get_text())
+                content_elem = doc.select_one(selector)
+                if content_elem is not None:
+                    content = self._element_text(doc, content_elem, cleaned)
                     if len(content) > 100:  # 确保内容足够长
                         return content
         
         # 通用内容选择器
-        content_selectors = [
-            '.article-content',
-            '.post-content',
-            '.entry-content',
-            '.content',
-            'article',
-            '.article-body',
-            '.post-body',
-            '[class*="content"]',
-            '[id*="content"]'
-        ]
-        
-        for selector in content_selectors:
-            content_elem = soup.select_one(selector)
-            if content_elem:
-                content = self._clean_text(content_elem.get_text())
+        for selector in self.generic_selectors['content']:
+            content_elem = doc.select_one(selector)
+            if content_elem is not None:
+                content = self._element_text(doc, content_elem, cleaned)
                 if len(content) > 100:  # 确保内容足够长
                     return content
         
         # 如果没有找到特定容器，尝试从body中提取
-        body = soup.find('body')
-        if body:
-            return self._clean_text(body.get_text())
+        body = doc.body()
+        if body is not None:
+            return self._element_text(doc, body, cleaned)
         
         return ""
     
-    def _extract_images(self, soup: BeautifulSoup, base_url: str) -> List[Dict]:
+    def _extract_images(self, doc, base_url: str) -> List[Dict]:
         """提取文章中的图片"""
         images = []
         
-        # 1. 查找所有img标签
-        img_tags = soup.find_all('img')
-        
-        # 2. 查找微信文章特有的图片元素
-        wechat_imgs = soup.find_all(['img', 'div'], attrs={'data-src': True})
-        
-        # 3. 查找CSDN特有的图片元素
-        csdn_imgs = soup.find_all(['img'], attrs={'data-src': True})
-        
-        # 4. 查找背景图片
-        bg_imgs = soup.find_all(attrs={'style': re.compile(r'background-image')})
-        
-        # 合并所有图片元素
-        all_img_elements = list(img_tags) + list(wechat_imgs) + list(csdn_imgs) + list(bg_imgs)
-        
-        for img in all_img_elements:
+        # 所有可能包含图片的元素：img标签、微信/CSDN的data-src元素、背景图片
+        for img in doc.image_candidates():
             img_info = {
                 'src': '',
                 'alt': '',
@@ -238,28 +523,28 @@ class WebScraper:
             }
             
             # 获取图片属性
-            if img.name == 'img':
+            if doc.tag_name(img) == 'img':
                 # 优先获取data-src，然后是src，最后是data-original
-                img_info['src'] = (img.get('data-src', '') or 
-                                 img.get('src', '') or 
-                                 img.get('data-original', '') or
-                                 img.get('data-lazy-src', ''))
-                img_info['alt'] = img.get('alt', '')
-                img_info['title'] = img.get('title', '')
-                img_info['width'] = img.get('width', '')
-                img_info['height'] = img.get('height', '')
+                img_info['src'] = (doc.get_attr(img, 'data-src') or 
+                                 doc.get_attr(img, 'src') or 
+                                 doc.get_attr(img, 'data-original') or
+                                 doc.get_attr(img, 'data-lazy-src'))
+                img_info['alt'] = doc.get_attr(img, 'alt')
+                img_info['title'] = doc.get_attr(img, 'title')
+                img_info['width'] = doc.get_attr(img, 'width')
+                img_info['height'] = doc.get_attr(img, 'height')
                 img_info['type'] = 'img_tag'
             else:
                 # 处理其他元素
-                img_info['src'] = (img.get('data-src', '') or 
-                                 img.get('data-original', '') or
-                                 img.get('data-lazy-src', ''))
-                img_info['alt'] = img.get('alt', '')
-                img_info['title'] = img.get('title', '')
+                img_info['src'] = (doc.get_attr(img, 'data-src') or 
+                                 doc.get_attr(img, 'data-original') or
+                                 doc.get_attr(img, 'data-lazy-src'))
+                img_info['alt'] = doc.get_attr(img, 'alt')
+                img_info['title'] = doc.get_attr(img, 'title')
                 img_info['type'] = 'data_src'
                 
                 # 处理背景图片
-                style = img.get('style', '')
+                style = doc.get_attr(img, 'style')
                 if 'background-image' in style:
                     bg_match = re.search(r'background-image:\s*url\(["\']?([^"\']+)["\']?\)', style)
                     if bg_match:
@@ -282,9 +567,28 @@ class WebScraper:
                 seen_urls.add(img['absolute_url'])
                 unique_images.append(img)
         
-        logger.info(f"找到 {len(unique_images)} 张有效图片")
+        logger.info("找到 %d 张有效图片", len(unique_images))
         return unique_images
     
+    def _structured_images(self, urls: List[str], base_url: str) -> List[Dict]:
+        """结构化数据中的图片URL转为与 _extract_images 相同的结构，经过相同的过滤和去重"""
+        images = []
+        seen_urls = set()
+        for src in urls:
+            img_info = {
+                'src': src,
+                'alt': '',
+                'title': '',
+                'width': '',
+                'height': '',
+                'absolute_url': urljoin(base_url, src),
+                'type': 'structured_data'
+            }
+            if img_info['absolute_url'] not in seen_urls and self._is_valid_content_image(img_info):
+                seen_urls.add(img_info['absolute_url'])
+                images.append(img_info)
+        return images
+    
     def _is_valid_content_image(self, img_info: Dict) -> bool:
         """判断是否为有效的内容图片"""
         src = img_info['src'].lower()
@@ -343,128 +647,86 @@ class WebScraper:
         
         return True
     
-    def _extract_author(self, soup: BeautifulSoup, platform: str) -> str:
+    def _extract_author(self, doc, platform: str) -> str:
         """提取作者信息"""
         # 尝试平台特定选择器
         if platform in self.platform_selectors:
             for selector in self.platform_selectors[platform]['author']:
-                author_elem = soup.select_one(selector)
-                if author_elem:
-                    return author_elem.get_text(strip=True)
+                author_elem = doc.select_one(selector)
+                if author_elem is not None:
+                    return doc.get_text(author_elem, strip=True)
         
         # 通用选择器
-        author_selectors = [
-            '.author',
-            '.byline',
-            '.writer',
-            '[class*="author"]',
-            '[class*="byline"]',
-            'meta[name="author"]'
-        ]
-        
-        for selector in author_selectors:
-            if selector.startswith('meta'):
-                author_elem = soup.select_one(selector)
-                if author_elem:
-                    return author_elem.get('content', '')
-            else:
-                author_elem = soup.select_one(selector)
-                if author_elem:
-                    return author_elem.get_text(strip=True)
+        for selector in self.generic_selectors['author']:
+            author_elem = doc.select_one(selector)
+            if author_elem is not None:
+                if selector.startswith('meta'):
+                    return doc.get_attr(author_elem, 'content')
+                return doc.get_text(author_elem, strip=True)
         
         return ""
     
-    def _extract_publish_time(self, soup: BeautifulSoup, platform: str) -> str:
+    def _extract_publish_time(self, doc, platform: str) -> str:
         """提取发布时间"""
         # 尝试平台特定选择器
         if platform in self.platform_selectors:
             for selector in self.platform_selectors[platform]['time']:
-                time_elem = soup.select_one(selector)
-                if time_elem:
-                    return time_elem.get_text(strip=True)
+                time_elem = doc.select_one(selector)
+                if time_elem is not None:
+                    return doc.get_text(time_elem, strip=True)
         
         # 通用选择器
-        time_selectors = [
-            '.publish-time',
-            '.post-time',
-            '.date',
-            'time',
-            '[class*="time"]',
-            '[class*="date"]',
-            'meta[property="article:published_time"]',
-            'meta[name="publishdate"]'
-        ]
-        
-        for selector in time_selectors:
-            if selector.startswith('meta'):
-                time_elem = soup.select_one(selector)
-                if time_elem:
-                    return time_elem.get('content', '')
-            else:
-                time_elem = soup.select_one(selector)
-                if time_elem:
-                    return time_elem.get_text(strip=True)
+        for selector in self.generic_selectors['time']:
+            time_elem = doc.select_one(selector)
+            if time_elem is not None:
+                if selector.startswith('meta'):
+                    return doc.get_attr(time_elem, 'content')
+                return doc.get_text(time_elem, strip=True)
         
         return ""
     
-    def _extract_summary(self, soup: BeautifulSoup) -> str:
+    def _extract_summary(self, doc) -> str:
         """提取文章摘要"""
-        summary_selectors = [
-            '.summary',
-            '.excerpt',
-            '.description',
-            'meta[name="description"]',
-            'meta[property="og:description"]'
-        ]
-        
-        for selector in summary_selectors:
-            if selector.startswith('meta'):
-                summary_elem = soup.select_one(selector)
-                if summary_elem:
-                    return summary_elem.get('content', '')
-            else:
-                summary_elem = soup.select_one(selector)
-                if summary_elem:
-                    return summary_elem.get_text(strip=True)
+        for selector in self.generic_selectors['summary']:
+            summary_elem = doc.select_one(selector)
+            if summary_elem is not None:
+                if selector.startswith('meta'):
+                    return doc.get_attr(summary_elem, 'content')
+                return doc.get_text(summary_elem, strip=True)
         
         return ""
     
-    def _extract_tags(self, soup: BeautifulSoup) -> List[str]:
+    def _extract_tags(self, doc) -> List[str]:
         """提取文章标签"""
         tags = []
         
         # 尝试多种标签选择器
-        tag_selectors = [
-            '.tags a',
-            '.tag',
-            '.category',
-            '.keywords',
-            'meta[name="keywords"]'
-        ]
-        
-        for selector in tag_selectors:
+        for selector in self.generic_selectors['tags']:
             if selector.startswith('meta'):
-                tag_elem = soup.select_one(selector)
-                if tag_elem:
-                    keywords = tag_elem.get('content', '')
+                tag_elem = doc.select_one(selector)
+                if tag_elem is not None:
+                    keywords = doc.get_attr(tag_elem, 'content')
                     if keywords:
                         tags.extend([tag.strip() for tag in keywords.split(',')])
             else:
-                tag_elems = soup.select(selector)
-                for tag_elem in tag_elems:
-                    tag_text = tag_elem.get_text(strip=True)
+                for tag_elem in doc.select(selector):
+                    tag_text = doc.get_text(tag_elem, strip=True)
                     if tag_text:
                         tags.append(tag_text)
         
-        return list(set(tags))  # 去重
+        return list(dict.fromkeys(tags))  # 去重，保持页面中的顺序
     
     def _clean_text(self, text: str) -> str:
-        """清理文本内容"""
-        # 移除多余的空白字符
-        text = re.sub(r'\s+', ' ', text)
-        # 移除特殊字符
-        text = re.sub(r'[^\w\s\u4e00-\u9fff.,!?;:()（）【】""''""''，。！？；：]', '', text)
-        return text.strip()
+        """清理文本内容（见 text_utils.clean_text）"""
+        return clean_text(text)
+    
+    def _element_text(self, doc, element, cleaned: Dict) -> str:
+        """元素清理后的文本；同一元素只清理一次"""
+        key = id(element)
+        if key not in cleaned:
+            # 同时保存元素本身，避免元素被回收后id被复用
+            cleaned[key] = (element, self._clean_text(doc.get_text(element)))
+        return cleaned[key][1]
     
     def _create_error_response(self, url: str, error_message: str) -> Dict:
         """创建错误响应"""